@@ -1,12 +1,39 @@
 """FastAPI dependencies."""
 
-from fastapi import Depends
+import secrets
+
+from fastapi import Depends, Header, HTTPException
 from sqlalchemy.orm import Session
 
-from app.core.database import get_db
+from app.config import settings
+from app.core.database import get_db, get_read_db
 from app.services.review_service import ReviewService
+from app.services.write_behind import review_writer
 
 
 def get_review_service(db: Session = Depends(get_db)) -> ReviewService:
     """Dependency to get ReviewService instance."""
+    writer = review_writer if settings.write_behind_enabled else None
+    return ReviewService(db, writer=writer)
+
+
+def get_read_review_service(db: Session = Depends(get_read_db)) -> ReviewService:
+    """Dependency to get ReviewService instance for read-only requests."""
     return ReviewService(db)
+
+
+def require_admin(x_admin_token: str | None = Header(None)):
+    """
+    Dependency guarding admin endpoints with the configured admin token.
+
+    Admin endpoints are closed while no token is configured.
+    """
+    if not settings.admin_token:
+        raise HTTPException(
+            status_code=403, detail="Admin API is disabled: ADMIN_TOKEN is not set"
+        )
+    # Сравнение за постоянное время не выдает совпавший префикс токена
+    if x_admin_token is None or not secrets.compare_digest(
+        x_admin_token.encode("utf-8"), settings.admin_token.encode("utf-8")
+    ):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
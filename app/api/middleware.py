@@ -0,0 +1,79 @@
+"""ASGI middleware of the application."""
+
+import time
+from collections.abc import Iterable
+
+from starlette.routing import BaseRoute
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import http_request_duration, http_requests
+
+KNOWN_METHODS = ("GET", "POST", "PUT", "PATCH", "DELETE", "HEAD", "OPTIONS")
+STATUS_CLASSES = ("1xx", "2xx", "3xx", "4xx", "5xx")
+# Метка для запросов, не попавших ни в один маршрут (404): путь запроса
+# в метки не попадает, иначе число рядов было бы неограниченным
+UNMATCHED_ROUTE = "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    Records latency and status of every HTTP request per route template.
+
+    Series for all routes are registered when the middleware is built, so a
+    request costs two dictionary lookups and two lock-free updates.
+    """
+
+    def __init__(self, app: ASGIApp, routes: Iterable[BaseRoute]):
+        """
+        Initialize middleware.
+
+        Args:
+            app: Wrapped ASGI application
+            routes: Routes of the application, used to pre-register series
+        """
+        self.app = app
+        self._series: dict[tuple[str, str], tuple] = {}
+        for route in routes:
+            path = getattr(route, "path", None)
+            if path is None:
+                continue
+            for method in getattr(route, "methods", None) or KNOWN_METHODS:
+                self._register(method, path)
+        for method in KNOWN_METHODS:
+            self._register(method, UNMATCHED_ROUTE)
+
+    def _register(self, method: str, route: str):
+        """Register the series of one method and route."""
+        self._series[method, route] = (
+            http_request_duration.labels(method, route),
+            [http_requests.labels(method, route, status) for status in STATUS_CLASSES],
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        """Pass the request on and record its latency and status."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # Маршрут FastAPI кладет в scope при сопоставлении пути
+            route = scope.get("route")
+            method = scope["method"]
+            series = self._series.get(
+                (method, getattr(route, "path", UNMATCHED_ROUTE))
+            ) or self._series.get((method, UNMATCHED_ROUTE))
+            if series is not None:
+                duration, statuses = series
+                duration.observe(time.perf_counter() - started)
+                statuses[min(max(status_code // 100, 1), 5) - 1].inc()
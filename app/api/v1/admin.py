@@ -0,0 +1,49 @@
+"""Admin API endpoints."""
+
+from fastapi import APIRouter, Depends, HTTPException
+
+from app.api.dependencies import require_admin
+from app.config import settings
+from app.core.exceptions import RetrainingInProgressException
+from app.ml.registry import model_registry
+from app.models.schemas import ModelStatusResponse, RetrainJobResponse
+from app.services.retraining import retraining_manager
+
+router = APIRouter(prefix="/admin", dependencies=[Depends(require_admin)])
+
+
+@router.post("/model/retrain", response_model=RetrainJobResponse, status_code=202)
+async def retrain_model() -> RetrainJobResponse:
+    """
+    Start retraining the model in a background process.
+
+    The model is trained on the built-in data plus stored reviews. When the
+    job succeeds, the new version is published and swapped in without
+    interrupting requests. Poll ``GET /admin/model`` for the job status.
+
+    Returns:
+        Started job
+
+    Raises:
+        HTTPException: If ML is disabled or a job is already running
+    """
+    if not settings.use_ml_sentiment:
+        raise HTTPException(status_code=400, detail="ML sentiment is disabled")
+
+    try:
+        return RetrainJobResponse(**retraining_manager.start())
+    except RetrainingInProgressException as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@router.get("/model", response_model=ModelStatusResponse)
+async def get_model_status() -> ModelStatusResponse:
+    """
+    Get the serving model and the latest retraining job.
+
+    Returns:
+        Model information and job status
+    """
+    return ModelStatusResponse(
+        model=model_registry.info(), job=retraining_manager.status()
+    )
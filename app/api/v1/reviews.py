@@ -1,10 +1,33 @@
 """Reviews API endpoints."""
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 
-from app.api.dependencies import get_review_service
-from app.models.schemas import ReviewCreate, ReviewResponse
-from app.services.review_service import ReviewService
+from app.api.dependencies import get_read_review_service, get_review_service
+from app.config import settings
+from app.core.exceptions import DuplicateReviewException, ServiceOverloadedException
+from app.core.executors import db_executor, inference_executor
+from app.core.serialization import JSON_MEDIA_TYPE
+from app.models.schemas import (
+    ReviewBatchCreate,
+    ReviewCreate,
+    ReviewResponse,
+    ReviewSearchResult,
+    SentimentStatsResponse,
+    StorageTime,
+)
+from app.services.batcher import sentiment_batcher
+from app.services.review_export import (
+    EXPORT_MEDIA_TYPES,
+    stream_export,
+    validate_export_format,
+)
+from app.services.review_service import (
+    ReviewService,
+    stream_reviews_ndjson,
+    validate_sentiment,
+)
+from app.services.sentiment_service import predict_texts
 
 router = APIRouter()
 
@@ -24,10 +47,62 @@ async def create_review(
         Created review with sentiment analysis
 
     Raises:
-        HTTPException: If creation fails
+        HTTPException: If creation fails, the service is saturated or the
+            review is a rejected duplicate
     """
     try:
-        return service.create_review(review)
+        prediction = await sentiment_batcher.predict(review.text)
+        return await db_executor.run(service.save_review, review.text, prediction)
+    except DuplicateReviewException as e:
+        headers = (
+            {"X-Duplicate-Of": str(e.duplicate_of)}
+            if e.duplicate_of is not None
+            else None
+        )
+        raise HTTPException(status_code=409, detail=str(e), headers=headers)
+    except ServiceOverloadedException as e:
+        raise HTTPException(
+            status_code=503, detail=str(e), headers={"Retry-After": "1"}
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception:
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.post("/reviews/batch", response_model=list[ReviewResponse], status_code=201)
+async def create_reviews_batch(
+    batch: ReviewBatchCreate, service: ReviewService = Depends(get_review_service)
+) -> list[ReviewResponse]:
+    """
+    Create many reviews with one vectorized sentiment pass and a bulk insert.
+
+    Args:
+        batch: Reviews to create
+        service: Review service dependency
+
+    Returns:
+        Created reviews with sentiment analysis, in input order
+
+    Raises:
+        HTTPException: If creation fails, the service is saturated or a
+            review is a rejected duplicate
+    """
+    try:
+        texts = [item.text for item in batch.reviews]
+        predictions = await inference_executor.run(predict_texts, texts)
+        return await db_executor.run(service.save_reviews, texts, predictions)
+    except DuplicateReviewException as e:
+        headers = (
+            {"X-Duplicate-Of": str(e.duplicate_of)}
+            if e.duplicate_of is not None
+            else None
+        )
+        raise HTTPException(status_code=409, detail=str(e), headers=headers)
+    except ServiceOverloadedException as e:
+        raise HTTPException(
+            status_code=503, detail=str(e), headers={"Retry-After": "1"}
+        )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception:
@@ -37,23 +112,257 @@ async def create_review(
 @router.get("/reviews", response_model=list[ReviewResponse])
 async def get_reviews(
     sentiment: str | None = Query(None, description="Filter by sentiment"),
-    service: ReviewService = Depends(get_review_service),
-) -> list[ReviewResponse]:
+    after_id: int | None = Query(
+        None, ge=0, description="Return reviews with id greater than this"
+    ),
+    limit: int = Query(
+        settings.reviews_page_default_limit,
+        ge=1,
+        le=settings.reviews_page_max_limit,
+        description="Page size",
+    ),
+    created_after: StorageTime | None = Query(
+        None, description="Return reviews created at or after this time"
+    ),
+    created_before: StorageTime | None = Query(
+        None, description="Return reviews created before this time"
+    ),
+    stream: bool = Query(
+        False, description="Stream all matching reviews as NDJSON instead of a page"
+    ),
+    service: ReviewService = Depends(get_read_review_service),
+) -> Response:
     """
-    Get all reviews with optional sentiment filtering.
+    Get reviews with optional sentiment and time filtering and keyset pagination.
+
+    A page is returned as a JSON list; when the page is full, the
+    ``X-Next-After-Id`` header holds the cursor for the next page. With
+    ``stream=true`` all matching reviews are streamed as NDJSON.
 
     Args:
         sentiment: Optional sentiment filter (positive, negative, neutral)
+        after_id: Keyset cursor from the previous page
+        limit: Page size
+        created_after: Optional lower bound on creation time (inclusive)
+        created_before: Optional upper bound on creation time (exclusive)
+        stream: Whether to stream all reviews as NDJSON
         service: Review service dependency
 
     Returns:
-        List of reviews matching the filter
+        JSON list of reviews matching the filter
+
+    Raises:
+        HTTPException: If filtering fails or the service is saturated
+    """
+    try:
+        if stream:
+            validate_sentiment(sentiment)
+            return StreamingResponse(
+                stream_reviews_ndjson(
+                    sentiment, after_id, created_after, created_before
+                ),
+                media_type="application/x-ndjson",
+            )
+
+        # Страница кодируется в JSON из строк выборки, минуя модели ответа;
+        # response_model остается для схемы OpenAPI
+        body, next_after_id = await db_executor.run(
+            service.get_reviews_json,
+            sentiment,
+            after_id,
+            limit,
+            created_after,
+            created_before,
+        )
+        headers = (
+            {"X-Next-After-Id": str(next_after_id)}
+            if next_after_id is not None
+            else None
+        )
+        return Response(body, media_type=JSON_MEDIA_TYPE, headers=headers)
+    except ServiceOverloadedException as e:
+        raise HTTPException(
+            status_code=503, detail=str(e), headers={"Retry-After": "1"}
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception:
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.get(
+    "/reviews/export",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "content": {media_type: {} for media_type in EXPORT_MEDIA_TYPES.values()},
+            "description": "Exported reviews",
+        }
+    },
+)
+async def export_reviews(
+    export_format: str = Query(
+        "jsonl", alias="format", description="Output format: jsonl, csv or parquet"
+    ),
+    sentiment: str | None = Query(None, description="Filter by sentiment"),
+    created_after: StorageTime | None = Query(
+        None, description="Export reviews created at or after this time"
+    ),
+    created_before: StorageTime | None = Query(
+        None, description="Export reviews created before this time"
+    ),
+    after_id: int | None = Query(
+        None, ge=0, description="Export reviews with id greater than this"
+    ),
+) -> StreamingResponse:
+    """
+    Stream all matching reviews as a JSONL, CSV or Parquet file.
+
+    Rows are read from a server-side cursor and encoded directly, without
+    building a response model per review, so memory does not grow with the
+    number of exported reviews.
+
+    Args:
+        export_format: Output format (jsonl, csv, parquet)
+        sentiment: Optional sentiment filter (positive, negative, neutral)
+        created_after: Optional lower bound on creation time (inclusive)
+        created_before: Optional upper bound on creation time (exclusive)
+        after_id: Optional keyset cursor to resume an interrupted export
+
+    Returns:
+        Streaming response with the exported file
 
     Raises:
-        HTTPException: If filtering fails
+        HTTPException: If parameters are invalid or the format is unavailable
     """
     try:
-        return service.get_reviews(sentiment=sentiment)
+        validate_sentiment(sentiment)
+        validate_export_format(export_format)
+        return StreamingResponse(
+            stream_export(
+                export_format, sentiment, created_after, created_before, after_id
+            ),
+            media_type=EXPORT_MEDIA_TYPES[export_format],
+            headers={
+                "Content-Disposition": (
+                    f'attachment; filename="reviews.{export_format}"'
+                )
+            },
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception:
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.get("/reviews/search", response_model=list[ReviewSearchResult])
+async def search_reviews(
+    q: str = Query(..., min_length=1, max_length=500, description="Search phrase"),
+    sentiment: str | None = Query(None, description="Filter by sentiment"),
+    created_after: StorageTime | None = Query(
+        None, description="Return reviews created at or after this time"
+    ),
+    created_before: StorageTime | None = Query(
+        None, description="Return reviews created before this time"
+    ),
+    limit: int = Query(
+        settings.reviews_page_default_limit,
+        ge=1,
+        le=settings.reviews_page_max_limit,
+        description="Page size",
+    ),
+    offset: int = Query(
+        0,
+        ge=0,
+        le=settings.reviews_search_max_offset,
+        description="Number of best matches to skip",
+    ),
+    service: ReviewService = Depends(get_read_review_service),
+) -> Response:
+    """
+    Full-text search over stored reviews, ranked by relevance (bm25).
+
+    Every word of the phrase must occur in a review; word forms are matched
+    by stem. When the page is full, the ``X-Next-Offset`` header holds the
+    offset of the next page.
+
+    Args:
+        q: Search phrase
+        sentiment: Optional sentiment filter (positive, negative, neutral)
+        created_after: Optional lower bound on creation time (inclusive)
+        created_before: Optional upper bound on creation time (exclusive)
+        limit: Page size
+        offset: Number of best matches to skip
+        service: Review service dependency
+
+    Returns:
+        JSON list of matching reviews, most relevant first
+
+    Raises:
+        HTTPException: If parameters are invalid or the service is saturated
+    """
+    try:
+        body, next_offset = await db_executor.run(
+            service.search_reviews_json,
+            q,
+            sentiment,
+            created_after,
+            created_before,
+            limit,
+            offset,
+        )
+        headers = (
+            {"X-Next-Offset": str(next_offset)} if next_offset is not None else None
+        )
+        return Response(body, media_type=JSON_MEDIA_TYPE, headers=headers)
+    except ServiceOverloadedException as e:
+        raise HTTPException(
+            status_code=503, detail=str(e), headers={"Retry-After": "1"}
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception:
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.get("/reviews/stats", response_model=SentimentStatsResponse)
+async def get_review_stats(
+    bucket: str | None = Query(
+        None, description="Optional time bucketing: hour or day"
+    ),
+    created_after: StorageTime | None = Query(
+        None, description="Count reviews created at or after this time"
+    ),
+    created_before: StorageTime | None = Query(
+        None, description="Count reviews created before this time"
+    ),
+    service: ReviewService = Depends(get_read_review_service),
+) -> SentimentStatsResponse:
+    """
+    Get review counts and ratios per sentiment, optionally bucketed by time.
+
+    Served from hourly rollup counters, so time bounds are aligned to hours.
+
+    Args:
+        bucket: Optional time bucketing (hour, day)
+        created_after: Optional lower bound on creation time
+        created_before: Optional upper bound on creation time
+        service: Review service dependency
+
+    Returns:
+        Sentiment statistics for the range
+
+    Raises:
+        HTTPException: If parameters are invalid or the service is saturated
+    """
+    try:
+        return await db_executor.run(
+            service.get_stats, bucket, created_after, created_before
+        )
+    except ServiceOverloadedException as e:
+        raise HTTPException(
+            status_code=503, detail=str(e), headers={"Retry-After": "1"}
+        )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception:
@@ -61,25 +370,55 @@ async def get_reviews(
 
 
 @router.post("/reviews/analyze", response_model=dict)
-async def analyze_sentiment_detailed(
-    review: ReviewCreate, service: ReviewService = Depends(get_review_service)
-) -> dict:
+async def analyze_sentiment_detailed(review: ReviewCreate) -> dict:
     """
     Analyze sentiment of text without saving to database.
     Returns detailed information including probabilities if ML is used.
 
     Args:
         review: Review data to analyze
-        service: Review service dependency
 
     Returns:
         Detailed sentiment analysis result
 
     Raises:
-        HTTPException: If analysis fails
+        HTTPException: If analysis fails or the service is saturated
+    """
+    try:
+        prediction = await sentiment_batcher.predict(review.text)
+        return prediction.to_dict()
+    except ServiceOverloadedException as e:
+        raise HTTPException(
+            status_code=503, detail=str(e), headers={"Retry-After": "1"}
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception:
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.post("/reviews/analyze/batch", response_model=list[dict])
+async def analyze_sentiment_detailed_batch(batch: ReviewBatchCreate) -> list[dict]:
+    """
+    Analyze sentiment of many texts without saving to database.
+
+    Args:
+        batch: Reviews to analyze
+
+    Returns:
+        Detailed sentiment analysis result for each review, in input order
+
+    Raises:
+        HTTPException: If analysis fails or the service is saturated
     """
     try:
-        return service.analyze_sentiment_detailed(review.text)
+        texts = [item.text for item in batch.reviews]
+        predictions = await inference_executor.run(predict_texts, texts)
+        return [prediction.to_dict() for prediction in predictions]
+    except ServiceOverloadedException as e:
+        raise HTTPException(
+            status_code=503, detail=str(e), headers={"Retry-After": "1"}
+        )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception:
@@ -9,6 +9,18 @@ class Settings(BaseSettings):
     # База данных
     database_url: str = "sqlite:///./reviews.db"
 
+    # Профиль производительности БД: default (как есть) или production
+    # (WAL, pragma-настройки на подключении, размер пула)
+    database_profile: str = "default"
+    database_pool_size: int = 8
+    database_max_overflow: int = 8
+    database_pool_timeout: float = 30.0
+    database_cache_size_kib: int = 65536
+    database_mmap_size: int = 268435456
+    database_busy_timeout_ms: int = 5000
+    # Отдельные движки для чтения и записи (только профиль production)
+    database_split_read_write: bool = False
+
     # API
     api_v1_prefix: str = "/api/v1"
     project_name: str = "Reviews Sentiment Service"
@@ -17,8 +29,97 @@ class Settings(BaseSettings):
     # Разработка
     debug: bool = False
 
+    # Метрики в формате Prometheus (/metrics и замер времени запросов)
+    metrics_enabled: bool = True
+
+    # Production-запуск (scripts/serve.py): мастер-процесс и воркеры uvicorn
+    server_host: str = "127.0.0.1"
+    server_port: int = 8000
+    # Число воркеров; 0 — по числу доступных ядер
+    server_workers: int = 0
+    # Привязывать каждый воркер к своему ядру
+    server_cpu_affinity: bool = True
+    # Сколько секунд воркер дорабатывает текущие запросы при остановке
+    server_graceful_timeout: float = 30.0
+    server_backlog: int = 2048
+
     # Настройки ML
     use_ml_sentiment: bool = True
+    # Каталог версий обученных моделей; пока версий нет, используется
+    # модель из app/ml/sentiment_model.joblib
+    sentiment_model_dir: str = "./models"
+    # Как часто воркеры проверяют, не опубликована ли новая версия (0 — никогда)
+    sentiment_model_reload_interval: float = 5.0
+    # Проверять SHA-256 массивов модели при загрузке
+    sentiment_model_verify_checksums: bool = True
+    # Сколько последних сохраненных отзывов использовать при переобучении
+    retrain_max_reviews: int = 50000
+    # Токен для /admin эндпоинтов (заголовок X-Admin-Token); без него они закрыты
+    admin_token: str | None = None
+    # Файл словаря для резервного анализатора: строки "термин<TAB>positive|negative"
+    sentiment_lexicon_path: str | None = None
+
+    # Пагинация и стриминг GET /reviews
+    reviews_page_default_limit: int = 100
+    reviews_page_max_limit: int = 1000
+    reviews_stream_chunk_size: int = 1000
+    # Строк в группе строк (row group) при экспорте в Parquet
+    reviews_export_row_group_size: int = 65536
+    # Полнотекстовый поиск GET /reviews/search: предел смещения (глубина выдачи)
+    reviews_search_max_offset: int = 10000
+
+    # Пакетная обработка
+    batch_max_size: int = 5000
+
+    # Дубликаты при записи: reject (отклонять с 409), link (сохранять со ссылкой
+    # на канонический отзыв), count (не сохранять, увеличивать счетчик копий)
+    review_duplicate_policy: str = "link"
+    # Поиск почти дубликатов (MinHash/LSH) и порог сходства Жаккара
+    review_near_duplicates: bool = True
+    review_near_duplicate_threshold: float = 0.8
+    # Сколько последних канонических отзывов держать в индексе в памяти
+    review_near_duplicate_index_size: int = 200000
+
+    # Хранение: отзывы старше retention_max_age_days переносятся из таблицы
+    # в сжатые сегменты архива (холодный слой), читаемые GET /reviews и экспортом
+    retention_enabled: bool = False
+    retention_max_age_days: int = 90
+    retention_archive_dir: str = "./archive"
+    # Как часто запускать архивирование и сколько отзывов переносить за проход
+    retention_interval_seconds: float = 3600.0
+    retention_batch_size: int = 50000
+
+    # Выполнение блокирующих операций вне event loop
+    # Режимы: inline (в потоке event loop), thread, process (только инференс)
+    inference_executor: str = "thread"
+    inference_workers: int = 4
+    inference_max_pending: int = 256
+    db_executor: str = "thread"
+    db_workers: int = 8
+    db_max_pending: int = 256
+
+    # Отложенная запись (write-behind) с групповым коммитом
+    # Требует одного процесса-писателя: id отзывов выделяются в процессе
+    write_behind_enabled: bool = False
+    write_behind_log_dir: str = "./write_behind"
+    write_behind_batch_size: int = 500
+    write_behind_flush_interval_ms: float = 50.0
+    write_behind_fsync: bool = True
+    # Неудачных сбросов подряд, после которых отзывы, которые не вставляются,
+    # откладываются в файлы dead-letter-*.log
+    write_behind_max_retries: int = 10
+
+    # Микро-батчинг одиночных запросов к модели
+    inference_batching: bool = True
+    inference_batch_max_size: int = 64
+    inference_batch_max_wait_ms: float = 2.0
+
+    # Кэш предсказаний модели (LRU + TTL), ключ: хэш нормализованного текста
+    # и версия модели. Общий SQLite-файл позволяет делить кэш между воркерами
+    prediction_cache_enabled: bool = True
+    prediction_cache_max_size: int = 100000
+    prediction_cache_ttl_seconds: float = 3600.0
+    prediction_cache_shared_path: str | None = None
 
     class Config:
         env_file = ".env"
@@ -1,24 +1,139 @@
 """Database configuration and session management."""
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import time
+
+from sqlalchemy import Engine, create_engine, event
+from sqlalchemy.orm import Session, sessionmaker
 
 from app.config import settings
-from app.models.database import Base
+from app.core.metrics import DB_COMMIT_TIME, DB_QUERY_TIME
+from app.core.migrations import run_migrations
+
+DATABASE_PROFILES = ("default", "production")
+
+
+def _is_sqlite_file(url: str) -> bool:
+    """Check whether a database URL points to an on-disk SQLite database."""
+    return url.startswith("sqlite") and ":memory:" not in url and url != "sqlite://"
+
+
+def _apply_production_pragmas(engine: Engine, read_only: bool = False):
+    """Tune every new SQLite connection of the engine for concurrent load."""
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        # WAL: читатели не блокируют писателя и наоборот
+        cursor.execute("PRAGMA journal_mode=WAL")
+        # В режиме WAL NORMAL безопасен и не делает fsync на каждый коммит
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA cache_size=-{settings.database_cache_size_kib}")
+        cursor.execute(f"PRAGMA mmap_size={settings.database_mmap_size}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute(f"PRAGMA busy_timeout={settings.database_busy_timeout_ms}")
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")
+        cursor.close()
+
+
+def _instrument_queries(engine: Engine):
+    """Record the execution time of every statement of the engine."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info["query_started"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def stop_query_timer(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.pop("query_started", None)
+        if started is not None:
+            DB_QUERY_TIME.observe(time.perf_counter() - started)
+
+
+# Время коммита сессий (вместе с выталкиванием несохраненных объектов)
+@event.listens_for(Session, "before_commit")
+def _start_commit_timer(session: Session):
+    session.info["commit_started"] = time.perf_counter()
+
+
+@event.listens_for(Session, "after_commit")
+def _stop_commit_timer(session: Session):
+    started = session.info.pop("commit_started", None)
+    if started is not None:
+        DB_COMMIT_TIME.observe(time.perf_counter() - started)
+
+
+def build_engine(
+    url: str,
+    profile: str = "default",
+    pool_size: int | None = None,
+    max_overflow: int | None = None,
+    read_only: bool = False,
+) -> Engine:
+    """
+    Create an SQLAlchemy engine for the given performance profile.
+
+    The ``default`` profile keeps SQLite's stock settings. The ``production``
+    profile switches on-disk SQLite databases to WAL, sets synchronous,
+    cache_size, mmap_size, temp_store and busy_timeout on every connection
+    and sizes the connection pool.
+
+    Args:
+        url: Database URL
+        profile: 'default' or 'production'
+        pool_size: Connection pool size (production profile only)
+        max_overflow: Connections allowed above pool_size (production only)
+        read_only: Whether connections may only read (production profile only)
+
+    Returns:
+        Configured engine
+    """
+    if profile not in DATABASE_PROFILES:
+        raise ValueError(f"Invalid database profile: {profile}")
+
+    connect_args = {"check_same_thread": False}  # Необходимо для SQLite
+
+    if profile == "default" or not _is_sqlite_file(url):
+        engine = create_engine(url, connect_args=connect_args)
+        _instrument_queries(engine)
+        return engine
+
+    engine = create_engine(
+        url,
+        connect_args=connect_args,
+        pool_size=pool_size or settings.database_pool_size,
+        max_overflow=(
+            settings.database_max_overflow if max_overflow is None else max_overflow
+        ),
+        pool_timeout=settings.database_pool_timeout,
+    )
+    _apply_production_pragmas(engine, read_only=read_only)
+    _instrument_queries(engine)
+    return engine
+
 
 # Создаем SQLAlchemy движок
-engine = create_engine(
-    settings.database_url,
-    connect_args={"check_same_thread": False},  # Необходимо для SQLite
-)
+if settings.database_split_read_write:
+    # SQLite допускает одного писателя: пул из одного соединения выстраивает
+    # записи в очередь вместо ошибок "database is locked"
+    engine = build_engine(
+        settings.database_url, settings.database_profile, pool_size=1, max_overflow=0
+    )
+    read_engine = build_engine(
+        settings.database_url, settings.database_profile, read_only=True
+    )
+else:
+    engine = build_engine(settings.database_url, settings.database_profile)
+    read_engine = engine
 
-# Создаем класс SessionLocal
+# Создаем классы сессий для записи и для чтения
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 
 
 def create_tables():
-    """Create all database tables."""
-    Base.metadata.create_all(bind=engine)
+    """Create all database tables and migrate existing ones."""
+    run_migrations(engine)
 
 
 def get_db():
@@ -28,3 +143,12 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def get_read_db():
+    """Dependency to get a database session for read-only requests."""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
@@ -14,3 +14,21 @@ class EmptyTextException(ReviewServiceException):
 class DatabaseException(ReviewServiceException):
     """Exception raised for database operation errors."""
     pass
+
+
+class ServiceOverloadedException(ReviewServiceException):
+    """Exception raised when a worker pool is saturated and cannot accept work."""
+    pass
+
+
+class RetrainingInProgressException(ReviewServiceException):
+    """Exception raised when a retraining job is started while another runs."""
+    pass
+
+
+class DuplicateReviewException(ReviewServiceException):
+    """Exception raised when a review duplicates a stored one and is rejected."""
+
+    def __init__(self, message: str, duplicate_of: int | None = None):
+        super().__init__(message)
+        self.duplicate_of = duplicate_of
@@ -0,0 +1,153 @@
+"""Bounded executors for running blocking work off the event loop."""
+
+import asyncio
+import multiprocessing
+from collections.abc import Callable
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, TypeVar
+
+from app.config import settings
+from app.core.exceptions import ServiceOverloadedException
+
+T = TypeVar("T")
+
+EXECUTOR_MODES = ("inline", "thread", "process")
+
+
+def _init_inference_worker():
+    """Load the shared model once in every inference worker process."""
+    from app.ml.registry import model_registry
+
+    if settings.use_ml_sentiment:
+        model_registry.load()
+
+
+class BoundedExecutor:
+    """
+    Runs blocking callables in a thread or process pool with backpressure.
+
+    At most ``max_pending`` calls may be queued or running at once; further
+    calls fail fast with ``ServiceOverloadedException`` instead of piling up
+    on the event loop. In ``inline`` mode the callable runs directly on the
+    calling thread (the pre-pool behaviour).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        mode: str,
+        max_workers: int,
+        max_pending: int,
+        initializer: Callable[[], None] | None = None,
+    ):
+        """
+        Initialize executor.
+
+        Args:
+            name: Name used in error messages and stats
+            mode: 'inline', 'thread' or 'process'
+            max_workers: Pool size
+            max_pending: Maximum number of queued plus running calls
+            initializer: Callable run once in every pool worker
+        """
+        if mode not in EXECUTOR_MODES:
+            raise ValueError(f"Invalid executor mode for {name}: {mode}")
+
+        self.name = name
+        self.mode = mode
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.initializer = initializer
+        self._executor: Executor | None = None
+        self._pending = 0
+        self._rejected = 0
+
+    def start(self):
+        """Create the underlying pool if it does not exist yet."""
+        if self._executor is not None or self.mode == "inline":
+            return
+
+        if self.mode == "process":
+            # spawn вместо fork: родительский процесс уже держит потоки и event loop
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=self.initializer,
+            )
+        else:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix=self.name,
+                initializer=self.initializer,
+            )
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        """
+        Run a blocking callable without blocking the event loop.
+
+        Args:
+            fn: Callable to run (must be picklable in process mode)
+            *args: Positional arguments for the callable
+
+        Returns:
+            Result of the callable
+
+        Raises:
+            ServiceOverloadedException: If the executor queue is full
+        """
+        if self._pending >= self.max_pending:
+            self._rejected += 1
+            raise ServiceOverloadedException(
+                f"{self.name} executor is saturated, try again later"
+            )
+
+        self._pending += 1
+        try:
+            if self.mode == "inline":
+                return fn(*args)
+
+            self.start()
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, partial(fn, *args))
+        finally:
+            self._pending -= 1
+
+    def shutdown(self):
+        """Stop the underlying pool, waiting for running calls to finish."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Describe executor state for health checks.
+
+        Returns:
+            Dictionary with mode, pool size, queue depth and rejections
+        """
+        return {
+            "mode": self.mode,
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "pending": self._pending,
+            "rejected": self._rejected,
+        }
+
+
+# Пул для CPU-bound инференса модели
+inference_executor = BoundedExecutor(
+    name="inference",
+    mode=settings.inference_executor,
+    max_workers=settings.inference_workers,
+    max_pending=settings.inference_max_pending,
+    initializer=_init_inference_worker,
+)
+
+# Пул для блокирующих операций с базой данных
+db_executor = BoundedExecutor(
+    name="db",
+    mode=settings.db_executor,
+    max_workers=settings.db_workers,
+    max_pending=settings.db_max_pending,
+)
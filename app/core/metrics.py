@@ -0,0 +1,435 @@
+"""Low-overhead process metrics in the Prometheus text exposition format.
+
+Counters and histograms are sharded per thread: every thread increments its
+own cells without locks, and a scrape sums the shards of all threads. The
+hot path is a thread-local lookup plus a few list updates; the lock is
+taken only when a thread touches a metric for the first time.
+
+Label sets are registered up front (``labels()`` at import or startup time)
+and the returned children are kept, so that instrumented code never builds
+label tuples or looks them up under a lock.
+"""
+
+import bisect
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterable
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Границы корзин гистограмм (секунды)
+REQUEST_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+STAGE_BUCKETS = (
+    0.00001,
+    0.000025,
+    0.00005,
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+# Сэмпл собранной метрики: (суффикс имени, метки, значение)
+Sample = tuple[str, dict[str, str], float]
+
+
+def _format_value(value: float) -> str:
+    """Format a sample value the way Prometheus expects."""
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    """Format a label set, escaping values."""
+    if not labels:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(
+            name,
+            str(value).replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\""),
+        )
+        for name, value in labels.items()
+    )
+    return "{" + pairs + "}"
+
+
+class _Sharded:
+    """Per-thread cells of one metric child, summed on collection."""
+
+    def __init__(self, width: int):
+        """
+        Initialize shards.
+
+        Args:
+            width: Number of values in every cell
+        """
+        self._width = width
+        self._local = threading.local()
+        self._cells: list[list[float]] = []
+        self._lock = threading.Lock()
+
+    def _cell(self) -> list[float]:
+        """Get the calling thread's cell, creating it on first use."""
+        try:
+            return self._local.cell
+        except AttributeError:
+            cell = [0] * self._width
+            with self._lock:
+                self._cells.append(cell)
+            self._local.cell = cell
+            return cell
+
+    def _totals(self) -> list[float]:
+        """Sum the cells of all threads."""
+        with self._lock:
+            cells = list(self._cells)
+        return [sum(values) for values in zip(*cells, strict=True)] or [0] * (
+            self._width
+        )
+
+
+class CounterChild(_Sharded):
+    """Counter for one label set."""
+
+    def __init__(self):
+        """Initialize counter."""
+        super().__init__(1)
+
+    def inc(self, amount: float = 1):
+        """Increase the counter."""
+        try:
+            cell = self._local.cell
+        except AttributeError:
+            cell = self._cell()
+        cell[0] += amount
+
+    def value(self) -> float:
+        """Current value summed over threads."""
+        return self._totals()[0]
+
+
+class HistogramChild(_Sharded):
+    """Histogram for one label set."""
+
+    def __init__(self, buckets: tuple[float, ...]):
+        """
+        Initialize histogram.
+
+        Args:
+            buckets: Sorted upper bounds of the buckets, without +Inf
+        """
+        # Ячейка: счетчики корзин, корзина +Inf, сумма наблюдений
+        super().__init__(len(buckets) + 2)
+        self._buckets = buckets
+        self._sum_index = len(buckets) + 1
+
+    def observe(self, value: float):
+        """Record one observation."""
+        try:
+            cell = self._local.cell
+        except AttributeError:
+            cell = self._cell()
+        cell[bisect.bisect_left(self._buckets, value)] += 1
+        cell[self._sum_index] += value
+
+    def time(self) -> "_Timer":
+        """Context manager that observes the duration of its block."""
+        return _Timer(self)
+
+    def snapshot(self) -> tuple[list[float], float, float]:
+        """
+        Get cumulative bucket counts, the sum and the count of observations.
+
+        Returns:
+            Tuple of (cumulative counts per bucket including +Inf, sum, count)
+        """
+        totals = self._totals()
+        cumulative = []
+        running = 0
+        for count in totals[: self._sum_index]:
+            running += count
+            cumulative.append(running)
+        return cumulative, totals[self._sum_index], running
+
+
+class _Timer:
+    """Measures a block of code into a histogram."""
+
+    __slots__ = ("_histogram", "_started")
+
+    def __init__(self, histogram: HistogramChild):
+        """Bind the timer to the histogram it observes into."""
+        self._histogram = histogram
+
+    def __enter__(self):
+        """Start timing."""
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        """Observe the elapsed time, also when the block raised."""
+        self._histogram.observe(time.perf_counter() - self._started)
+
+
+class _Metric(ABC):
+    """Named metric with a fixed set of label names."""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...]):
+        """
+        Initialize metric.
+
+        Args:
+            name: Metric name
+            documentation: Help text
+            labelnames: Names of the labels
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._children: dict[tuple[str, ...], _Sharded] = {}
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def _new_child(self) -> _Sharded:
+        """Create the child for a newly registered label set."""
+
+    def labels(self, *values: str):
+        """
+        Get the child for a label set, registering it on first use.
+
+        Call this outside hot paths and keep the child.
+
+        Args:
+            values: Label values, in the order of the label names
+
+        Returns:
+            Counter or histogram child for the label set
+
+        Raises:
+            ValueError: If the number of values does not match the labels
+        """
+        if len(values) != len(self.labelnames):
+            raise ValueError(
+                f"Metric {self.name} expects labels {self.labelnames}, got {values}"
+            )
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def children(self) -> list[tuple[dict[str, str], _Sharded]]:
+        """Registered children with their label sets."""
+        with self._lock:
+            items = list(self._children.items())
+        return [
+            (dict(zip(self.labelnames, values, strict=True)), child)
+            for values, child in items
+        ]
+
+    @abstractmethod
+    def samples(self) -> Iterable[Sample]:
+        """Collect the current samples of all children."""
+
+
+class Counter(_Metric):
+    """Monotonic counter."""
+
+    kind = "counter"
+
+    def _new_child(self) -> CounterChild:
+        """Create a counter child."""
+        return CounterChild()
+
+    def samples(self) -> Iterable[Sample]:
+        """Collect the total of every child."""
+        for labels, child in self.children():
+            yield "_total", labels, child.value()
+
+
+class Histogram(_Metric):
+    """Histogram of observed values."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...],
+        buckets: tuple[float, ...] = REQUEST_BUCKETS,
+    ):
+        """
+        Initialize histogram.
+
+        Args:
+            name: Metric name
+            documentation: Help text
+            labelnames: Names of the labels
+            buckets: Upper bounds of the buckets
+        """
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> HistogramChild:
+        """Create a histogram child with the metric's buckets."""
+        return HistogramChild(self.buckets)
+
+    def samples(self) -> Iterable[Sample]:
+        """Collect the buckets, sum and count of every child."""
+        bounds = [*map(_format_value, self.buckets), "+Inf"]
+        for labels, child in self.children():
+            cumulative, total, count = child.snapshot()
+            for bound, value in zip(bounds, cumulative, strict=True):
+                yield "_bucket", {**labels, "le": bound}, value
+            yield "_sum", labels, total
+            yield "_count", labels, count
+
+
+# Сборщик метрик, значения которых вычисляются при каждом запросе /metrics:
+# возвращает (имя, тип, описание, сэмплы)
+Collector = Callable[[], Iterable[tuple[str, str, str, list[Sample]]]]
+
+
+class MetricsRegistry:
+    """Set of metrics and collectors rendered together."""
+
+    def __init__(self):
+        """Initialize an empty registry."""
+        self._metrics: dict[str, _Metric] = {}
+        self._collectors: list[Collector] = []
+
+    def counter(
+        self, name: str, documentation: str, labelnames: tuple[str, ...] = ()
+    ) -> Counter:
+        """Create and register a counter (its name is exposed with ``_total``)."""
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = REQUEST_BUCKETS,
+    ) -> Histogram:
+        """Create and register a histogram."""
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def _register(self, metric: _Metric):
+        """Add a metric, rejecting duplicate names."""
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def register_collector(self, collector: Collector):
+        """Add a function whose metrics are computed at scrape time."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """
+        Render all metrics in the Prometheus text exposition format.
+
+        Returns:
+            Exposition text
+        """
+        lines = []
+        families = [
+            (metric.name, metric.kind, metric.documentation, metric.samples())
+            for metric in self._metrics.values()
+        ]
+        for collector in self._collectors:
+            families.extend(collector())
+
+        for name, kind, documentation, samples in families:
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {kind}")
+            for suffix, labels, value in samples:
+                lines.append(
+                    f"{name}{suffix}{_format_labels(labels)} {_format_value(value)}"
+                )
+        return "\n".join(lines) + "\n"
+
+
+# Реестр метрик процесса
+metrics = MetricsRegistry()
+
+http_requests = metrics.counter(
+    "http_requests",
+    "HTTP requests by method, route template and status class",
+    ("method", "route", "status"),
+)
+http_request_duration = metrics.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by method and route template",
+    ("method", "route"),
+)
+stage_duration = metrics.histogram(
+    "reviews_stage_duration_seconds",
+    "Time spent in internal processing stages",
+    ("stage",),
+    STAGE_BUCKETS,
+)
+sentiment_predictions = metrics.counter(
+    "reviews_sentiment_predictions",
+    "Texts analyzed, by method that produced the prediction",
+    ("method",),
+)
+ml_fallbacks = metrics.counter(
+    "reviews_ml_fallbacks",
+    "Times the ML model was skipped in favor of the dictionary analyzer",
+    ("reason",),
+)
+duplicates = metrics.counter(
+    "reviews_duplicates",
+    "Incoming reviews detected as duplicates of stored ones, by kind",
+    ("kind",),
+)
+
+# Заранее зарегистрированные наборы меток для горячих путей
+MODEL_LOAD_TIME = stage_duration.labels("model_load")
+TFIDF_TRANSFORM_TIME = stage_duration.labels("tfidf_transform")
+CLASSIFIER_SCORING_TIME = stage_duration.labels("classifier_scoring")
+DICTIONARY_FALLBACK_TIME = stage_duration.labels("dictionary_fallback")
+DB_QUERY_TIME = stage_duration.labels("db_query")
+DB_COMMIT_TIME = stage_duration.labels("db_commit")
+ML_PREDICTIONS = sentiment_predictions.labels("ml")
+DICTIONARY_PREDICTIONS = sentiment_predictions.labels("dictionary")
+FALLBACK_MODEL_UNAVAILABLE = ml_fallbacks.labels("model_unavailable")
+FALLBACK_PREDICTION_ERROR = ml_fallbacks.labels("prediction_error")
+EXACT_DUPLICATES = duplicates.labels("exact")
+NEAR_DUPLICATES = duplicates.labels("near")
@@ -0,0 +1,295 @@
+"""Schema migrations for existing SQLite databases."""
+
+from collections import Counter
+from collections.abc import Callable
+
+from sqlalchemy import Connection, Engine, bindparam, inspect, text
+
+from app.core.text_hash import content_hash
+from app.models.database import Base, Review, ReviewSegment, SentimentRollup
+
+
+def _migrate_typed_reviews(conn: Connection):
+    """
+    Convert the legacy string-typed reviews table to the typed schema.
+
+    Sentiment labels become small integer codes, ISO-8601 strings in
+    created_at become DATETIME values and the confidence column is added.
+    If ``reviews_legacy`` is left over from an interrupted run, the copy is
+    resumed from it instead of renaming again.
+    """
+    if not inspect(conn).has_table("reviews_legacy"):
+        conn.execute(text("ALTER TABLE reviews RENAME TO reviews_legacy"))
+    Review.__table__.create(conn, checkfirst=True)
+    conn.execute(
+        text(
+            """
+            INSERT INTO reviews (id, text, sentiment, confidence, created_at)
+            SELECT
+                id,
+                text,
+                CASE sentiment
+                    WHEN 'positive' THEN 1
+                    WHEN 'negative' THEN -1
+                    ELSE 0
+                END,
+                NULL,
+                -- Формат хранения DATETIME в SQLAlchemy всегда с микросекундами
+                CASE length(created_at)
+                    WHEN 19 THEN replace(created_at, 'T', ' ') || '.000000'
+                    ELSE replace(created_at, 'T', ' ')
+                END
+            FROM reviews_legacy
+            WHERE id NOT IN (SELECT id FROM reviews)
+            """
+        )
+    )
+    conn.execute(text("DROP TABLE reviews_legacy"))
+
+
+def _migrate_sentiment_rollups(conn: Connection):
+    """Create hourly sentiment rollups and backfill them from stored reviews."""
+    SentimentRollup.__table__.create(conn, checkfirst=True)
+    conn.execute(
+        text(
+            """
+            INSERT INTO sentiment_rollups (bucket_start, sentiment, count)
+            SELECT
+                strftime('%Y-%m-%d %H:00:00.000000', created_at),
+                sentiment,
+                count(*)
+            FROM reviews
+            GROUP BY 1, 2
+            """
+        )
+    )
+
+
+def create_search_index(conn: Connection):
+    """
+    Create the full-text index over review texts if it does not exist.
+
+    The FTS5 table stores only the inverted index; texts stay in
+    ``reviews`` (external content) and triggers keep the index in sync with
+    every insert, update and delete, whichever code path performs it. The
+    unicode61 tokenizer folds case and diacritics (``ё`` matches ``е``) for
+    Cyrillic as well as Latin text.
+    """
+    conn.execute(
+        text(
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS reviews_fts USING fts5(
+                text,
+                content='reviews',
+                content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2'
+            )
+            """
+        )
+    )
+    conn.execute(
+        text(
+            """
+            CREATE TRIGGER IF NOT EXISTS reviews_fts_insert AFTER INSERT ON reviews
+            BEGIN
+                INSERT INTO reviews_fts (rowid, text) VALUES (new.id, new.text);
+            END
+            """
+        )
+    )
+    conn.execute(
+        text(
+            """
+            CREATE TRIGGER IF NOT EXISTS reviews_fts_delete AFTER DELETE ON reviews
+            BEGIN
+                INSERT INTO reviews_fts (reviews_fts, rowid, text)
+                VALUES ('delete', old.id, old.text);
+            END
+            """
+        )
+    )
+    conn.execute(
+        text(
+            """
+            CREATE TRIGGER IF NOT EXISTS reviews_fts_update
+            AFTER UPDATE OF text ON reviews
+            BEGIN
+                INSERT INTO reviews_fts (reviews_fts, rowid, text)
+                VALUES ('delete', old.id, old.text);
+                INSERT INTO reviews_fts (rowid, text) VALUES (new.id, new.text);
+            END
+            """
+        )
+    )
+
+
+def _migrate_search_index(conn: Connection):
+    """Create the full-text index and fill it from stored reviews."""
+    create_search_index(conn)
+    conn.execute(text("INSERT INTO reviews_fts (reviews_fts) VALUES ('rebuild')"))
+
+
+def link_exact_duplicates(
+    conn: Connection, after_id: int = 0, chunk_size: int = 5000
+) -> tuple[int, int]:
+    """
+    Hash reviews that have no content hash yet and link exact duplicates.
+
+    The first review with a given normalized text becomes canonical and
+    gets the hash; later ones get ``duplicate_of`` pointing to it and are
+    added to its ``duplicate_count``. Used to backfill existing databases
+    and after bulk imports, which insert reviews without hashes.
+
+    Args:
+        conn: Connection in an open transaction
+        after_id: Only look at reviews with a greater id
+        chunk_size: Number of reviews processed at once
+
+    Returns:
+        Tuple of (reviews hashed as canonical, reviews linked as duplicates)
+    """
+    canonical_total = linked_total = 0
+    while True:
+        rows = conn.execute(
+            text(
+                """
+                SELECT id, text FROM reviews
+                WHERE id > :after_id
+                    AND content_hash IS NULL
+                    AND duplicate_of IS NULL
+                ORDER BY id
+                LIMIT :limit
+                """
+            ),
+            {"after_id": after_id, "limit": chunk_size},
+        ).all()
+        if not rows:
+            return canonical_total, linked_total
+        after_id = rows[-1].id
+
+        hashes = {row.id: content_hash(row.text) for row in rows}
+        known = dict(
+            conn.execute(
+                text(
+                    "SELECT content_hash, id FROM reviews WHERE content_hash IN :hashes"
+                ).bindparams(bindparam("hashes", expanding=True)),
+                {"hashes": list(set(hashes.values()))},
+            ).all()
+        )
+        canonical, linked, copies = [], [], Counter()
+        for review_id, digest in hashes.items():
+            if digest in known:
+                linked.append({"id": review_id, "canonical": known[digest]})
+                copies[known[digest]] += 1
+            else:
+                known[digest] = review_id
+                canonical.append({"id": review_id, "hash": digest})
+
+        if canonical:
+            conn.execute(
+                text("UPDATE reviews SET content_hash = :hash WHERE id = :id"),
+                canonical,
+            )
+        if linked:
+            conn.execute(
+                text("UPDATE reviews SET duplicate_of = :canonical WHERE id = :id"),
+                linked,
+            )
+            conn.execute(
+                text(
+                    "UPDATE reviews SET duplicate_count = duplicate_count + :copies "
+                    "WHERE id = :id"
+                ),
+                [{"id": review_id, "copies": n} for review_id, n in copies.items()],
+            )
+        canonical_total += len(canonical)
+        linked_total += len(linked)
+
+
+def _migrate_duplicate_detection(conn: Connection):
+    """Add duplicate tracking columns, backfill hashes and index them."""
+    columns = {column["name"] for column in inspect(conn).get_columns("reviews")}
+    # Таблица, созданная миграцией 1 по текущей модели, уже содержит колонки
+    if "content_hash" not in columns:
+        conn.execute(text("ALTER TABLE reviews ADD COLUMN content_hash VARCHAR(32)"))
+    if "duplicate_of" not in columns:
+        conn.execute(text("ALTER TABLE reviews ADD COLUMN duplicate_of INTEGER"))
+    if "duplicate_count" not in columns:
+        conn.execute(
+            text(
+                "ALTER TABLE reviews "
+                "ADD COLUMN duplicate_count INTEGER NOT NULL DEFAULT 0"
+            )
+        )
+    link_exact_duplicates(conn)
+    for index in Review.__table__.indexes:
+        if index.name == "ux_reviews_content_hash":
+            index.create(conn, checkfirst=True)
+
+
+def _migrate_review_segments(conn: Connection):
+    """Create the catalog of archived review segments."""
+    ReviewSegment.__table__.create(conn, checkfirst=True)
+
+
+# Миграции по порядку; номер версии схемы = число примененных миграций
+MIGRATIONS: list[Callable[[Connection], None]] = [
+    _migrate_typed_reviews,
+    _migrate_sentiment_rollups,
+    _migrate_search_index,
+    _migrate_duplicate_detection,
+    _migrate_review_segments,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def run_migrations(engine: Engine):
+    """
+    Bring the database schema up to date.
+
+    The applied version is tracked in SQLite's ``user_version`` pragma.
+    Databases created before versioning have version 0 and get every
+    migration; new databases are created at the latest version directly.
+    All migrations run in one transaction, so a failed run leaves the
+    database as it was.
+
+    Args:
+        engine: Engine of the database to migrate
+    """
+    if engine.dialect.name != "sqlite":
+        # Миграции поддерживаются только для SQLite; прочие СУБД создаются с нуля
+        Base.metadata.create_all(bind=engine)
+        return
+
+    with engine.connect() as conn:
+        # pysqlite открывает транзакцию только перед DML, а DDL до нее
+        # фиксирует сразу: открываем транзакцию сами, без участия драйвера
+        conn.execution_options(isolation_level="AUTOCOMMIT")
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+        try:
+            _migrate(conn)
+        except BaseException:
+            conn.exec_driver_sql("ROLLBACK")
+            raise
+        conn.exec_driver_sql("COMMIT")
+
+
+def _migrate(conn: Connection):
+    """Apply pending migrations inside the caller's transaction."""
+    version = conn.execute(text("PRAGMA user_version")).scalar()
+    schema = inspect(conn)
+    # reviews_legacy без reviews остается после прерванной миграции 1
+    # старых версий
+    has_reviews = schema.has_table(Review.__tablename__) or schema.has_table(
+        "reviews_legacy"
+    )
+
+    if has_reviews:
+        for migration in MIGRATIONS[version:]:
+            migration(conn)
+
+    Base.metadata.create_all(bind=conn)
+    # Виртуальные таблицы и триггеры не описаны в метаданных
+    create_search_index(conn)
+    conn.execute(text(f"PRAGMA user_version = {SCHEMA_VERSION}"))
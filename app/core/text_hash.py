@@ -0,0 +1,32 @@
+"""Normalized text and content hashes of reviews.
+
+The hash of the normalized text is stored in ``reviews.content_hash``
+under a unique index, so exact copies of a review share it. It is computed
+both when reviews are stored and by the schema migration that backfills
+existing databases, so it lives below the service layer.
+"""
+
+import hashlib
+import re
+
+WORD_RE = re.compile(r"\w+")
+
+
+def normalize_content(text: str) -> str:
+    """
+    Normalize review text for duplicate detection.
+
+    Case, ``ё``/``е``, punctuation and spacing are ignored, so copies that
+    differ only in these are exact duplicates.
+    """
+    return " ".join(WORD_RE.findall(text.lower().replace("ё", "е")))
+
+
+def hash_normalized(normalized: str) -> str:
+    """Hash of already normalized text."""
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def content_hash(text: str) -> str:
+    """Hash of the normalized text, stored in ``reviews.content_hash``."""
+    return hash_normalized(normalize_content(text))
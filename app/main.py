@@ -1,13 +1,27 @@
 """Main FastAPI application."""
 
-from fastapi import FastAPI, Request
+import logging
+
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
+from app.api.middleware import MetricsMiddleware
+from app.api.v1.admin import router as admin_router
 from app.api.v1.reviews import router as reviews_router
 from app.config import settings
-from app.core.database import create_tables
-from app.core.exceptions import ReviewServiceException
+from app.core.database import ReadSessionLocal, SessionLocal, create_tables
+from app.core.exceptions import ReviewServiceException, ServiceOverloadedException
+from app.core.executors import db_executor, inference_executor
+from app.core.metrics import CONTENT_TYPE, metrics
+from app.ml.registry import model_registry
+from app.services.batcher import sentiment_batcher
+from app.services.dedup import review_deduplicator
+from app.services.prediction_cache import prediction_cache
+from app.services.retention import retention_worker
+from app.services.write_behind import review_writer
+
+logger = logging.getLogger(__name__)
 
 # Создаем FastAPI приложение
 app = FastAPI(
@@ -26,8 +40,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Замер времени запросов по маршрутам (внешний слой, чтобы учитывать и CORS)
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware, routes=app.routes)
+
 # Подключаем роутеры
 app.include_router(reviews_router, prefix=settings.api_v1_prefix, tags=["reviews"])
+app.include_router(admin_router, prefix=settings.api_v1_prefix, tags=["admin"])
 
 
 # Глобальные обработчики исключений
@@ -39,6 +58,16 @@ async def review_service_exception_handler(
     return JSONResponse(status_code=400, content={"detail": str(exc)})
 
 
+@app.exception_handler(ServiceOverloadedException)
+async def service_overloaded_exception_handler(
+    request: Request, exc: ServiceOverloadedException
+) -> JSONResponse:
+    """Handle saturated worker pools with a retryable 503."""
+    return JSONResponse(
+        status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"}
+    )
+
+
 @app.exception_handler(ValueError)
 async def value_error_handler(request: Request, exc: ValueError) -> JSONResponse:
     """Handle validation errors."""
@@ -48,12 +77,173 @@ async def value_error_handler(request: Request, exc: ValueError) -> JSONResponse
 # Событие запуска
 @app.on_event("startup")
 async def startup_event():
-    """Initialize database tables on startup."""
+    """Initialize database tables, load the ML model and start background work."""
     create_tables()
+    if settings.use_ml_sentiment:
+        try:
+            model_registry.load()
+        except Exception as e:
+            logger.warning("Failed to load ML model on startup: %s", e)
+    inference_executor.start()
+    db_executor.start()
+    if settings.write_behind_enabled:
+        review_writer.start()
+    # Индекс почти-дубликатов строится в фоне, после восстановления журнала
+    review_deduplicator.start(ReadSessionLocal)
+    if settings.retention_enabled:
+        retention_worker.start(SessionLocal)
+
+
+# Событие остановки
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop worker pools and flush buffered writes, letting in-flight work finish."""
+    inference_executor.shutdown()
+    db_executor.shutdown()
+    review_writer.stop()
+    retention_worker.stop()
 
 
 # Эндпоинт проверки здоровья
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
-    return {"status": "healthy", "service": settings.project_name}
+    return {
+        "status": "healthy",
+        "service": settings.project_name,
+        "model": model_registry.info(),
+        "executors": {
+            "inference": inference_executor.stats(),
+            "db": db_executor.stats(),
+        },
+        "batcher": sentiment_batcher.stats(),
+        "prediction_cache": prediction_cache.stats(),
+        "write_behind": review_writer.stats(),
+        "deduplication": review_deduplicator.stats(),
+        "retention": retention_worker.stats(),
+    }
+
+
+def _component_metrics():
+    """Expose the counters of shared components, read at scrape time."""
+    inference, db = inference_executor.stats(), db_executor.stats()
+    batcher = sentiment_batcher.stats()
+    cache = prediction_cache.stats()
+    writer = review_writer.stats()
+    dedup = review_deduplicator.stats()
+    retention = retention_worker.stats()
+    model = model_registry.info()
+    return [
+        (
+            "reviews_executor_pending",
+            "gauge",
+            "Calls queued or running in a worker pool",
+            [
+                ("", {"pool": "inference"}, inference["pending"]),
+                ("", {"pool": "db"}, db["pending"]),
+            ],
+        ),
+        (
+            "reviews_executor_rejected",
+            "counter",
+            "Calls rejected because a worker pool was saturated",
+            [
+                ("_total", {"pool": "inference"}, inference["rejected"]),
+                ("_total", {"pool": "db"}, db["rejected"]),
+            ],
+        ),
+        (
+            "reviews_batcher_batches",
+            "counter",
+            "Inference batches formed by the micro-batcher",
+            [("_total", {}, batcher["batches"])],
+        ),
+        (
+            "reviews_batcher_items",
+            "counter",
+            "Texts passed through the micro-batcher",
+            [("_total", {}, batcher["items"])],
+        ),
+        (
+            "reviews_batcher_full_batches",
+            "counter",
+            "Micro-batches that reached the maximum size",
+            [("_total", {}, batcher["full_batches"])],
+        ),
+        (
+            "reviews_prediction_cache_lookups",
+            "counter",
+            "Prediction cache lookups by result",
+            [
+                ("_total", {"result": "hit"}, cache["hits"] - cache["shared_hits"]),
+                ("_total", {"result": "shared_hit"}, cache["shared_hits"]),
+                ("_total", {"result": "miss"}, cache["misses"]),
+            ],
+        ),
+        (
+            "reviews_prediction_cache_evictions",
+            "counter",
+            "Prediction cache entries removed before expiry",
+            [("_total", {}, cache["evictions"])],
+        ),
+        (
+            "reviews_prediction_cache_size",
+            "gauge",
+            "Entries in the prediction cache",
+            [("", {}, cache["size"])],
+        ),
+        (
+            "reviews_write_behind_pending",
+            "gauge",
+            "Reviews buffered by the write-behind writer",
+            [("", {}, writer["pending"])],
+        ),
+        (
+            "reviews_write_behind_flushed",
+            "counter",
+            "Reviews flushed to the database by the write-behind writer",
+            [("_total", {}, writer["flushed"])],
+        ),
+        (
+            "reviews_write_behind_failures",
+            "counter",
+            "Failed write-behind flushes",
+            [("_total", {}, writer["failures"])],
+        ),
+        (
+            "reviews_duplicate_index_size",
+            "gauge",
+            "Canonical reviews in the near-duplicate index",
+            [("", {}, dedup["indexed_reviews"])],
+        ),
+        (
+            "reviews_archived",
+            "counter",
+            "Reviews moved from the table to archive segments",
+            [("_total", {}, retention["archived"])],
+        ),
+        (
+            "reviews_archive_failures",
+            "counter",
+            "Failed archival passes",
+            [("_total", {}, retention["failures"])],
+        ),
+        (
+            "reviews_model_loaded",
+            "gauge",
+            "Whether the ML model is loaded, labeled with its version",
+            [("", {"version": model["version"] or ""}, int(model["loaded"]))],
+        ),
+    ]
+
+
+metrics.register_collector(_component_metrics)
+
+
+# Эндпоинт метрик в формате Prometheus
+if settings.metrics_enabled:
+
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics_endpoint() -> Response:
+        """Expose metrics of this process in the Prometheus text format."""
+        return Response(metrics.render(), headers={"Content-Type": CONTENT_TYPE})
@@ -0,0 +1,260 @@
+"""Versioned on-disk store of trained model artifacts."""
+
+import contextlib
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+from collections.abc import Iterator
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from app.ml.engine import TfidfNBEngine
+
+CURRENT_FILE = "CURRENT"
+MANIFEST_FILE = "manifest.json"
+LOCK_FILE = ".lock"
+ARTIFACT_FORMAT = "tfidf-nb-arrays/1"
+
+# Допустимое расхождение вероятностей с исходным sklearn-пайплайном
+PARITY_TOLERANCE = 1e-9
+
+
+def new_version() -> str:
+    """Generate a sortable, unique artifact version."""
+    return f"{time.strftime('%Y%m%d-%H%M%S', time.gmtime())}-{uuid.uuid4().hex[:6]}"
+
+
+def _fsync_dir(path: Path):
+    """Persist directory entries (renames) where the platform allows it."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _sha256(path: Path) -> str:
+    """Compute the SHA-256 checksum of a file."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as data:
+        for block in iter(lambda: data.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _max_abs_diff(
+    pipeline: Any,
+    arrays: dict[str, Any],
+    params: dict[str, Any],
+    texts: list[str],
+) -> float:
+    """Compare pipeline and exported-array probabilities on sample texts."""
+    import numpy as np
+
+    from app.ml.engine import TfidfNBEngine
+
+    expected = pipeline.predict_proba(texts)
+    actual = TfidfNBEngine(arrays, params).predict_proba_many(texts)
+    actual = np.array([[row[label] for label in params["classes"]] for row in actual])
+    return float(np.max(np.abs(expected - actual)))
+
+
+def write_atomic(path: Path, data: bytes):
+    """Write a file so that readers see either the old or the new content."""
+    tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    with open(tmp_path, "wb") as tmp:
+        tmp.write(data)
+        tmp.flush()
+        os.fsync(tmp.fileno())
+    os.replace(tmp_path, path)
+    _fsync_dir(path.parent)
+
+
+class ArtifactStore:
+    """
+    Directory of immutable, versioned model artifacts.
+
+    Each version lives in its own subdirectory: the TF-IDF vocabulary, idf
+    vector and Naive Bayes matrices as raw ``.npy`` arrays, and a manifest
+    with the version, training metrics and a checksum of every array. The
+    arrays are opened with ``mmap_mode``, so all worker processes on a host
+    share the same page-cache pages instead of unpickling private copies.
+
+    A version directory is assembled under a temporary name and renamed into
+    place, and the ``CURRENT`` file naming the serving version is replaced
+    atomically, so a reader never sees a half-written model.
+    """
+
+    def __init__(self, root: str | Path):
+        """
+        Initialize store.
+
+        Args:
+            root: Directory holding the versions
+        """
+        self.root = Path(root)
+
+    def path(self, version: str) -> Path:
+        """Return the directory of a version."""
+        return self.root / version
+
+    def current_version(self) -> str | None:
+        """Return the published version, if any."""
+        try:
+            version = (self.root / CURRENT_FILE).read_text(encoding="utf-8").strip()
+        except OSError:
+            return None
+        return version or None
+
+    def manifest(self, version: str) -> dict[str, Any]:
+        """Read the manifest of a version."""
+        with open(self.path(version) / MANIFEST_FILE, encoding="utf-8") as manifest:
+            return json.load(manifest)
+
+    @contextlib.contextmanager
+    def lock(self) -> Iterator[None]:
+        """Hold an exclusive lock on the store across processes."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        with open(self.root / LOCK_FILE, "w") as lock_file:
+            try:
+                import fcntl
+            except ImportError:
+                # На Windows блокировка недоступна
+                yield
+                return
+
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def write(
+        self,
+        pipeline: Any,
+        metrics: dict[str, Any],
+        sample_texts: list[str] | None = None,
+    ) -> str:
+        """
+        Export a trained pipeline as a new version without publishing it.
+
+        Args:
+            pipeline: Fitted TF-IDF + Naive Bayes sklearn pipeline
+            metrics: Training metrics recorded in the manifest
+            sample_texts: Texts used to check that the exported arrays give
+                the same probabilities as the pipeline
+
+        Returns:
+            New version
+
+        Raises:
+            ValueError: If the exported arrays disagree with the pipeline
+        """
+        import numpy as np
+
+        from app.ml.engine import ARRAY_NAMES, export_pipeline
+
+        arrays, params = export_pipeline(pipeline)
+        parity = None
+        if sample_texts:
+            parity = _max_abs_diff(pipeline, arrays, params, sample_texts)
+            if parity > PARITY_TOLERANCE:
+                raise ValueError(
+                    f"Exported model differs from the pipeline by {parity:.3g}"
+                )
+
+        version = new_version()
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp_dir = self.root / f".tmp-{version}"
+        tmp_dir.mkdir()
+        try:
+            files = {}
+            for name in ARRAY_NAMES:
+                path = tmp_dir / f"{name}.npy"
+                with open(path, "wb") as array_file:
+                    np.save(array_file, np.ascontiguousarray(arrays[name]))
+                    array_file.flush()
+                    os.fsync(array_file.fileno())
+                files[name] = {
+                    "file": path.name,
+                    "dtype": str(arrays[name].dtype),
+                    "shape": list(arrays[name].shape),
+                    "sha256": _sha256(path),
+                }
+
+            manifest = {
+                "format": ARTIFACT_FORMAT,
+                "version": version,
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "metrics": metrics,
+                "parity_max_abs_diff": parity,
+                "params": params,
+                "arrays": files,
+            }
+            write_atomic(
+                tmp_dir / MANIFEST_FILE,
+                json.dumps(manifest, ensure_ascii=False, indent=2).encode("utf-8"),
+            )
+            os.rename(tmp_dir, self.path(version))
+            _fsync_dir(self.root)
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        return version
+
+    def load(
+        self, version: str, mmap: bool = True, verify: bool = True
+    ) -> tuple["TfidfNBEngine", dict[str, Any]]:
+        """
+        Open a stored version.
+
+        Args:
+            version: Version to open
+            mmap: Whether to memory-map the arrays read-only
+            verify: Whether to check the array checksums from the manifest
+
+        Returns:
+            Tuple of (scoring engine, manifest)
+
+        Raises:
+            ValueError: If the artifact format is unknown or a checksum fails
+        """
+        # NumPy нужен только при открытии модели, не при импорте приложения
+        import numpy as np
+
+        from app.ml.engine import TfidfNBEngine
+
+        manifest = self.manifest(version)
+        if manifest.get("format") != ARTIFACT_FORMAT:
+            raise ValueError(
+                f"Unsupported model artifact format in {version}: "
+                f"{manifest.get('format')}"
+            )
+
+        arrays = {}
+        for name, entry in manifest["arrays"].items():
+            path = self.path(version) / entry["file"]
+            if verify and _sha256(path) != entry["sha256"]:
+                raise ValueError(f"Checksum mismatch for {path}")
+            arrays[name] = np.load(path, mmap_mode="r" if mmap else None)
+        return TfidfNBEngine(arrays, manifest["params"]), manifest
+
+    def publish(self, version: str):
+        """
+        Make a stored version the serving one.
+
+        Raises:
+            ValueError: If the version does not exist
+        """
+        if not (self.path(version) / MANIFEST_FILE).exists():
+            raise ValueError(f"Unknown model version: {version}")
+        write_atomic(self.root / CURRENT_FILE, version.encode("utf-8"))
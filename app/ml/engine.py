@@ -0,0 +1,345 @@
+"""TF-IDF + Naive Bayes scoring over plain NumPy arrays."""
+
+import hashlib
+import math
+import operator
+import re
+import time
+from typing import Any
+
+import numpy as np
+
+from app.core.metrics import CLASSIFIER_SCORING_TIME, TFIDF_TRANSFORM_TIME
+
+# Массивы, из которых состоит обученная модель
+ARRAY_NAMES = (
+    "vocab_hash",
+    "vocab_index",
+    "idf",
+    "feature_log_prob",
+    "class_log_prior",
+)
+
+
+def term_hash(term: str) -> int:
+    """
+    Hash a vocabulary term to a stable 64-bit integer.
+
+    Unlike the built-in ``hash``, the value does not depend on the process,
+    so it can be stored in an artifact and looked up by any worker.
+    """
+    return int.from_bytes(
+        hashlib.blake2b(term.encode("utf-8"), digest_size=8).digest(), "little"
+    )
+
+
+def export_pipeline(pipeline: Any) -> tuple[dict[str, np.ndarray], dict[str, Any]]:
+    """
+    Export a fitted TfidfVectorizer + MultinomialNB pipeline into arrays.
+
+    The vocabulary becomes two parallel arrays: sorted term hashes and the
+    feature column of each term, so that it can be memory-mapped instead of
+    living in a per-process dict.
+
+    Args:
+        pipeline: Fitted sklearn pipeline with 'tfidf' and 'classifier' steps
+
+    Returns:
+        Tuple of (arrays by name, vectorizer and classifier parameters)
+
+    Raises:
+        ValueError: If the pipeline uses options the engine does not support
+            or two vocabulary terms share a hash
+    """
+    vectorizer = pipeline.named_steps["tfidf"]
+    classifier = pipeline.named_steps["classifier"]
+
+    if (
+        vectorizer.analyzer != "word"
+        or vectorizer.tokenizer is not None
+        or vectorizer.preprocessor is not None
+        or vectorizer.strip_accents is not None
+        or vectorizer.stop_words is not None
+        or vectorizer.binary
+        or vectorizer.norm not in ("l2", None)
+    ):
+        raise ValueError("Unsupported TfidfVectorizer options for array export")
+
+    terms = list(vectorizer.vocabulary_)
+    hashes = np.array([term_hash(term) for term in terms], dtype=np.uint64)
+    columns = np.array([vectorizer.vocabulary_[term] for term in terms], np.int32)
+    order = np.argsort(hashes)
+    hashes, columns = hashes[order], columns[order]
+    if len(hashes) and np.any(hashes[1:] == hashes[:-1]):
+        raise ValueError("Vocabulary hash collision, cannot export model")
+
+    idf = (
+        np.asarray(vectorizer.idf_, dtype=np.float64)
+        if vectorizer.use_idf
+        else np.ones(len(terms), dtype=np.float64)
+    )
+    arrays = {
+        "vocab_hash": hashes,
+        "vocab_index": columns,
+        "idf": idf,
+        "feature_log_prob": np.ascontiguousarray(
+            classifier.feature_log_prob_, dtype=np.float64
+        ),
+        "class_log_prior": np.asarray(classifier.class_log_prior_, dtype=np.float64),
+    }
+    params = {
+        "lowercase": bool(vectorizer.lowercase),
+        "token_pattern": vectorizer.token_pattern,
+        "ngram_range": list(vectorizer.ngram_range),
+        "norm": vectorizer.norm,
+        "sublinear_tf": bool(vectorizer.sublinear_tf),
+        "classes": [str(label) for label in classifier.classes_],
+    }
+    return arrays, params
+
+
+class TfidfNBEngine:
+    """
+    Scores texts with exported TF-IDF + MultinomialNB arrays.
+
+    Reproduces ``Pipeline.predict_proba`` of the exported pipeline: the same
+    tokenization and n-grams, raw term counts times idf, l2 normalization,
+    and the Naive Bayes joint log-likelihood turned into probabilities. The
+    arrays may be read-only memory maps shared between processes.
+
+    Only the handful of non-zero features of each text is touched: there
+    is no input validation, no sparse matrix and no sklearn import, so one
+    short review is scored in microseconds. Term lookups go through a
+    bounded per-process memo in front of the hashed vocabulary.
+    """
+
+    def __init__(
+        self,
+        arrays: dict[str, np.ndarray],
+        params: dict[str, Any],
+        lookup_cache_size: int = 65536,
+    ):
+        """
+        Initialize engine.
+
+        Args:
+            arrays: Arrays produced by ``export_pipeline``
+            params: Parameters produced by ``export_pipeline``
+            lookup_cache_size: Maximum number of memoized term lookups
+        """
+        # np.asarray снимает обертку memmap без копирования данных
+        self.vocab_hash = np.asarray(arrays["vocab_hash"])
+        self.vocab_index = np.asarray(arrays["vocab_index"])
+        self.idf = np.asarray(arrays["idf"])
+        self.feature_log_prob = np.asarray(arrays["feature_log_prob"])
+        self.class_log_prior = np.asarray(arrays["class_log_prior"])
+
+        self.classes: list[str] = list(params["classes"])
+        self.lowercase: bool = params["lowercase"]
+        self.min_n, self.max_n = params["ngram_range"]
+        self.norm: str | None = params["norm"]
+        self.sublinear_tf: bool = params["sublinear_tf"]
+        self._token_re = re.compile(params["token_pattern"])
+        self._findall = self._token_re.findall
+
+        self.lookup_cache_size = lookup_cache_size
+        self._columns: dict[str, int] = {}
+        self._prior: list[float] = self.class_log_prior.tolist()
+
+    def analyze(self, text: str) -> list[str]:
+        """Split text into the word n-grams the vectorizer counts."""
+        tokens = self._findall(text.lower() if self.lowercase else text)
+        if self.max_n == 1:
+            return tokens
+        if self.min_n == 1 and self.max_n == 2:
+            # Частый случай (униграммы + биграммы) без общего цикла по n
+            return tokens + [
+                f"{first} {second}"
+                for first, second in zip(tokens, tokens[1:], strict=False)
+            ]
+
+        ngrams = list(tokens) if self.min_n == 1 else []
+        for n in range(max(self.min_n, 2), self.max_n + 1):
+            ngrams.extend(
+                " ".join(tokens[i : i + n]) for i in range(len(tokens) - n + 1)
+            )
+        return ngrams
+
+    def _resolve(self, terms: list[str]) -> dict[str, int]:
+        """
+        Map terms to feature columns, searching unmemoized ones at once.
+
+        The mapping belongs to the call: another inference thread may swap
+        the shared memo at any moment, so columns are never read back from it.
+
+        Args:
+            terms: Terms of one or many texts
+
+        Returns:
+            Term -> feature column, -1 for terms outside the vocabulary
+        """
+        memo = self._columns
+        resolved: dict[str, int] = {}
+        missing = []
+        for term in dict.fromkeys(terms):
+            column = memo.get(term)
+            if column is None:
+                missing.append(term)
+            else:
+                resolved[term] = column
+        if not missing:
+            return resolved
+
+        if len(self.vocab_hash):
+            keys = np.fromiter(
+                map(term_hash, missing), dtype=np.uint64, count=len(missing)
+            )
+            positions = np.searchsorted(self.vocab_hash, keys)
+            positions[positions == len(self.vocab_hash)] = 0
+            known = self.vocab_hash[positions] == keys
+            columns = np.where(known, self.vocab_index[positions], -1)
+        else:
+            columns = np.full(len(missing), -1)
+
+        found = dict(zip(missing, columns.tolist(), strict=True))
+        resolved.update(found)
+        if len(memo) + len(found) > self.lookup_cache_size:
+            # Переполненную память заменяем новой, а не очищаем на месте
+            self._columns = found
+        else:
+            memo.update(found)
+        return resolved
+
+    def features(self, text: str) -> tuple[list[int], list[float]]:
+        """
+        Compute the non-zero TF-IDF features of a text.
+
+        Returns:
+            Tuple of (feature columns, normalized weights)
+        """
+        terms = self.analyze(text)
+        return self._weights(terms, self._resolve(terms))
+
+    @staticmethod
+    def _counts(terms: list[str], resolved: dict[str, int]) -> dict[int, int]:
+        """Count terms per feature column, skipping unknown ones."""
+        counts: dict[int, int] = {}
+        for term in terms:
+            column = resolved[term]
+            if column >= 0:
+                counts[column] = counts.get(column, 0) + 1
+        return counts
+
+    def _weights(
+        self, terms: list[str], resolved: dict[str, int]
+    ) -> tuple[list[int], list[float]]:
+        """Turn resolved terms into feature columns and TF-IDF weights."""
+        counts = self._counts(terms, resolved)
+        if not counts:
+            return [], []
+
+        columns = list(counts)
+        tf = (
+            [math.log(count) + 1 for count in counts.values()]
+            if self.sublinear_tf
+            else counts.values()
+        )
+        weights = [
+            count * idf
+            for count, idf in zip(tf, self.idf[columns].tolist(), strict=True)
+        ]
+        if self.norm == "l2":
+            norm = math.sqrt(sum(weight * weight for weight in weights))
+            weights = [weight / norm for weight in weights]
+        return columns, weights
+
+    def predict_proba(self, text: str) -> dict[str, float]:
+        """
+        Get class probabilities for one text.
+
+        Args:
+            text: Text to analyze
+
+        Returns:
+            Dictionary with probabilities for each class
+        """
+        started = time.perf_counter()
+        columns, weights = self.features(text)
+        transformed = time.perf_counter()
+        TFIDF_TRANSFORM_TIME.observe(transformed - started)
+
+        jll = list(self._prior)
+        if columns:
+            for k, log_probs in enumerate(self.feature_log_prob[:, columns].tolist()):
+                jll[k] += sum(map(operator.mul, log_probs, weights))
+
+        # Нормализация через logsumexp, как в MultinomialNB.predict_proba
+        top = max(jll)
+        exps = [math.exp(value - top) for value in jll]
+        total = sum(exps)
+        probabilities = {
+            label: exp / total for label, exp in zip(self.classes, exps, strict=True)
+        }
+        CLASSIFIER_SCORING_TIME.observe(time.perf_counter() - transformed)
+        return probabilities
+
+    def predict_proba_many(self, texts: list[str]) -> list[dict[str, float]]:
+        """
+        Get class probabilities for many texts.
+
+        Term lookups, TF-IDF weighting and normalization of all texts are
+        vectorized, and scoring is one gather over the feature
+        log-probabilities plus one ``bincount`` per class.
+
+        Args:
+            texts: Texts to analyze
+
+        Returns:
+            Dictionary with probabilities for each class, per text
+        """
+        if len(texts) == 1:
+            return [self.predict_proba(texts[0])]
+
+        started = time.perf_counter()
+        analyzed = [self.analyze(text) for text in texts]
+        # Новые термы всего пакета ищем в словаре одним вызовом
+        resolved = self._resolve([term for terms in analyzed for term in terms])
+
+        rows: list[int] = []
+        columns: list[int] = []
+        counts: list[int] = []
+        for row, terms in enumerate(analyzed):
+            text_counts = self._counts(terms, resolved)
+            rows.extend([row] * len(text_counts))
+            columns.extend(text_counts)
+            counts.extend(text_counts.values())
+
+        if columns:
+            # TF-IDF всех текстов сразу: веса и l2-нормы строк одним проходом
+            weights = np.array(counts, dtype=np.float64)
+            if self.sublinear_tf:
+                weights = np.log(weights) + 1
+            weights *= self.idf[columns]
+            if self.norm == "l2":
+                norms = np.sqrt(
+                    np.bincount(rows, weights=weights * weights, minlength=len(texts))
+                )
+                weights /= norms[rows]
+        transformed = time.perf_counter()
+        TFIDF_TRANSFORM_TIME.observe(transformed - started)
+
+        jll = np.tile(self.class_log_prior, (len(texts), 1))
+        if columns:
+            contributions = self.feature_log_prob[:, columns] * weights
+            for k, class_contributions in enumerate(contributions):
+                jll[:, k] += np.bincount(
+                    rows, weights=class_contributions, minlength=len(texts)
+                )
+
+        log_norm = np.logaddexp.reduce(jll, axis=1, keepdims=True)
+        probabilities = [
+            dict(zip(self.classes, row, strict=True))
+            for row in np.exp(jll - log_norm).tolist()
+        ]
+        CLASSIFIER_SCORING_TIME.observe(time.perf_counter() - transformed)
+        return probabilities
@@ -0,0 +1,57 @@
+"""Sentiment prediction result shared by ML and dictionary analyzers."""
+
+from dataclasses import dataclass
+from typing import Any
+
+# Распределение, возвращаемое для пустого текста или при ошибке модели
+DEFAULT_PROBABILITIES: dict[str, float] = {
+    "positive": 0.33,
+    "negative": 0.33,
+    "neutral": 0.34,
+}
+
+
+@dataclass(frozen=True, slots=True)
+class SentimentPrediction:
+    """Result of one sentiment prediction."""
+
+    sentiment: str
+    method: str
+    probabilities: dict[str, float] | None = None
+    confidence: float | None = None
+
+    @classmethod
+    def from_probabilities(
+        cls, probabilities: dict[str, float], method: str = "machine_learning"
+    ) -> "SentimentPrediction":
+        """
+        Build a prediction from per-class probabilities.
+
+        Args:
+            probabilities: Probability for each sentiment class
+            method: Analysis method that produced the probabilities
+
+        Returns:
+            Prediction labelled with the most probable class
+        """
+        sentiment = max(probabilities, key=probabilities.get)
+        return cls(
+            sentiment=sentiment,
+            method=method,
+            probabilities=probabilities,
+            confidence=probabilities[sentiment],
+        )
+
+    @classmethod
+    def empty(cls) -> "SentimentPrediction":
+        """Build the prediction returned for empty text."""
+        return cls.from_probabilities(dict(DEFAULT_PROBABILITIES), method="empty_text")
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert prediction to the detailed analysis response format."""
+        return {
+            "sentiment": self.sentiment,
+            "method": self.method,
+            "probabilities": self.probabilities,
+            "confidence": self.confidence,
+        }
@@ -0,0 +1,249 @@
+"""Process-wide registry for the shared sentiment model."""
+
+import logging
+import os
+import threading
+import time
+from typing import Any
+
+from app.config import settings
+from app.core.metrics import MODEL_LOAD_TIME
+from app.ml.artifacts import ArtifactStore
+from app.ml.sentiment_model import SentimentMLModel
+
+logger = logging.getLogger(__name__)
+
+
+def _current_rss_bytes() -> int | None:
+    """Return resident set size of the current process, if it can be measured."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+
+    try:
+        import resource
+
+        # ru_maxrss в килобайтах на Linux (пиковое значение, но лучше, чем ничего)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    except (ImportError, OSError):
+        return None
+
+
+class ModelRegistry:
+    """
+    Loads the sentiment model once per worker process and shares it.
+
+    All request handlers get the same ``SentimentMLModel`` instance. After
+    loading, the instance is only read from (sklearn ``predict`` and
+    ``predict_proba`` do not mutate the fitted pipeline), so it is safe to use
+    from several threads at once.
+
+    The model comes from the published version of the artifact store; on
+    first start the bundled model file is exported there. A newly
+    published version is loaded in the background and swapped in with a
+    single reference assignment: requests in flight finish on the old
+    model, later ones get the new one, and none of them waits for the load.
+    """
+
+    def __init__(
+        self,
+        store: ArtifactStore,
+        check_interval: float = 5.0,
+        verify_checksums: bool = True,
+    ):
+        """
+        Initialize an empty registry.
+
+        Args:
+            store: Artifact store with published model versions
+            check_interval: Seconds between checks for a newly published
+                version; 0 disables the checks
+            verify_checksums: Whether to check array checksums on load
+        """
+        self.store = store
+        self.check_interval = check_interval
+        self.verify_checksums = verify_checksums
+        self._lock = threading.Lock()
+        self._model: SentimentMLModel | None = None
+        self._load_time_seconds: float | None = None
+        self._memory_bytes: int | None = None
+        self._loaded_at: float | None = None
+        self._next_check = 0.0
+        self._reloading = False
+        self._swaps = 0
+
+    def _load_model(self, version: str | None) -> SentimentMLModel:
+        """Open a published version, publishing the bundled model if needed."""
+        if version is None:
+            version = self._publish_bundled()
+        if version is None:
+            # Каталог версий недоступен для записи: работаем с исходным файлом
+            model = SentimentMLModel()
+            model.load_model()
+            return model
+        return SentimentMLModel.from_artifact(
+            self.store, version, verify=self.verify_checksums
+        )
+
+    def _publish_bundled(self) -> str | None:
+        """
+        Export the bundled model into the store on first start.
+
+        The first worker converts the pickled pipeline into arrays once;
+        every other worker then memory-maps the published version.
+
+        Returns:
+            Published version, or None if the store cannot be written
+        """
+        # Обучающие данные нужны только здесь, для проверки экспорта
+        from app.data.training_data import TRAINING_DATA
+
+        try:
+            with self.store.lock():
+                version = self.store.current_version()
+                if version is None:
+                    bundled = SentimentMLModel()
+                    bundled.load_model()
+                    version = self.store.write(
+                        bundled.model,
+                        {"source": bundled.model_path},
+                        sample_texts=[text for text, _ in TRAINING_DATA],
+                    )
+                    self.store.publish(version)
+                    logger.info("Published bundled model as version %s", version)
+                return version
+        except OSError as e:
+            logger.warning("Cannot publish bundled model to %s: %s", self.store.root, e)
+            return None
+
+    def _swap(self, model: SentimentMLModel, started: float, rss_before: int | None):
+        """Make a loaded model the shared one and record load metrics."""
+        self._load_time_seconds = time.perf_counter() - started
+        MODEL_LOAD_TIME.observe(self._load_time_seconds)
+        rss_after = _current_rss_bytes()
+        if rss_before is not None and rss_after is not None:
+            self._memory_bytes = max(rss_after - rss_before, 0)
+        self._loaded_at = time.time()
+        if self._model is not None:
+            self._swaps += 1
+        self._model = model
+
+    def load(self) -> SentimentMLModel:
+        """
+        Load the model if it is not loaded yet.
+
+        Returns:
+            Shared model instance
+        """
+        with self._lock:
+            if self._model is not None:
+                return self._model
+
+            rss_before = _current_rss_bytes()
+            started = time.perf_counter()
+            model = self._load_model(self.store.current_version())
+            self._swap(model, started, rss_before)
+            self._next_check = time.monotonic() + self.check_interval
+            return model
+
+    def reload(self, version: str | None = None) -> SentimentMLModel:
+        """
+        Load a version and swap it in without blocking readers.
+
+        Args:
+            version: Version to serve; defaults to the published one
+
+        Returns:
+            Shared model instance after the swap
+        """
+        version = version or self.store.current_version()
+        current = self._model
+        if current is not None and version is not None and current.version == version:
+            return current
+
+        rss_before = _current_rss_bytes()
+        started = time.perf_counter()
+        # Загрузка идет без блокировки: запросы продолжают работать на старой модели
+        model = self._load_model(version)
+        with self._lock:
+            self._swap(model, started, rss_before)
+        logger.info("Serving model version %s", model.version)
+        return model
+
+    def get(self) -> SentimentMLModel:
+        """
+        Get the shared model, loading it on first use.
+
+        Returns:
+            Shared model instance
+        """
+        model = self._model
+        if model is None:
+            return self.load()
+
+        if self.check_interval > 0 and time.monotonic() >= self._next_check:
+            self._check_for_update(model)
+        return model
+
+    def _check_for_update(self, model: SentimentMLModel):
+        """Start a background reload if another version has been published."""
+        with self._lock:
+            if self._reloading or time.monotonic() < self._next_check:
+                return
+            self._next_check = time.monotonic() + self.check_interval
+            version = self.store.current_version()
+            if version is None or version == model.version:
+                return
+            self._reloading = True
+
+        def reload_in_background():
+            try:
+                self.reload(version)
+            except Exception:
+                logger.exception("Failed to load model version %s", version)
+            finally:
+                self._reloading = False
+
+        threading.Thread(
+            target=reload_in_background, name="model-reload", daemon=True
+        ).start()
+
+    def is_loaded(self) -> bool:
+        """Check whether the model has been loaded in this process."""
+        return self._model is not None
+
+    def info(self) -> dict[str, Any]:
+        """
+        Describe the loaded model for health checks.
+
+        Returns:
+            Dictionary with load state, version, load time and memory usage
+        """
+        model = self._model
+        return {
+            "loaded": model is not None,
+            "model_path": model.model_path if model else None,
+            "version": model.version if model else None,
+            "memory_mapped": bool(model and model.engine is not None),
+            "published_version": self.store.current_version(),
+            "load_time_ms": (
+                round(self._load_time_seconds * 1000, 3)
+                if self._load_time_seconds is not None
+                else None
+            ),
+            "memory_bytes": self._memory_bytes,
+            "process_rss_bytes": _current_rss_bytes(),
+            "loaded_at": self._loaded_at,
+            "swaps": self._swaps,
+            "pid": os.getpid(),
+        }
+
+
+# Глобальный реестр моделей (один на процесс воркера)
+model_registry = ModelRegistry(
+    ArtifactStore(settings.sentiment_model_dir),
+    check_interval=settings.sentiment_model_reload_interval,
+    verify_checksums=settings.sentiment_model_verify_checksums,
+)
@@ -1,72 +1,88 @@
-"""Simple ML model for sentiment analysis."""
+"""
+Simple ML model for sentiment analysis.
 
+This module is on the serving path and must stay cheap to import: training
+code (sklearn, the training data) lives in ``app.ml.training`` and is only
+imported when a model is actually trained.
+"""
+
+import logging
 import os
+import time
+from typing import TYPE_CHECKING, Any
+
+from app.core.metrics import CLASSIFIER_SCORING_TIME, TFIDF_TRANSFORM_TIME
+from app.ml.prediction import DEFAULT_PROBABILITIES
+
+if TYPE_CHECKING:
+    from app.ml.artifacts import ArtifactStore
+    from app.ml.engine import TfidfNBEngine
 
-import joblib
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics import accuracy_score
-from sklearn.model_selection import train_test_split
-from sklearn.naive_bayes import MultinomialNB
-from sklearn.pipeline import Pipeline
+logger = logging.getLogger(__name__)
 
-from app.data.training_data import TRAINING_DATA
+# Модель, поставляемая с приложением; используется, пока нет обученных версий
+DEFAULT_MODEL_PATH = "app/ml/sentiment_model.joblib"
 
 
 class SentimentMLModel:
     """Simple ML model for sentiment analysis using Naive Bayes."""
 
-    def __init__(self):
-        """Initialize the ML model."""
+    def __init__(
+        self, model_path: str = DEFAULT_MODEL_PATH, version: str | None = None
+    ):
+        """
+        Initialize the ML model.
+
+        Args:
+            model_path: File the model is loaded from and saved to
+            version: Artifact version of the model file, if it has one
+        """
         self.model = None
-        self.model_path = "app/ml/sentiment_model.joblib"
-        self._create_pipeline()
-
-    def _create_pipeline(self):
-        """Create ML pipeline with TF-IDF and Naive Bayes."""
-        self.model = Pipeline(
-            [
-                (
-                    "tfidf",
-                    TfidfVectorizer(
-                        lowercase=True,
-                        max_features=1000,
-                        ngram_range=(1, 2),  # Учитываем биграммы
-                        stop_words=None,  # Для русского языка оставляем все слова
-                    ),
-                ),
-                ("classifier", MultinomialNB(alpha=1.0)),
-            ]
-        )
-
-    def train(self, training_data: list[tuple[str, str]] = None):
+        self.model_path = model_path
+        # Версия сохраненной модели; меняется при каждом переобучении
+        self.version: str | None = version
+        # Движок над массивами артефакта; если задан, используется вместо пайплайна
+        self.engine: TfidfNBEngine | None = None
+        self.manifest: dict[str, Any] | None = None
+
+    @classmethod
+    def from_artifact(
+        cls, store: "ArtifactStore", version: str, verify: bool = True
+    ) -> "SentimentMLModel":
         """
-        Train the model on provided data.
+        Open a stored artifact version with memory-mapped arrays.
 
         Args:
-            training_data: List of (text, label) tuples
+            store: Artifact store
+            version: Version to open
+            verify: Whether to check array checksums
+
+        Returns:
+            Model ready for prediction
         """
-        if training_data is None:
-            training_data = TRAINING_DATA
+        model = cls(str(store.path(version)), version)
+        model.engine, model.manifest = store.load(version, mmap=True, verify=verify)
+        return model
 
-        # Разделяем тексты и метки
-        texts = [item[0] for item in training_data]
-        labels = [item[1] for item in training_data]
+    def train(self, training_data: list[tuple[str, str]] = None) -> dict[str, Any]:
+        """
+        Train the model on provided data.
 
-        # Разделяем на train/test для оценки качества
-        X_train, X_test, y_train, y_test = train_test_split(
-            texts, labels, test_size=0.2, random_state=42, stratify=labels
-        )
+        The fitted pipeline is kept in memory only; persist it with
+        ``save_model`` or publish it to an artifact store.
 
-        # Обучаем модель
-        self.model.fit(X_train, y_train)
+        Args:
+            training_data: List of (text, label) tuples; defaults to the
+                built-in training data
 
-        # Оцениваем качество
-        y_pred = self.model.predict(X_test)
-        accuracy = accuracy_score(y_test, y_pred)
-        print(f"Model accuracy: {accuracy:.3f}")
+        Returns:
+            Training metrics: held-out accuracy and sample counts
+        """
+        from app.ml.training import train_pipeline
 
-        # Сохраняем модель
-        self.save_model()
+        self.model, metrics = train_pipeline(training_data)
+        self.engine = None
+        return metrics
 
     def predict(self, text: str) -> str:
         """
@@ -78,18 +94,7 @@ class SentimentMLModel:
         Returns:
             Predicted sentiment: 'positive', 'negative', or 'neutral'
         """
-        if not self.model:
-            self.load_model()
-
-        if not text or not text.strip():
-            return "neutral"
-
-        try:
-            prediction = self.model.predict([text.strip()])[0]
-            return prediction
-        except Exception:
-            # Возврат "neutral" при ошибке предсказания
-            return "neutral"
+        return self.predict_many([text])[0]
 
     def predict_proba(self, text: str) -> dict:
         """
@@ -101,33 +106,111 @@ class SentimentMLModel:
         Returns:
             Dictionary with probabilities for each sentiment
         """
-        if not self.model:
+        return self.predict_proba_many([text])[0]
+
+    def predict_many(self, texts: list[str]) -> list[str]:
+        """
+        Predict sentiment for many texts in one vectorized call.
+
+        Args:
+            texts: Texts to analyze
+
+        Returns:
+            Predicted sentiment for each text, in input order
+        """
+        probabilities = self.predict_proba_many(texts)
+        return [
+            max(proba, key=proba.get) if text and text.strip() else "neutral"
+            for text, proba in zip(texts, probabilities, strict=True)
+        ]
+
+    def predict_proba_many(self, texts: list[str]) -> list[dict]:
+        """
+        Get class probabilities for many texts in one vectorized call.
+
+        All non-empty texts go through a single TF-IDF ``transform`` and a
+        single classifier ``predict_proba`` call, or through the array
+        engine when the model was opened from an artifact.
+
+        Args:
+            texts: Texts to analyze
+
+        Returns:
+            Dictionary with probabilities for each sentiment, per text
+        """
+        if not self.model and self.engine is None:
             self.load_model()
 
-        if not text or not text.strip():
-            return {"positive": 0.33, "negative": 0.33, "neutral": 0.34}
+        results = [dict(DEFAULT_PROBABILITIES) for _ in texts]
+
+        # Пустые тексты в модель не передаем
+        indices = [i for i, text in enumerate(texts) if text and text.strip()]
+        if not indices:
+            return results
+
+        if self.engine is not None:
+            try:
+                probabilities = self.engine.predict_proba_many(
+                    [texts[i].strip() for i in indices]
+                )
+            except Exception:
+                return results
+            for i, proba in zip(indices, probabilities, strict=True):
+                results[i] = proba
+            return results
 
         try:
-            probabilities = self.model.predict_proba([text.strip()])[0]
-            classes = self.model.classes_
-            return dict(zip(classes, probabilities, strict=False))
+            # Шаги конвейера вызываются по отдельности, чтобы замерить каждый
+            started = time.perf_counter()
+            features = self.model.named_steps["tfidf"].transform(
+                [texts[i].strip() for i in indices]
+            )
+            transformed = time.perf_counter()
+            TFIDF_TRANSFORM_TIME.observe(transformed - started)
+            probabilities = self.model.named_steps["classifier"].predict_proba(features)
+            CLASSIFIER_SCORING_TIME.observe(time.perf_counter() - transformed)
         except Exception:
-            return {"positive": 0.33, "negative": 0.33, "neutral": 0.34}
+            # Возврат равномерного распределения при ошибке предсказания
+            return results
+
+        classes = list(self.model.classes_)
+        for i, row in zip(indices, probabilities, strict=True):
+            results[i] = {
+                label: float(p) for label, p in zip(classes, row, strict=True)
+            }
+        return results
 
     def save_model(self):
-        """Save trained model to disk."""
-        os.makedirs(os.path.dirname(self.model_path), exist_ok=True)
-        joblib.dump(self.model, self.model_path)
-        print(f"Model saved to {self.model_path}")
+        """Save trained model to disk, replacing the file atomically."""
+        from app.ml.training import save_pipeline
+
+        save_pipeline(self.model, self.model_path)
+        self.version = self._file_version()
+        logger.info("Model saved to %s", self.model_path)
 
     def load_model(self):
-        """Load trained model from disk."""
+        """Load trained model from disk, training and saving one if missing."""
         if os.path.exists(self.model_path):
+            import joblib
+
             self.model = joblib.load(self.model_path)
-            print(f"Model loaded from {self.model_path}")
+            if self.version is None:
+                self.version = self._file_version()
+            logger.info("Model loaded from %s", self.model_path)
         else:
-            print("No saved model found, training new model...")
+            logger.warning("No saved model found, training new model...")
             self.train()
+            self.save_model()
+
+    def _file_version(self) -> str:
+        """
+        Derive the model version from the saved file.
+
+        Every process that loads the same file gets the same version, so
+        predictions can be shared between workers.
+        """
+        stat = os.stat(self.model_path)
+        return f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
 
     def is_model_trained(self) -> bool:
         """Check if model is trained and ready."""
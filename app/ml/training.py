@@ -0,0 +1,204 @@
+"""
+Model training: fitting the sklearn pipeline and publishing new versions.
+
+sklearn and the built-in training data are imported inside the functions
+that fit a model, so the serving process can reference the retraining job
+without paying for those imports.
+"""
+
+import logging
+import os
+from typing import TYPE_CHECKING, Any
+
+from sqlalchemy import create_engine, select
+
+from app.ml.artifacts import ArtifactStore
+
+if TYPE_CHECKING:
+    from sklearn.pipeline import Pipeline
+
+logger = logging.getLogger(__name__)
+
+
+def create_pipeline() -> "Pipeline":
+    """Create ML pipeline with TF-IDF and Naive Bayes."""
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.naive_bayes import MultinomialNB
+    from sklearn.pipeline import Pipeline
+
+    return Pipeline(
+        [
+            (
+                "tfidf",
+                TfidfVectorizer(
+                    lowercase=True,
+                    max_features=1000,
+                    ngram_range=(1, 2),  # Учитываем биграммы
+                    stop_words=None,  # Для русского языка оставляем все слова
+                ),
+            ),
+            ("classifier", MultinomialNB(alpha=1.0)),
+        ]
+    )
+
+
+def train_pipeline(
+    training_data: list[tuple[str, str]] | None = None,
+) -> tuple["Pipeline", dict[str, Any]]:
+    """
+    Fit a new pipeline and evaluate it on a held-out split.
+
+    Args:
+        training_data: List of (text, label) tuples; defaults to the
+            built-in training data
+
+    Returns:
+        Tuple of (fitted pipeline, metrics: accuracy and sample counts)
+    """
+    from sklearn.metrics import accuracy_score
+    from sklearn.model_selection import train_test_split
+
+    from app.data.training_data import TRAINING_DATA
+
+    if training_data is None:
+        training_data = TRAINING_DATA
+
+    # Разделяем тексты и метки
+    texts = [item[0] for item in training_data]
+    labels = [item[1] for item in training_data]
+
+    # Разделяем на train/test для оценки качества
+    X_train, X_test, y_train, y_test = train_test_split(
+        texts, labels, test_size=0.2, random_state=42, stratify=labels
+    )
+
+    # Обучаем модель
+    pipeline = create_pipeline()
+    pipeline.fit(X_train, y_train)
+
+    # Оцениваем качество
+    accuracy = accuracy_score(y_test, pipeline.predict(X_test))
+    logger.info("Model accuracy: %.3f", accuracy)
+
+    return pipeline, {
+        "accuracy": float(accuracy),
+        "train_samples": len(X_train),
+        "test_samples": len(X_test),
+    }
+
+
+def save_pipeline(pipeline: "Pipeline", path: str):
+    """
+    Pickle a pipeline, replacing the file atomically.
+
+    Args:
+        pipeline: Fitted pipeline
+        path: Destination file
+    """
+    import joblib
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Пишем во временный файл: параллельный load_model не увидит половину
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as model_file:
+        joblib.dump(pipeline, model_file)
+        model_file.flush()
+        os.fsync(model_file.fileno())
+    os.replace(tmp_path, path)
+
+
+def load_review_samples(database_url: str, limit: int) -> list[tuple[str, str]]:
+    """
+    Read the newest stored reviews as (text, label) training samples.
+
+    Args:
+        database_url: Database to read from
+        limit: Maximum number of reviews
+
+    Returns:
+        List of (text, label) tuples
+    """
+    from app.models.database import Review
+
+    if limit <= 0:
+        return []
+
+    engine = create_engine(database_url)
+    try:
+        with engine.connect() as conn:
+            rows = conn.execute(
+                select(Review.text, Review.sentiment)
+                .order_by(Review.id.desc())
+                .limit(limit)
+            ).all()
+    finally:
+        engine.dispose()
+    return [(text, sentiment) for text, sentiment in rows if text and text.strip()]
+
+
+def train_and_store(
+    model_dir: str,
+    additional_data: list[tuple[str, str]] | None = None,
+    database_url: str | None = None,
+    max_reviews: int = 0,
+    publish: bool = True,
+) -> dict[str, Any]:
+    """
+    Train a model on the built-in data plus extra samples and store it.
+
+    Args:
+        model_dir: Artifact store directory
+        additional_data: Extra (text, label) samples
+        database_url: Database whose stored reviews are added to the data
+        max_reviews: Maximum number of stored reviews to use
+        publish: Whether to make the new version the serving one
+
+    Returns:
+        Dictionary with the new version, its metrics and the sample count
+    """
+    from app.data.training_data import TRAINING_DATA
+
+    training_data = list(TRAINING_DATA)
+    if additional_data:
+        training_data.extend(additional_data)
+    if database_url:
+        training_data.extend(load_review_samples(database_url, max_reviews))
+
+    pipeline, metrics = train_pipeline(training_data)
+    metrics["samples"] = len(training_data)
+
+    store = ArtifactStore(model_dir)
+    version = store.write(
+        pipeline, metrics, sample_texts=[text for text, _ in training_data]
+    )
+    if publish:
+        store.publish(version)
+    logger.info("Stored model version %s: %s", version, metrics)
+    return {"version": version, "metrics": metrics}
+
+
+def run_retraining_job(
+    model_dir: str, database_url: str, max_reviews: int
+) -> dict[str, Any]:
+    """
+    Entry point of the background retraining process.
+
+    Runs at a lower CPU priority so that serving processes on the same host
+    keep their latency while the model is being fitted.
+
+    Args:
+        model_dir: Artifact store directory
+        database_url: Database with stored reviews
+        max_reviews: Maximum number of stored reviews to train on
+
+    Returns:
+        Dictionary with the new version, its metrics and the sample count
+    """
+    try:
+        os.nice(10)
+    except (AttributeError, OSError):
+        # На Windows os.nice недоступен
+        pass
+    return train_and_store(
+        model_dir, database_url=database_url, max_reviews=max_reviews
+    )
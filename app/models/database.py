@@ -1,20 +1,118 @@
 """SQLAlchemy database models."""
 
-from sqlalchemy import Column, Integer, String, Text
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Float,
+    Index,
+    Integer,
+    SmallInteger,
+    String,
+    Text,
+    column,
+    table,
+)
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.types import TypeDecorator
 
 Base = declarative_base()
 
+# Коды сентимента в хранилище
+SENTIMENT_CODES: dict[str, int] = {"negative": -1, "neutral": 0, "positive": 1}
+SENTIMENT_LABELS: dict[int, str] = {
+    code: label for label, code in SENTIMENT_CODES.items()
+}
+
+
+class SentimentCode(TypeDecorator):
+    """Stores sentiment labels as small integer codes."""
+
+    impl = SmallInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        """Convert a sentiment label to its storage code."""
+        if value is None:
+            return None
+        try:
+            return SENTIMENT_CODES[value]
+        except KeyError:
+            raise ValueError(f"Invalid sentiment value: {value}")
+
+    def process_result_value(self, value, dialect):
+        """Convert a storage code back to its sentiment label."""
+        if value is None:
+            return None
+        return SENTIMENT_LABELS[value]
+
 
 class Review(Base):
     """Review model for storing user reviews with sentiment analysis."""
 
     __tablename__ = "reviews"
+    __table_args__ = (
+        Index("ix_reviews_sentiment_created_at", "sentiment", "created_at"),
+        Index("ix_reviews_created_at", "created_at"),
+        Index("ux_reviews_content_hash", "content_hash", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     text = Column(Text, nullable=False)
-    sentiment = Column(String(20), nullable=False)
-    created_at = Column(String(50), nullable=False)
+    sentiment = Column(SentimentCode, nullable=False)
+    confidence = Column(Float, nullable=True)
+    created_at = Column(DateTime, nullable=False)
+    # Хэш нормализованного текста; только у канонических отзывов, у копий NULL
+    content_hash = Column(String(32), nullable=True)
+    # Канонический отзыв, копией которого является этот
+    duplicate_of = Column(Integer, nullable=True)
+    # Сколько копий канонического отзыва было получено
+    duplicate_count = Column(Integer, nullable=False, default=0, server_default="0")
 
     def __repr__(self):
         return f"<Review(id={self.id}, sentiment='{self.sentiment}')>"
+
+
+# Полнотекстовый индекс FTS5 по текстам отзывов (внешнее содержимое — таблица
+# reviews). Виртуальная таблица и триггеры создаются миграциями, поэтому здесь
+# только легковесное описание для запросов: rowid = reviews.id, rank = bm25
+reviews_fts = table("reviews_fts", column("rowid"), column("rank"))
+
+
+class SentimentRollup(Base):
+    """Hourly review counts per sentiment, maintained on every insert."""
+
+    __tablename__ = "sentiment_rollups"
+
+    bucket_start = Column(DateTime, primary_key=True)
+    sentiment = Column(SentimentCode, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return (
+            f"<SentimentRollup(bucket_start={self.bucket_start}, "
+            f"sentiment='{self.sentiment}', count={self.count})>"
+        )
+
+
+class ReviewSegment(Base):
+    """Catalog entry of a cold-tier segment file holding archived reviews."""
+
+    __tablename__ = "review_segments"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    # Имя файла сегмента в каталоге архива
+    path = Column(String(255), nullable=False, unique=True)
+    # Сутки (по времени создания отзывов), к которым относится сегмент
+    period_start = Column(DateTime, nullable=False)
+    min_id = Column(Integer, nullable=False)
+    max_id = Column(Integer, nullable=False)
+    min_created_at = Column(DateTime, nullable=False)
+    max_created_at = Column(DateTime, nullable=False)
+    row_count = Column(Integer, nullable=False)
+    archived_at = Column(DateTime, nullable=False)
+
+    def __repr__(self):
+        return (
+            f"<ReviewSegment(path='{self.path}', ids={self.min_id}..{self.max_id}, "
+            f"rows={self.row_count})>"
+        )
@@ -1,6 +1,23 @@
 """Pydantic schemas for request/response validation."""
 
-from pydantic import BaseModel, validator
+from datetime import UTC, datetime
+from typing import Annotated, Any
+
+from pydantic import AfterValidator, BaseModel, Field, validator
+
+from app.config import settings
+
+
+def to_storage_time(value: datetime) -> datetime:
+    """Convert a timestamp to naive UTC, the form creation times are stored in."""
+    if value.tzinfo is not None:
+        return value.astimezone(UTC).replace(tzinfo=None)
+    return value
+
+
+# Граница периода в параметрах запроса: время с часовым поясом приводится к UTC,
+# иначе SQLite отбросил бы смещение и сдвинул фильтр
+StorageTime = Annotated[datetime, AfterValidator(to_storage_time)]
 
 
 class ReviewCreate(BaseModel):
@@ -16,13 +33,71 @@ class ReviewCreate(BaseModel):
         return v.strip()
 
 
+class ReviewBatchCreate(BaseModel):
+    """Schema for creating or analyzing many reviews in one request."""
+
+    reviews: list[ReviewCreate] = Field(
+        ..., min_length=1, max_length=settings.batch_max_size
+    )
+
+
 class ReviewResponse(BaseModel):
     """Schema for review response."""
 
     id: int
     text: str
     sentiment: str
-    created_at: str
+    confidence: float | None = None
+    created_at: datetime
+    # Канонический отзыв, копией которого является этот (None у оригиналов)
+    duplicate_of: int | None = None
 
     class Config:
         from_attributes = True
+
+
+class ReviewSearchResult(ReviewResponse):
+    """Schema for a review found by full-text search."""
+
+    # bm25 из FTS5: чем меньше, тем релевантнее
+    score: float
+
+
+class SentimentCounts(BaseModel):
+    """Review counts and ratios per sentiment."""
+
+    total: int
+    counts: dict[str, int]
+    ratios: dict[str, float]
+
+
+class SentimentStatsBucket(SentimentCounts):
+    """Sentiment counts for one time bucket."""
+
+    bucket_start: datetime
+
+
+class SentimentStatsResponse(SentimentCounts):
+    """Schema for aggregate sentiment statistics."""
+
+    bucket: str | None = None
+    buckets: list[SentimentStatsBucket] = []
+
+
+class RetrainJobResponse(BaseModel):
+    """Schema for a background model retraining job."""
+
+    id: str
+    status: str
+    started_at: float
+    finished_at: float | None = None
+    version: str | None = None
+    metrics: dict[str, Any] | None = None
+    error: str | None = None
+
+
+class ModelStatusResponse(BaseModel):
+    """Schema for the serving model and the latest retraining job."""
+
+    model: dict[str, Any]
+    job: RetrainJobResponse | None = None
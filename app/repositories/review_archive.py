@@ -0,0 +1,419 @@
+"""Cold tier of reviews: immutable compressed segment files.
+
+Old reviews are moved out of the ``reviews`` table into segment files, one
+per day of creation time and archival pass. A segment is JSON Lines split
+into blocks of ``BLOCK_SIZE`` reviews, each compressed on its own (zstd if
+the ``zstandard`` package is installed, otherwise gzip), so that a reader
+decompresses only the blocks that can hold matching reviews. Next to every
+segment a small JSON index lists its blocks with their byte ranges and the
+ranges of ids and creation times they cover.
+
+The ``review_segments`` table is the catalog. A segment becomes visible to
+readers only when its catalog row is committed, in the same transaction
+that deletes its reviews from the hot table; files without a catalog row
+are leftovers of an interrupted pass and are removed by the next one.
+"""
+
+import gzip
+import heapq
+import itertools
+import os
+import threading
+from collections import OrderedDict, namedtuple
+from collections.abc import Iterator, Sequence
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import Row, func, select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core.serialization import dumps, loads
+from app.models.database import ReviewSegment
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Отзывов в одном независимо сжатом блоке сегмента
+BLOCK_SIZE = 1000
+# Колонки отзыва, сохраняемые в архиве
+ARCHIVED_FIELDS = (
+    "id",
+    "text",
+    "sentiment",
+    "confidence",
+    "created_at",
+    "content_hash",
+    "duplicate_of",
+    "duplicate_count",
+)
+SEGMENT_PREFIX = "reviews-"
+INDEX_SUFFIX = ".idx.json"
+
+# Классы строк архива по набору колонок
+_ROW_TYPES: dict[tuple[str, ...], type] = {}
+
+
+def _row_type(fields: tuple[str, ...]) -> type:
+    """Named tuple class for archived rows with the given columns."""
+    row_type = _ROW_TYPES.get(fields)
+    if row_type is None:
+        row_type = _ROW_TYPES.setdefault(fields, namedtuple("ArchivedRow", fields))
+    return row_type
+
+
+class ReviewArchive:
+    """Writes and reads segment files of archived reviews."""
+
+    def __init__(self, directory: str, index_cache_size: int = 4096):
+        """
+        Initialize archive.
+
+        Args:
+            directory: Directory holding the segment files
+            index_cache_size: Number of segment indexes kept in memory
+        """
+        self.directory = Path(directory)
+        self.compression = "zstd" if zstandard is not None else "gzip"
+        self._index_cache_size = index_cache_size
+        # Индексы сегментов неизменяемы, поэтому кэшируются без проверок
+        self._indexes: OrderedDict[str, dict] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _compress(self, data: bytes) -> bytes:
+        """Compress one block."""
+        if self.compression == "zstd":
+            return zstandard.ZstdCompressor(level=9).compress(data)
+        return gzip.compress(data, compresslevel=6, mtime=0)
+
+    @staticmethod
+    def _decompress(data: bytes, compression: str) -> bytes:
+        """Decompress one block written with the given compression."""
+        if compression == "zstd":
+            if zstandard is None:
+                raise RuntimeError(
+                    "Segment is compressed with zstd; install the zstandard package"
+                )
+            return zstandard.ZstdDecompressor().decompress(data)
+        return gzip.decompress(data)
+
+    def segment_name(self, period_start: datetime, min_id: int, max_id: int) -> str:
+        """File name of a segment; ids of archived reviews never repeat."""
+        extension = "zst" if self.compression == "zstd" else "gz"
+        return (
+            f"{SEGMENT_PREFIX}{period_start:%Y-%m-%d}-{min_id}-{max_id}"
+            f".jsonl.{extension}"
+        )
+
+    @staticmethod
+    def _index_path(path: Path) -> Path:
+        """Path of the index file next to a segment."""
+        return path.with_name(path.name.split(".", 1)[0] + INDEX_SUFFIX)
+
+    @staticmethod
+    def _write_file(path: Path, data: bytes):
+        """Write a file atomically and durably: temporary file, fsync, rename."""
+        temporary = path.with_name(path.name + ".tmp")
+        with open(temporary, "wb") as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, path)
+
+    def write_segment(
+        self, period_start: datetime, rows: Sequence[Any]
+    ) -> ReviewSegment:
+        """
+        Write reviews of one day into a new segment file and its index.
+
+        Args:
+            period_start: Start of the day the reviews were created on
+            rows: Rows with the columns of ``ARCHIVED_FIELDS``, ordered by id
+
+        Returns:
+            Catalog entry of the segment, not yet added to a session
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        name = self.segment_name(period_start, rows[0].id, rows[-1].id)
+        path = self.directory / name
+
+        blocks = []
+        chunks = []
+        offset = 0
+        for start in range(0, len(rows), BLOCK_SIZE):
+            block = rows[start : start + BLOCK_SIZE]
+            payload = self._compress(
+                b"".join(
+                    dumps(dict(zip(ARCHIVED_FIELDS, row, strict=True))) + b"\n"
+                    for row in block
+                )
+            )
+            created = [row.created_at for row in block]
+            blocks.append(
+                {
+                    "offset": offset,
+                    "length": len(payload),
+                    "rows": len(block),
+                    "min_id": block[0].id,
+                    "max_id": block[-1].id,
+                    "min_created_at": min(created).isoformat(),
+                    "max_created_at": max(created).isoformat(),
+                    "sentiments": sorted({row.sentiment for row in block}),
+                }
+            )
+            chunks.append(payload)
+            offset += len(payload)
+
+        self._write_file(path, b"".join(chunks))
+        self._write_file(
+            self._index_path(path),
+            dumps({"compression": self.compression, "blocks": blocks}),
+        )
+        created = [row.created_at for row in rows]
+        return ReviewSegment(
+            path=name,
+            period_start=period_start,
+            min_id=rows[0].id,
+            max_id=rows[-1].id,
+            min_created_at=min(created),
+            max_created_at=max(created),
+            row_count=len(rows),
+            archived_at=datetime.utcnow(),
+        )
+
+    def remove_files(self, names: list[str]):
+        """Delete segment files and their indexes, ignoring missing ones."""
+        for name in names:
+            path = self.directory / name
+            for file in (path, self._index_path(path)):
+                file.unlink(missing_ok=True)
+            with self._lock:
+                self._indexes.pop(name, None)
+
+    def remove_stray_files(self, catalogued: set[str]) -> int:
+        """
+        Delete files left by interrupted archival passes.
+
+        Call only while holding the archival lock, so that no pass is
+        writing segments at the same time.
+
+        Args:
+            catalogued: Names of the segments listed in the catalog
+
+        Returns:
+            Number of deleted files
+        """
+        if not self.directory.is_dir():
+            return 0
+        keep = set(catalogued)
+        keep.update(self._index_path(Path(name)).name for name in catalogued)
+        removed = 0
+        for path in self.directory.iterdir():
+            if path.name.startswith(SEGMENT_PREFIX) and path.name not in keep:
+                path.unlink(missing_ok=True)
+                removed += 1
+        return removed
+
+    def find_segments(
+        self,
+        db: Session,
+        after_id: int | None = None,
+        created_after: datetime | None = None,
+        created_before: datetime | None = None,
+    ) -> list[Row]:
+        """
+        Find catalogued segments that can hold reviews matching the filters.
+
+        Args:
+            db: Database session
+            after_id: Only reviews with id greater than this are wanted
+            created_after: Only reviews created at or after this time are wanted
+            created_before: Only reviews created before this time are wanted
+
+        Returns:
+            Rows (path, min_id) ordered by the smallest review id
+        """
+        query = select(ReviewSegment.path, ReviewSegment.min_id)
+        if after_id is not None:
+            query = query.where(ReviewSegment.max_id > after_id)
+        if created_after is not None:
+            query = query.where(ReviewSegment.max_created_at >= created_after)
+        if created_before is not None:
+            query = query.where(ReviewSegment.min_created_at < created_before)
+        return db.execute(query.order_by(ReviewSegment.min_id)).all()
+
+    def _index(self, name: str) -> dict:
+        """Load the index of a segment, caching it."""
+        with self._lock:
+            index = self._indexes.get(name)
+            if index is not None:
+                self._indexes.move_to_end(name)
+                return index
+        index = loads(self._index_path(self.directory / name).read_bytes())
+        with self._lock:
+            self._indexes[name] = index
+            if len(self._indexes) > self._index_cache_size:
+                self._indexes.popitem(last=False)
+        return index
+
+    def _matching_blocks(
+        self,
+        name: str,
+        sentiment_filter: str | None,
+        after_id: int | None,
+        created_after: datetime | None,
+        created_before: datetime | None,
+    ) -> list[dict]:
+        """Blocks of a segment that can hold matching reviews, by its index."""
+        after = created_after.isoformat()[:19] if created_after is not None else None
+        before = created_before.isoformat()[:19] if created_before is not None else None
+        # Сравнение строк ISO 8601 с точностью до секунды только отсекает блоки
+        # целиком; точная проверка выполняется по каждой записи при чтении
+        return [
+            block
+            for block in self._index(name)["blocks"]
+            if (after_id is None or block["max_id"] > after_id)
+            and (after is None or block["max_created_at"][:19] >= after)
+            and (before is None or block["min_created_at"][:19] <= before)
+            and (sentiment_filter is None or sentiment_filter in block["sentiments"])
+        ]
+
+    def _iter_segment(
+        self,
+        name: str,
+        blocks: list[dict],
+        row_type: type,
+        sentiment_filter: str | None,
+        after_id: int | None,
+        created_after: datetime | None,
+        created_before: datetime | None,
+    ) -> Iterator[tuple]:
+        """Read the matching reviews of the given blocks of one segment."""
+        compression = self._index(name)["compression"]
+        fields = row_type._fields
+        with open(self.directory / name, "rb") as file:
+            for block in blocks:
+                file.seek(block["offset"])
+                data = self._decompress(file.read(block["length"]), compression)
+                for line in data.splitlines():
+                    record = loads(line)
+                    if after_id is not None and record["id"] <= after_id:
+                        continue
+                    if (
+                        sentiment_filter is not None
+                        and record["sentiment"] != sentiment_filter
+                    ):
+                        continue
+                    created_at = datetime.fromisoformat(record["created_at"])
+                    if created_after is not None and created_at < created_after:
+                        continue
+                    if created_before is not None and created_at >= created_before:
+                        continue
+                    record["created_at"] = created_at
+                    yield row_type(*[record[field] for field in fields])
+
+    def iter_rows(
+        self,
+        segments: list[Row],
+        fields: tuple[str, ...],
+        sentiment_filter: str | None = None,
+        after_id: int | None = None,
+        created_after: datetime | None = None,
+        created_before: datetime | None = None,
+    ) -> Iterator[tuple]:
+        """
+        Stream archived reviews of the given segments in id order.
+
+        Segments of different days can interleave by id, so they are merged
+        lazily: a segment is opened only when the merge reaches the first id
+        of its first block that can match, and segments whose blocks cannot
+        match are not opened at all.
+
+        Args:
+            segments: Segments found by ``find_segments``
+            fields: Columns to return, a subset of ``ARCHIVED_FIELDS``
+            sentiment_filter: Optional sentiment to filter by
+            after_id: Return only reviews with id greater than this
+            created_after: Return only reviews created at or after this time
+                (naive UTC, like stored times)
+            created_before: Return only reviews created before this time
+                (naive UTC)
+
+        Yields:
+            Named tuples with the requested columns, ordered by id
+        """
+        row_type = _row_type(tuple(fields))
+        pending = []
+        for segment in segments:
+            blocks = self._matching_blocks(
+                segment.path, sentiment_filter, after_id, created_after, created_before
+            )
+            if blocks:
+                pending.append((blocks[0]["min_id"], segment.path, blocks))
+        pending.sort(reverse=True)
+        heap: list[tuple[int, int, tuple, Iterator[tuple]]] = []
+        order = itertools.count()
+        readers = []
+        try:
+            while heap or pending:
+                # Открываем сегменты, которые могут содержать следующий по id отзыв
+                while pending and (not heap or pending[-1][0] <= heap[0][0]):
+                    _, name, blocks = pending.pop()
+                    reader = self._iter_segment(
+                        name,
+                        blocks,
+                        row_type,
+                        sentiment_filter,
+                        after_id,
+                        created_after,
+                        created_before,
+                    )
+                    readers.append(reader)
+                    row = next(reader, None)
+                    if row is not None:
+                        heapq.heappush(heap, (row.id, next(order), row, reader))
+                if not heap:
+                    continue
+
+                _, position, row, reader = heapq.heappop(heap)
+                yield row
+                row = next(reader, None)
+                if row is not None:
+                    heapq.heappush(heap, (row.id, position, row, reader))
+        finally:
+            for reader in readers:
+                reader.close()
+
+    def stats(self, db: Session) -> dict:
+        """
+        Summarize the catalog.
+
+        Args:
+            db: Database session
+
+        Returns:
+            Dictionary with segment and review counts and the archived time range
+        """
+        segments, reviews, oldest, newest = db.execute(
+            select(
+                func.count(ReviewSegment.id),
+                func.coalesce(func.sum(ReviewSegment.row_count), 0),
+                func.min(ReviewSegment.min_created_at),
+                func.max(ReviewSegment.max_created_at),
+            )
+        ).one()
+        return {
+            "directory": str(self.directory),
+            "compression": self.compression,
+            "segments": segments,
+            "archived_reviews": reviews,
+            "oldest": oldest.isoformat() if oldest else None,
+            "newest": newest.isoformat() if newest else None,
+        }
+
+
+# Глобальный экземпляр архива
+review_archive = ReviewArchive(settings.retention_archive_dir)
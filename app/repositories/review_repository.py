@@ -1,8 +1,49 @@
 """Repository for review data access operations."""
 
+import heapq
+from collections import Counter
+from collections.abc import Iterator
+from datetime import datetime
+from itertools import islice
+from operator import attrgetter
+
+from sqlalchemy import (
+    Row,
+    Select,
+    bindparam,
+    delete,
+    func,
+    insert,
+    select,
+    text,
+    update,
+)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
-from app.models.database import Review
+from app.models.database import Review, ReviewSegment, SentimentRollup, reviews_fts
+from app.repositories.review_archive import review_archive
+
+# Колонки отзыва в ответах API, в порядке полей ReviewResponse
+RESPONSE_COLUMNS = (
+    Review.id,
+    Review.text,
+    Review.sentiment,
+    Review.confidence,
+    Review.created_at,
+    Review.duplicate_of,
+)
+RESPONSE_FIELDS = tuple(column.key for column in RESPONSE_COLUMNS)
+EXPORT_COLUMNS = RESPONSE_COLUMNS[:5]
+EXPORT_FIELDS = RESPONSE_FIELDS[:5]
+
+_by_id = attrgetter("id")
+
+
+def hour_bucket(moment: datetime) -> datetime:
+    """Truncate a timestamp to the start of its hour."""
+    return moment.replace(minute=0, second=0, microsecond=0)
 
 
 class ReviewRepository:
@@ -28,6 +69,7 @@ class ReviewRepository:
         try:
             db_review = Review(**review_data)
             self.db.add(db_review)
+            self._increment_rollups([review_data])
             self.db.commit()
             self.db.refresh(db_review)
             return db_review
@@ -35,6 +77,350 @@ class ReviewRepository:
             self.db.rollback()
             raise Exception(f"Failed to create review: {str(e)}")
 
+    def create_many(
+        self,
+        reviews_data: list[dict],
+        batch_links: dict[int, int] | None = None,
+        duplicate_counts: dict[int, int] | None = None,
+    ) -> list[Review]:
+        """
+        Create many reviews with a single bulk insert and one commit.
+
+        Args:
+            reviews_data: List of dictionaries containing review data
+            batch_links: Position of a review -> position of the review in
+                the same batch that it duplicates
+            duplicate_counts: Stored review id -> number of new copies of it
+
+        Returns:
+            Created Review objects, in input order
+
+        Raises:
+            IntegrityError: If a content hash is already stored
+            Exception: If database operation fails
+        """
+        if not reviews_data:
+            return []
+
+        try:
+            ids = self.db.scalars(
+                insert(Review).returning(Review.id, sort_by_parameter_order=True),
+                reviews_data,
+            ).all()
+            self._increment_rollups(reviews_data)
+            reviews = [
+                Review(**{**review_data, "id": review_id})
+                for review_id, review_data in zip(ids, reviews_data, strict=True)
+            ]
+            if batch_links:
+                # Id канонического отзыва из того же пакета известен только сейчас
+                links = [
+                    {"id": ids[position], "duplicate_of": ids[canonical]}
+                    for position, canonical in batch_links.items()
+                ]
+                self.db.execute(update(Review), links)
+                for position, canonical in batch_links.items():
+                    reviews[position].duplicate_of = ids[canonical]
+            if duplicate_counts:
+                self._increment_duplicate_counts(duplicate_counts)
+            self.db.commit()
+            return reviews
+        except IntegrityError:
+            self.db.rollback()
+            raise
+        except Exception as e:
+            self.db.rollback()
+            raise Exception(f"Failed to create reviews: {str(e)}")
+
+    def increment_duplicate_counts(self, duplicate_counts: dict[int, int]):
+        """
+        Add new copies to the duplicate counters of stored reviews.
+
+        Args:
+            duplicate_counts: Review id -> number of new copies
+
+        Raises:
+            Exception: If database operation fails
+        """
+        if not duplicate_counts:
+            return
+
+        try:
+            self._increment_duplicate_counts(duplicate_counts)
+            self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            raise Exception(f"Failed to count duplicate reviews: {str(e)}")
+
+    def _increment_duplicate_counts(self, duplicate_counts: dict[int, int]):
+        """Add to duplicate counters inside the caller's transaction."""
+        reviews = Review.__table__
+        self.db.execute(
+            update(reviews)
+            .where(reviews.c.id == bindparam("review_id"))
+            .values(duplicate_count=reviews.c.duplicate_count + bindparam("copies")),
+            [
+                {"review_id": review_id, "copies": copies}
+                for review_id, copies in duplicate_counts.items()
+            ],
+        )
+
+    def find_by_content_hashes(self, hashes: list[str]) -> dict[str, int]:
+        """
+        Find canonical reviews by content hash through the unique index.
+
+        Args:
+            hashes: Content hashes to look up
+
+        Returns:
+            Content hash -> review id, for the hashes that are stored
+
+        Raises:
+            Exception: If database operation fails
+        """
+        try:
+            return dict(
+                self.db.execute(
+                    select(Review.content_hash, Review.id).where(
+                        Review.content_hash.in_(hashes)
+                    )
+                ).all()
+            )
+        except Exception as e:
+            raise Exception(f"Failed to look up duplicate reviews: {str(e)}")
+
+    def get_canonical_texts(self, ids: list[int]) -> dict[int, str]:
+        """
+        Get the texts of canonical (not duplicate) reviews by id.
+
+        Args:
+            ids: Review ids
+
+        Returns:
+            Review id -> text, for the ids that exist and are canonical
+
+        Raises:
+            Exception: If database operation fails
+        """
+        try:
+            return dict(
+                self.db.execute(
+                    select(Review.id, Review.text).where(
+                        Review.id.in_(ids), Review.duplicate_of.is_(None)
+                    )
+                ).all()
+            )
+        except Exception as e:
+            raise Exception(f"Failed to get reviews: {str(e)}")
+
+    def get_by_ids(self, ids: list[int]) -> dict[int, Review]:
+        """
+        Get reviews by id.
+
+        Args:
+            ids: Review ids
+
+        Returns:
+            Review id -> Review object, for the ids that exist
+
+        Raises:
+            Exception: If database operation fails
+        """
+        try:
+            return {
+                review.id: review
+                for review in self.db.scalars(select(Review).where(Review.id.in_(ids)))
+            }
+        except Exception as e:
+            raise Exception(f"Failed to get reviews: {str(e)}")
+
+    def get_expired_rows(self, cutoff: datetime, limit: int) -> list[Row]:
+        """
+        Get the oldest reviews created before a cutoff, with all columns.
+
+        The review with the largest id is never returned: SQLite hands out
+        ``max(id) + 1`` to new rows, so keeping it prevents ids of archived
+        reviews from being reused.
+
+        Args:
+            cutoff: Return only reviews created before this time
+            limit: Maximum number of reviews to return
+
+        Returns:
+            Rows (id, text, sentiment, confidence, created_at, content_hash,
+            duplicate_of, duplicate_count) ordered by id
+
+        Raises:
+            Exception: If database operation fails
+        """
+        newest = select(func.max(Review.id)).scalar_subquery()
+        query = (
+            select(
+                *EXPORT_COLUMNS,
+                Review.content_hash,
+                Review.duplicate_of,
+                Review.duplicate_count,
+            )
+            .where(Review.created_at < cutoff, Review.id < newest)
+            .order_by(Review.id)
+            .limit(limit)
+        )
+
+        try:
+            return self.db.execute(query).all()
+        except Exception as e:
+            raise Exception(f"Failed to get expired reviews: {str(e)}")
+
+    def replace_with_segments(
+        self,
+        segments: list[ReviewSegment],
+        cutoff: datetime,
+        last_id: int,
+        expected: int,
+    ):
+        """
+        Catalog archived segments and delete their reviews in one transaction.
+
+        Args:
+            segments: Catalog entries of the written segments
+            cutoff: Cutoff the reviews were selected with
+            last_id: Largest archived review id
+            expected: Number of archived reviews
+
+        Raises:
+            Exception: If the deleted reviews differ from the archived ones
+                or the database operation fails
+        """
+        try:
+            self.db.add_all(segments)
+            # Отзывы, созданные до cutoff, с id не больше last_id — ровно
+            # выбранные get_expired_rows (id только растут)
+            deleted = self.db.execute(
+                delete(Review).where(Review.id <= last_id, Review.created_at < cutoff)
+            ).rowcount
+            if deleted != expected:
+                raise ValueError(
+                    f"expected to delete {expected} reviews, matched {deleted}"
+                )
+            self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            raise Exception(f"Failed to archive reviews: {str(e)}")
+
+    def get_archived_max_id(self) -> int:
+        """
+        Get the highest id of an archived review.
+
+        Returns:
+            Highest archived id, or 0 if nothing is archived
+
+        Raises:
+            Exception: If database operation fails
+        """
+        try:
+            return self.db.scalar(select(func.max(ReviewSegment.max_id))) or 0
+        except Exception as e:
+            raise Exception(f"Failed to get archive segments: {str(e)}")
+
+    def get_segment_paths(self) -> set[str]:
+        """
+        Get file names of all catalogued archive segments.
+
+        Raises:
+            Exception: If database operation fails
+        """
+        try:
+            return set(self.db.scalars(select(ReviewSegment.path)))
+        except Exception as e:
+            raise Exception(f"Failed to get archive segments: {str(e)}")
+
+    def insert_many(self, reviews_data: list[dict]):
+        """
+        Bulk insert reviews without committing or returning ids.
+
+        Used by bulk imports that group many chunks into one transaction;
+        the caller commits or rolls back.
+
+        Args:
+            reviews_data: List of dictionaries containing review data
+
+        Raises:
+            Exception: If database operation fails
+        """
+        if not reviews_data:
+            return
+
+        try:
+            # Вставка через таблицу (Core) без ORM-обработки каждой строки
+            self.db.execute(insert(Review.__table__), reviews_data)
+            self._increment_rollups(reviews_data)
+        except Exception as e:
+            raise Exception(f"Failed to insert reviews: {str(e)}")
+
+    def _increment_rollups(self, reviews_data: list[dict]):
+        """
+        Add new reviews to the hourly sentiment counters.
+
+        Runs inside the caller's transaction, so counters are committed
+        together with the reviews they count.
+
+        Args:
+            reviews_data: Data of the reviews being inserted
+        """
+        counts = Counter(
+            (hour_bucket(review["created_at"]), review["sentiment"])
+            for review in reviews_data
+        )
+        stmt = sqlite_insert(SentimentRollup).values(
+            [
+                {"bucket_start": bucket, "sentiment": sentiment, "count": count}
+                for (bucket, sentiment), count in counts.items()
+            ]
+        )
+        self.db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[
+                    SentimentRollup.bucket_start,
+                    SentimentRollup.sentiment,
+                ],
+                set_={"count": SentimentRollup.count + stmt.excluded.count},
+            )
+        )
+
+    def get_rollups(
+        self,
+        created_after: datetime | None = None,
+        created_before: datetime | None = None,
+    ) -> list[SentimentRollup]:
+        """
+        Get hourly sentiment counters for a time range.
+
+        Bounds are aligned to hour buckets: a bucket is included when its
+        start lies in [hour of created_after, created_before).
+
+        Args:
+            created_after: Optional lower bound on creation time
+            created_before: Optional upper bound on creation time
+
+        Returns:
+            List of SentimentRollup objects ordered by bucket
+
+        Raises:
+            Exception: If database operation fails
+        """
+        query = select(SentimentRollup)
+        if created_after is not None:
+            query = query.where(
+                SentimentRollup.bucket_start >= hour_bucket(created_after)
+            )
+        if created_before is not None:
+            query = query.where(SentimentRollup.bucket_start < created_before)
+
+        try:
+            return list(self.db.scalars(query.order_by(SentimentRollup.bucket_start)))
+        except Exception as e:
+            raise Exception(f"Failed to get sentiment statistics: {str(e)}")
+
     def get_all(self, sentiment_filter: str | None = None) -> list[Review]:
         """
         Get all reviews with optional sentiment filtering.
@@ -57,3 +443,279 @@ class ReviewRepository:
             return query.all()
         except Exception as e:
             raise Exception(f"Failed to get reviews: {str(e)}")
+
+    def get_page(
+        self,
+        sentiment_filter: str | None = None,
+        after_id: int | None = None,
+        limit: int = 100,
+        created_after: datetime | None = None,
+        created_before: datetime | None = None,
+    ) -> list[Review]:
+        """
+        Get one page of reviews using keyset pagination on id.
+
+        Args:
+            sentiment_filter: Optional sentiment to filter by
+            after_id: Return only reviews with id greater than this
+            limit: Maximum number of reviews to return
+            created_after: Return only reviews created at or after this time
+            created_before: Return only reviews created before this time
+
+        Returns:
+            List of Review objects ordered by id; archived reviews are
+            detached objects built from the cold tier
+
+        Raises:
+            Exception: If database operation fails
+        """
+        query = self._filtered(
+            select(Review), sentiment_filter, after_id, created_after, created_before
+        )
+
+        try:
+            reviews = list(self.db.scalars(query.order_by(Review.id).limit(limit)))
+            archived = self._archived(
+                RESPONSE_FIELDS,
+                sentiment_filter,
+                after_id,
+                created_after,
+                created_before,
+            )
+            if archived is None:
+                return reviews
+            archived = (Review(**row._asdict()) for row in islice(archived, limit))
+            return list(islice(heapq.merge(reviews, archived, key=_by_id), limit))
+        except Exception as e:
+            raise Exception(f"Failed to get reviews: {str(e)}")
+
+    def get_page_rows(
+        self,
+        sentiment_filter: str | None = None,
+        after_id: int | None = None,
+        limit: int = 100,
+        created_after: datetime | None = None,
+        created_before: datetime | None = None,
+    ) -> list[Row]:
+        """
+        Get one page of reviews as plain column tuples.
+
+        Same page as ``get_page``, but fetched with SQLAlchemy Core: no ORM
+        objects are built and nothing enters the identity map. Archived
+        reviews come as named tuples with the same fields.
+
+        Args:
+            sentiment_filter: Optional sentiment to filter by
+            after_id: Return only reviews with id greater than this
+            limit: Maximum number of reviews to return
+            created_after: Return only reviews created at or after this time
+            created_before: Return only reviews created before this time
+
+        Returns:
+            Rows (id, text, sentiment, confidence, created_at, duplicate_of)
+            ordered by id
+
+        Raises:
+            Exception: If database operation fails
+        """
+        query = self._filtered(
+            select(*RESPONSE_COLUMNS),
+            sentiment_filter,
+            after_id,
+            created_after,
+            created_before,
+        )
+
+        try:
+            rows = self.db.execute(query.order_by(Review.id).limit(limit)).all()
+            archived = self._archived(
+                RESPONSE_FIELDS,
+                sentiment_filter,
+                after_id,
+                created_after,
+                created_before,
+            )
+            if archived is None:
+                return rows
+            return list(islice(heapq.merge(rows, archived, key=_by_id), limit))
+        except Exception as e:
+            raise Exception(f"Failed to get reviews: {str(e)}")
+
+    def iter_rows(
+        self,
+        sentiment_filter: str | None = None,
+        after_id: int | None = None,
+        chunk_size: int = 1000,
+        created_after: datetime | None = None,
+        created_before: datetime | None = None,
+        full: bool = False,
+    ) -> Iterator[Row]:
+        """
+        Stream review rows from a server-side cursor.
+
+        Rows are plain column tuples (id, text, sentiment, confidence,
+        created_at) fetched ``chunk_size`` at a time, so memory does not grow
+        with table size. Archived reviews are merged in from the cold tier.
+
+        Args:
+            sentiment_filter: Optional sentiment to filter by
+            after_id: Return only reviews with id greater than this
+            chunk_size: Number of rows fetched from the cursor at once
+            created_after: Return only reviews created at or after this time
+            created_before: Return only reviews created before this time
+            full: Whether to add ``duplicate_of``, giving the columns of
+                list pages instead of the export columns
+
+        Yields:
+            Review rows ordered by id
+
+        Raises:
+            Exception: If database operation fails
+        """
+        columns, fields = (
+            (RESPONSE_COLUMNS, RESPONSE_FIELDS)
+            if full
+            else (EXPORT_COLUMNS, EXPORT_FIELDS)
+        )
+        query = self._filtered(
+            select(*columns),
+            sentiment_filter,
+            after_id,
+            created_after,
+            created_before,
+        )
+
+        try:
+            # Каталог архива читается до открытия курсора по таблице
+            archived = self._archived(
+                fields,
+                sentiment_filter,
+                after_id,
+                created_after,
+                created_before,
+            )
+            result = self.db.execute(
+                query.order_by(Review.id).execution_options(
+                    stream_results=True, yield_per=chunk_size
+                )
+            )
+            if archived is None:
+                yield from result
+            else:
+                yield from heapq.merge(result, archived, key=_by_id)
+        except Exception as e:
+            raise Exception(f"Failed to stream reviews: {str(e)}")
+
+    def search(
+        self,
+        match_query: str,
+        sentiment_filter: str | None = None,
+        created_after: datetime | None = None,
+        created_before: datetime | None = None,
+        limit: int = 100,
+        offset: int = 0,
+    ) -> list[Row]:
+        """
+        Search reviews through the full-text index, best matches first.
+
+        Without filters the top results are taken from the index alone,
+        which FTS5 answers without ranking every match in SQL; with filters
+        the matches are joined to ``reviews`` and filtered before ranking.
+
+        Args:
+            match_query: FTS5 match expression
+            sentiment_filter: Optional sentiment to filter by
+            created_after: Return only reviews created at or after this time
+            created_before: Return only reviews created before this time
+            limit: Maximum number of reviews to return
+            offset: Number of best matches to skip
+
+        Returns:
+            Rows (id, text, sentiment, confidence, created_at, duplicate_of,
+            score), where a lower score means a better match (bm25)
+
+        Raises:
+            Exception: If database operation fails
+        """
+        match = text("reviews_fts MATCH :match_query").bindparams(
+            match_query=match_query
+        )
+        columns = RESPONSE_COLUMNS
+
+        if sentiment_filter or created_after or created_before:
+            query = self._filtered(
+                select(*columns, reviews_fts.c.rank.label("score"))
+                .join(reviews_fts, reviews_fts.c.rowid == Review.id)
+                .where(match),
+                sentiment_filter,
+                None,
+                created_after,
+                created_before,
+            )
+            query = query.order_by(reviews_fts.c.rank, Review.id)
+        else:
+            top = (
+                select(reviews_fts.c.rowid, reviews_fts.c.rank)
+                .where(match)
+                .order_by(reviews_fts.c.rank)
+                .limit(limit)
+                .offset(offset)
+                .subquery()
+            )
+            query = (
+                select(*columns, top.c.rank.label("score"))
+                .join(top, top.c.rowid == Review.id)
+                .order_by(top.c.rank, Review.id)
+            )
+            offset = 0
+
+        try:
+            return self.db.execute(query.limit(limit).offset(offset)).all()
+        except Exception as e:
+            raise Exception(f"Failed to search reviews: {str(e)}")
+
+    def _archived(
+        self,
+        fields: tuple[str, ...],
+        sentiment_filter: str | None,
+        after_id: int | None,
+        created_after: datetime | None,
+        created_before: datetime | None,
+    ) -> Iterator[tuple] | None:
+        """
+        Open archived reviews matching the filters, if any segment can hold them.
+
+        Recent reads cost one lookup in the small segment catalog: segments
+        entirely before ``after_id`` or ``created_after`` are never opened.
+
+        Returns:
+            Iterator of archived rows ordered by id, or None when no segment
+            matches
+        """
+        segments = review_archive.find_segments(
+            self.db, after_id, created_after, created_before
+        )
+        if not segments:
+            return None
+        return review_archive.iter_rows(
+            segments, fields, sentiment_filter, after_id, created_after, created_before
+        )
+
+    @staticmethod
+    def _filtered(
+        query: Select,
+        sentiment_filter: str | None,
+        after_id: int | None,
+        created_after: datetime | None,
+        created_before: datetime | None,
+    ) -> Select:
+        """Apply the common review filters to a select statement."""
+        if sentiment_filter:
+            query = query.where(Review.sentiment == sentiment_filter)
+        if after_id is not None:
+            query = query.where(Review.id > after_id)
+        if created_after is not None:
+            query = query.where(Review.created_at >= created_after)
+        if created_before is not None:
+            query = query.where(Review.created_at < created_before)
+        return query
@@ -0,0 +1,161 @@
+"""Micro-batching scheduler for concurrent single-text predictions."""
+
+import asyncio
+from collections.abc import Callable
+from typing import Any
+
+from app.config import settings
+from app.core.executors import BoundedExecutor, inference_executor
+from app.ml.prediction import SentimentPrediction
+from app.services.sentiment_service import predict_texts
+
+
+class MicroBatcher:
+    """
+    Collects concurrent predictions into one vectorized model call.
+
+    Texts submitted while a batch is open are queued until either
+    ``max_batch_size`` texts are waiting or ``max_wait_ms`` has passed since
+    the first one arrived. The whole batch then goes through a single
+    ``predict_texts`` call on the inference executor and every caller gets
+    its own result.
+    """
+
+    def __init__(
+        self,
+        predict_fn: Callable[[list[str]], list[SentimentPrediction]],
+        executor: BoundedExecutor,
+        max_batch_size: int,
+        max_wait_ms: float,
+        enabled: bool = True,
+    ):
+        """
+        Initialize batcher.
+
+        Args:
+            predict_fn: Vectorized prediction function
+            executor: Executor the prediction function runs on
+            max_batch_size: Flush when this many texts are waiting
+            max_wait_ms: Flush when the oldest text has waited this long
+            enabled: Whether to batch at all; if False each call runs alone
+        """
+        self.predict_fn = predict_fn
+        self.executor = executor
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000
+        self.enabled = enabled and self.max_batch_size > 1
+
+        self._pending: list[tuple[str, asyncio.Future]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+        # Метрики
+        self._batches = 0
+        self._items = 0
+        self._full_batches = 0
+        self._max_observed = 0
+
+    async def predict(self, text: str) -> SentimentPrediction:
+        """
+        Predict sentiment of one text as part of a shared batch.
+
+        Args:
+            text: Text to analyze
+
+        Returns:
+            Prediction for the text
+
+        Raises:
+            ServiceOverloadedException: If the inference executor is saturated
+        """
+        if not self.enabled:
+            predictions = await self.executor.run(self.predict_fn, [text])
+            self._record(1)
+            return predictions[0]
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def _flush(self):
+        """Send all waiting texts to the model as one batch."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        task = asyncio.get_running_loop().create_task(self._run_batch(batch))
+        # Держим ссылку, чтобы задачу не собрал сборщик мусора
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, batch: list[tuple[str, asyncio.Future]]):
+        """Run one batch and resolve the futures of its callers."""
+        self._record(len(batch))
+        try:
+            predictions = await self.executor.run(
+                self.predict_fn, [text for text, _ in batch]
+            )
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), prediction in zip(batch, predictions, strict=True):
+            if not future.done():
+                future.set_result(prediction)
+
+    def _record(self, size: int):
+        """Update batch metrics."""
+        self._batches += 1
+        self._items += size
+        self._max_observed = max(self._max_observed, size)
+        if size >= self.max_batch_size:
+            self._full_batches += 1
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Describe batching efficiency.
+
+        Returns:
+            Dictionary with batch counts, average size and fill rate
+        """
+        return {
+            "enabled": self.enabled,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "batches": self._batches,
+            "items": self._items,
+            "waiting": len(self._pending),
+            "full_batches": self._full_batches,
+            "max_observed_batch_size": self._max_observed,
+            "avg_batch_size": (
+                round(self._items / self._batches, 3) if self._batches else None
+            ),
+            "fill_rate": (
+                round(self._items / (self._batches * self.max_batch_size), 4)
+                if self._batches
+                else None
+            ),
+        }
+
+
+# Общий планировщик пакетов для одиночных запросов
+sentiment_batcher = MicroBatcher(
+    predict_fn=predict_texts,
+    executor=inference_executor,
+    max_batch_size=settings.inference_batch_max_size,
+    max_wait_ms=settings.inference_batch_max_wait_ms,
+    enabled=settings.inference_batching,
+)
@@ -0,0 +1,513 @@
+"""Exact and near-duplicate detection of incoming reviews.
+
+Exact duplicates share the hash of their normalized text, which is stored
+in ``reviews.content_hash`` under a unique index. Near duplicates are found
+with MinHash signatures over character shingles, split into LSH bands: the
+band keys of canonical reviews live in a compact in-memory index (sorted
+NumPy arrays), and candidates sharing a band are verified by the exact
+Jaccard similarity of their shingles. Neither tier scans the table.
+"""
+
+import logging
+import threading
+import time
+from collections import Counter, OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass, replace
+from typing import Any
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core.metrics import EXACT_DUPLICATES, NEAR_DUPLICATES
+from app.core.text_hash import hash_normalized, normalize_content
+from app.models.database import Review
+from app.repositories.review_repository import ReviewRepository
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_POLICIES = ("reject", "link", "count")
+
+SHINGLE_SIZE = 5
+# 10 полос по 5 значений: вероятность стать кандидатом ~0.98 при сходстве 0.8
+# и ~0.03 при сходстве 0.3
+BANDS = 10
+ROWS_PER_BAND = 5
+NUM_PERMUTATIONS = BANDS * ROWS_PER_BAND
+# Сколько кандидатов на текст проверяем по содержимому (самые частые по полосам)
+MAX_CANDIDATES = 16
+# Ключи, недавно записанные этим процессом (в том числе еще не сброшенные
+# отложенной записью)
+RECENT_HASHES_SIZE = 65536
+# Тексты последних канонических отзывов для проверки кандидатов без запроса
+# к базе (и до сброса отложенной записи)
+RECENT_TEXTS_SIZE = 4096
+# Сколько новых ключей копится в словаре до слияния с отсортированными массивами
+MERGE_THRESHOLD = 4096
+
+_rng = np.random.default_rng(20240501)
+# Параметры хэш-функций (a * x + b) mod 2^64; a нечетные
+_PERMUTATION_A = _rng.integers(0, 2**64, NUM_PERMUTATIONS, np.uint64) | np.uint64(1)
+_PERMUTATION_B = _rng.integers(0, 2**64, NUM_PERMUTATIONS, np.uint64)
+_BAND_MULTIPLIERS = _rng.integers(0, 2**64, ROWS_PER_BAND, np.uint64) | np.uint64(1)
+_BAND_OFFSETS = _rng.integers(0, 2**64, BANDS, np.uint64)
+_SHIFT = np.uint64(32)
+
+
+def shingles(normalized: str) -> frozenset[str]:
+    """Character shingles of normalized text."""
+    if len(normalized) <= SHINGLE_SIZE:
+        return frozenset([normalized]) if normalized else frozenset()
+    return frozenset(
+        normalized[i : i + SHINGLE_SIZE]
+        for i in range(len(normalized) - SHINGLE_SIZE + 1)
+    )
+
+
+def band_keys(shingle_set: frozenset[str]) -> np.ndarray:
+    """
+    Compute the LSH band keys of a shingle set.
+
+    Shingles are hashed with the process hash (the index lives in one
+    process), the MinHash signature takes the minimum of every permutation,
+    and each band of the signature is folded into one 64-bit key.
+
+    Args:
+        shingle_set: Non-empty set of shingles
+
+    Returns:
+        Array of ``BANDS`` keys
+    """
+    values = np.fromiter(
+        map(hash, shingle_set), dtype=np.int64, count=len(shingle_set)
+    ).view(np.uint64)
+    # Переполнение uint64 — это и есть взятие по модулю 2^64
+    hashed = _PERMUTATION_A[:, None] * values + _PERMUTATION_B[:, None]
+    signature = (hashed >> _SHIFT).min(axis=1)
+    return (signature.reshape(BANDS, ROWS_PER_BAND) * _BAND_MULTIPLIERS).sum(
+        axis=1
+    ) + _BAND_OFFSETS
+
+
+def jaccard(first: frozenset[str], second: frozenset[str]) -> float:
+    """Jaccard similarity of two shingle sets."""
+    if not first or not second:
+        return 0.0
+    return len(first & second) / len(first | second)
+
+
+@dataclass(frozen=True, slots=True)
+class Fingerprint:
+    """Duplicate-detection features of one review text."""
+
+    content_hash: str
+    normalized: str
+    # Признаки почти-дубликатов; None, пока не вычислены
+    shingles: frozenset[str] | None = None
+    band_keys: np.ndarray | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class DuplicateMatch:
+    """Canonical review that a text duplicates."""
+
+    kind: str
+    similarity: float
+    # Сохраненный канонический отзыв либо более ранний текст того же пакета
+    review_id: int | None = None
+    position: int | None = None
+
+
+def _with_near_features(fingerprint: Fingerprint) -> Fingerprint:
+    """Add shingles and band keys to a fingerprint."""
+    shingle_set = shingles(fingerprint.normalized)
+    return replace(
+        fingerprint,
+        shingles=shingle_set,
+        band_keys=band_keys(shingle_set) if shingle_set else None,
+    )
+
+
+class NearDuplicateIndex:
+    """
+    In-memory LSH index mapping band keys to canonical review ids.
+
+    Keys and ids are kept in two parallel NumPy arrays sorted by key
+    (16 bytes per band), with recent additions in a small dictionary that
+    is merged into the arrays in batches. When the index holds more than
+    ``max_reviews`` reviews, the oldest (lowest ids) are dropped.
+    """
+
+    def __init__(self, max_reviews: int):
+        """
+        Initialize an empty index.
+
+        Args:
+            max_reviews: Maximum number of indexed reviews
+        """
+        self.max_reviews = max_reviews
+        self._keys = np.empty(0, dtype=np.uint64)
+        self._ids = np.empty(0, dtype=np.int64)
+        self._recent: dict[int, list[int]] = {}
+        self._recent_size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Number of indexed reviews."""
+        return (len(self._keys) + self._recent_size) // BANDS
+
+    def add(self, keys: np.ndarray, review_id: int):
+        """Index the band keys of a canonical review."""
+        with self._lock:
+            for key in keys.tolist():
+                self._recent.setdefault(key, []).append(review_id)
+            self._recent_size += BANDS
+            if self._recent_size >= MERGE_THRESHOLD * BANDS:
+                self._merge()
+
+    def load(self, keys: np.ndarray, ids: np.ndarray):
+        """
+        Add many reviews at once, e.g. when the index is built at startup.
+
+        Args:
+            keys: Band keys, ``BANDS`` per review
+            ids: Review id of every key
+        """
+        with self._lock:
+            self._merge(keys, ids)
+
+    def candidates(self, keys: np.ndarray) -> list[int]:
+        """
+        Find reviews sharing at least one band with the given keys.
+
+        Returns:
+            Candidate review ids, those sharing the most bands first
+        """
+        found: Counter[int] = Counter()
+        with self._lock:
+            if len(self._keys):
+                left = np.searchsorted(self._keys, keys, side="left")
+                right = np.searchsorted(self._keys, keys, side="right")
+                for start, stop in zip(left.tolist(), right.tolist(), strict=True):
+                    if stop > start:
+                        # Популярная полоса не должна давать сотни кандидатов
+                        found.update(self._ids[start : min(stop, start + 64)].tolist())
+            for key in keys.tolist():
+                found.update(self._recent.get(key, ()))
+        return [review_id for review_id, _ in found.most_common(MAX_CANDIDATES)]
+
+    def _merge(self, keys: np.ndarray | None = None, ids: np.ndarray | None = None):
+        """Merge recent additions (and the given arrays) into the sorted arrays."""
+        recent_keys = [key for key, owners in self._recent.items() for _ in owners]
+        recent_ids = [owner for owners in self._recent.values() for owner in owners]
+        new_keys = np.concatenate(
+            [np.array(recent_keys, dtype=np.uint64)]
+            + ([keys.astype(np.uint64)] if keys is not None else [])
+        )
+        new_ids = np.concatenate(
+            [np.array(recent_ids, dtype=np.int64)]
+            + ([ids.astype(np.int64)] if ids is not None else [])
+        )
+        self._recent = {}
+        self._recent_size = 0
+
+        order = np.argsort(new_keys, kind="stable")
+        new_keys, new_ids = new_keys[order], new_ids[order]
+        positions = np.searchsorted(self._keys, new_keys)
+        self._keys = np.insert(self._keys, positions, new_keys)
+        self._ids = np.insert(self._ids, positions, new_ids)
+
+        if len(self._keys) > self.max_reviews * BANDS * 1.1:
+            # Вытесняем самые старые отзывы, оставляя max_reviews последних
+            unique_ids = np.unique(self._ids)
+            cutoff = unique_ids[-self.max_reviews]
+            keep = self._ids >= cutoff
+            self._keys, self._ids = self._keys[keep], self._ids[keep]
+
+
+class ReviewDeduplicator:
+    """
+    Finds duplicates of incoming reviews among stored canonical reviews.
+
+    A canonical review is the first stored review with a given text; it
+    holds the content hash and is indexed for near-duplicate search. Callers
+    hold ``lock`` from ``find`` until the new canonical reviews are stored
+    and passed to ``remember``, so two copies written by this process at
+    the same time cannot both become canonical; copies written by other
+    processes are caught by the unique index.
+
+    Archived reviews are not duplicate targets: the first copy of an
+    archived review becomes a new canonical review. Remembered ids that may
+    have been archived since, by this or another process, are checked
+    against the table before use.
+    """
+
+    def __init__(
+        self,
+        policy: str,
+        near_duplicates: bool,
+        threshold: float,
+        max_indexed_reviews: int,
+    ):
+        """
+        Initialize deduplicator.
+
+        Args:
+            policy: What to do with duplicates: reject, link or count
+            near_duplicates: Whether to look for near duplicates
+            threshold: Minimal Jaccard similarity of a near duplicate
+            max_indexed_reviews: Maximum number of reviews in the LSH index
+
+        Raises:
+            ValueError: If the policy is unknown
+        """
+        if policy not in DUPLICATE_POLICIES:
+            raise ValueError(
+                f"Invalid duplicate policy: {policy}. "
+                f"Must be one of: {', '.join(DUPLICATE_POLICIES)}"
+            )
+        self.policy = policy
+        self.near_duplicates = near_duplicates
+        self.threshold = threshold
+        self.index = NearDuplicateIndex(max_indexed_reviews)
+        self.lock = threading.Lock()
+        self._recent_hashes: OrderedDict[str, int] = OrderedDict()
+        self._recent_texts: OrderedDict[int, str] = OrderedDict()
+        self._thread: threading.Thread | None = None
+        self._index_ready = False
+        self._index_build_seconds: float | None = None
+
+    def fingerprint(self, texts: list[str]) -> list[Fingerprint]:
+        """
+        Compute duplicate-detection features of texts.
+
+        Pure computation; call it before taking ``lock``. Near-duplicate
+        features are skipped for texts this process already stored, which
+        are exact duplicates anyway.
+
+        Args:
+            texts: Review texts
+
+        Returns:
+            Fingerprint of every text, in input order
+        """
+        fingerprints = []
+        for text in texts:
+            normalized = normalize_content(text)
+            digest = hash_normalized(normalized)
+            fingerprint = Fingerprint(content_hash=digest, normalized=normalized)
+            if self.near_duplicates and digest not in self._recent_hashes:
+                fingerprint = _with_near_features(fingerprint)
+            fingerprints.append(fingerprint)
+        return fingerprints
+
+    def find(
+        self, repository: ReviewRepository, fingerprints: list[Fingerprint]
+    ) -> list[DuplicateMatch | None]:
+        """
+        Find the canonical review each text duplicates.
+
+        Exact duplicates are looked up through the content hash index (and
+        among earlier texts of the same batch), near duplicates through the
+        LSH index with exact Jaccard verification. Only reviews still in the
+        table are matched.
+
+        Args:
+            repository: Repository to look up stored reviews
+            fingerprints: Fingerprints of the texts; missing near-duplicate
+                features are filled in place
+
+        Returns:
+            Match for every text that duplicates another one, else None
+        """
+        hashes = [fingerprint.content_hash for fingerprint in fingerprints]
+        known = {
+            digest: self._recent_hashes[digest]
+            for digest in hashes
+            if digest in self._recent_hashes
+        }
+        archived_max_id = None
+        if known:
+            # Отзывы не новее границы архива могли уйти в архив (в том числе
+            # другим процессом): такие ключи ищем заново в таблице
+            archived_max_id = repository.get_archived_max_id()
+            for digest in [d for d, id_ in known.items() if id_ <= archived_max_id]:
+                del known[digest]
+                self._recent_hashes.pop(digest, None)
+        missing = [digest for digest in dict.fromkeys(hashes) if digest not in known]
+        if missing:
+            known.update(repository.find_by_content_hashes(missing))
+
+        matches: list[DuplicateMatch | None] = []
+        first_position: dict[str, int] = {}
+        near_pending: dict[int, list[int]] = {}
+        for position, fingerprint in enumerate(fingerprints):
+            digest = fingerprint.content_hash
+            if digest in known:
+                matches.append(
+                    DuplicateMatch(
+                        kind="exact", similarity=1.0, review_id=known[digest]
+                    )
+                )
+            elif digest in first_position:
+                matches.append(
+                    DuplicateMatch(
+                        kind="exact", similarity=1.0, position=first_position[digest]
+                    )
+                )
+            else:
+                first_position[digest] = position
+                matches.append(None)
+                if self.near_duplicates and fingerprint.shingles is None:
+                    fingerprint = fingerprints[position] = _with_near_features(
+                        fingerprint
+                    )
+                if fingerprint.band_keys is not None:
+                    candidates = self.index.candidates(fingerprint.band_keys)
+                    if candidates:
+                        near_pending[position] = candidates
+
+        if near_pending:
+            candidate_ids = {id_ for ids in near_pending.values() for id_ in ids}
+            if archived_max_id is None:
+                archived_max_id = repository.get_archived_max_id()
+            # Тексты из памяти только для отзывов новее границы архива;
+            # остальные кандидаты проверяются по таблице
+            texts = {
+                review_id: self._recent_texts[review_id]
+                for review_id in candidate_ids
+                if review_id > archived_max_id and review_id in self._recent_texts
+            }
+            stored = sorted(candidate_ids - texts.keys())
+            if stored:
+                texts.update(
+                    (review_id, normalize_content(text))
+                    for review_id, text in repository.get_canonical_texts(
+                        stored
+                    ).items()
+                )
+            candidate_shingles = {
+                review_id: shingles(normalized)
+                for review_id, normalized in texts.items()
+            }
+            for position, candidates in near_pending.items():
+                # При равном сходстве побеждает более ранний отзыв
+                best_id, best = None, 0.0
+                for review_id in sorted(candidates):
+                    if review_id not in candidate_shingles:
+                        continue
+                    similarity = jaccard(
+                        fingerprints[position].shingles, candidate_shingles[review_id]
+                    )
+                    if similarity > best:
+                        best_id, best = review_id, similarity
+                if best_id is not None and best >= self.threshold:
+                    matches[position] = DuplicateMatch(
+                        kind="near", similarity=round(best, 4), review_id=best_id
+                    )
+
+        for match in matches:
+            if match is not None:
+                (EXACT_DUPLICATES if match.kind == "exact" else NEAR_DUPLICATES).inc()
+        return matches
+
+    def remember(self, fingerprints: list[Fingerprint], review_ids: list[int]):
+        """
+        Register newly stored canonical reviews.
+
+        Args:
+            fingerprints: Fingerprints of the canonical reviews
+            review_ids: Their ids, in the same order
+        """
+        for fingerprint, review_id in zip(fingerprints, review_ids, strict=True):
+            self._recent_hashes[fingerprint.content_hash] = review_id
+            if fingerprint.band_keys is not None:
+                self.index.add(fingerprint.band_keys, review_id)
+                self._recent_texts[review_id] = fingerprint.normalized
+        while len(self._recent_hashes) > RECENT_HASHES_SIZE:
+            self._recent_hashes.popitem(last=False)
+        while len(self._recent_texts) > RECENT_TEXTS_SIZE:
+            self._recent_texts.popitem(last=False)
+
+    def start(self, session_factory: Callable[[], Session]):
+        """
+        Build the near-duplicate index from stored reviews in the background.
+
+        Until the build finishes, near duplicates of older reviews are not
+        detected; exact duplicates always are.
+
+        Args:
+            session_factory: Factory for database sessions
+        """
+        if not self.near_duplicates or self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._build_index,
+            args=(session_factory,),
+            name="dedup-index",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def _build_index(self, session_factory: Callable[[], Session]):
+        """Index the most recent canonical reviews."""
+        started = time.perf_counter()
+        keys, ids = [], []
+        try:
+            with session_factory() as db:
+                rows = db.execute(
+                    select(Review.id, Review.text)
+                    .where(Review.duplicate_of.is_(None))
+                    .order_by(Review.id.desc())
+                    .limit(self.index.max_reviews)
+                    .execution_options(stream_results=True, yield_per=5000)
+                )
+                for review_id, text in rows:
+                    shingle_set = shingles(normalize_content(text))
+                    if shingle_set:
+                        keys.append(band_keys(shingle_set))
+                        ids.append(review_id)
+            if keys:
+                self.index.load(
+                    np.concatenate(keys), np.repeat(np.array(ids, np.int64), BANDS)
+                )
+            self._index_ready = True
+            self._index_build_seconds = time.perf_counter() - started
+            logger.info(
+                "Near-duplicate index built: %d reviews in %.1f s",
+                len(ids),
+                self._index_build_seconds,
+            )
+        except Exception:
+            logger.exception("Failed to build the near-duplicate index")
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Describe deduplication state for health checks.
+
+        Returns:
+            Dictionary with policy, index size and build state
+        """
+        return {
+            "policy": self.policy,
+            "near_duplicates": self.near_duplicates,
+            "threshold": self.threshold,
+            "indexed_reviews": len(self.index),
+            "index_ready": self._index_ready,
+            "index_build_ms": (
+                round(self._index_build_seconds * 1000, 3)
+                if self._index_build_seconds is not None
+                else None
+            ),
+        }
+
+
+# Общий детектор дубликатов процесса
+review_deduplicator = ReviewDeduplicator(
+    policy=settings.review_duplicate_policy,
+    near_duplicates=settings.review_near_duplicates,
+    threshold=settings.review_near_duplicate_threshold,
+    max_indexed_reviews=settings.review_near_duplicate_index_size,
+)
@@ -0,0 +1,238 @@
+"""Compiled sentiment lexicon for the dictionary analyzer."""
+
+import threading
+from collections import deque
+from pathlib import Path
+
+# Частицы, меняющие полярность следующего слова
+NEGATIONS: frozenset[str] = frozenset({"не", "нет", "ни", "без"})
+
+POLARITIES: dict[str, int] = {
+    "positive": 1,
+    "+1": 1,
+    "1": 1,
+    "negative": -1,
+    "-1": -1,
+}
+
+
+def _preceding_word(text: str, start: int) -> str:
+    """Return the word that ends right before position ``start``."""
+    end = start
+    while end > 0 and not text[end - 1].isalnum():
+        end -= 1
+    begin = end
+    while begin > 0 and text[begin - 1].isalnum():
+        begin -= 1
+    return text[begin:end]
+
+
+class LexiconMatcher:
+    """
+    Aho–Corasick automaton over lexicon stems.
+
+    All terms are matched in one pass over the text. A term matches at the
+    start of a word and may end inside it, so stems like "ненавиж" cover
+    every word form. Overlapping matches are resolved leftmost-longest, and
+    a match preceded by a negation ("не нравится") has its polarity flipped.
+    """
+
+    def __init__(self, terms: dict[str, int]):
+        """
+        Compile the automaton.
+
+        Args:
+            terms: Mapping of term to polarity (+1 positive, -1 negative)
+        """
+        self.size = len(terms)
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._output: list[tuple[int, int] | None] = [None]
+        self._next_output: list[int] = [0]
+
+        for term, polarity in terms.items():
+            self._add(term.lower(), polarity)
+        self._link()
+
+    def _add(self, term: str, polarity: int):
+        """Insert one term into the trie."""
+        state = 0
+        for char in term:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(None)
+                self._next_output.append(0)
+            state = next_state
+        self._output[state] = (len(term), polarity)
+
+    def _link(self):
+        """Build failure links and output links breadth-first."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail = self._goto[fail].get(char, 0)
+                self._fail[next_state] = fail
+                # Ближайший по суффиксной ссылке узел, где заканчивается термин
+                self._next_output[next_state] = (
+                    fail if self._output[fail] is not None else self._next_output[fail]
+                )
+                queue.append(next_state)
+
+    def find(self, text: str) -> list[tuple[int, int, int]]:
+        """
+        Find lexicon terms in already lowercased text.
+
+        Args:
+            text: Lowercased text
+
+        Returns:
+            Non-overlapping (start, length, polarity) matches, left to right
+        """
+        goto, fail = self._goto, self._fail
+        output, next_output = self._output, self._next_output
+
+        matches = []
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+
+            node = state if output[state] is not None else next_output[state]
+            while node:
+                length, polarity = output[node]
+                start = position - length + 1
+                # Термин должен начинаться с начала слова
+                if start == 0 or not text[start - 1].isalnum():
+                    matches.append((start, length, polarity))
+                node = next_output[node]
+
+        matches.sort(key=lambda match: (match[0], -match[1]))
+        selected = []
+        covered_until = 0
+        for start, length, polarity in matches:
+            if start >= covered_until:
+                selected.append((start, length, polarity))
+                covered_until = start + length
+        return selected
+
+    def count(self, text: str) -> tuple[int, int]:
+        """
+        Count positive and negative terms in text, honouring negation.
+
+        Args:
+            text: Text to score
+
+        Returns:
+            Tuple of (positive count, negative count)
+        """
+        normalized_text = text.lower()
+        positive = negative = 0
+        for start, _, polarity in self.find(normalized_text):
+            if _preceding_word(normalized_text, start) in NEGATIONS:
+                polarity = -polarity
+            if polarity > 0:
+                positive += 1
+            else:
+                negative += 1
+        return positive, negative
+
+    def count_many(self, texts: list[str]) -> list[tuple[int, int]]:
+        """
+        Count positive and negative terms for many texts.
+
+        Args:
+            texts: Texts to score
+
+        Returns:
+            Tuple of (positive count, negative count) for each text
+        """
+        return [self.count(text) for text in texts]
+
+    @classmethod
+    def from_words(cls, positive: set[str], negative: set[str]) -> "LexiconMatcher":
+        """
+        Compile a matcher from positive and negative word sets.
+
+        Args:
+            positive: Positive terms
+            negative: Negative terms
+
+        Returns:
+            Compiled matcher
+        """
+        terms = dict.fromkeys(positive, 1)
+        terms.update(dict.fromkeys(negative, -1))
+        return cls(terms)
+
+    @classmethod
+    def from_file(cls, path: str | Path) -> "LexiconMatcher":
+        """
+        Load and compile a lexicon file.
+
+        Each non-empty line holds a term and its polarity separated by a tab:
+        ``positive``/``negative`` or ``1``/``-1``. Lines starting with ``#``
+        are comments.
+
+        Args:
+            path: Path to the lexicon file
+
+        Returns:
+            Compiled matcher
+
+        Raises:
+            ValueError: If a line cannot be parsed
+        """
+        terms = {}
+        with open(path, encoding="utf-8") as lexicon:
+            for line_number, line in enumerate(lexicon, start=1):
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                term, _, polarity = line.rpartition("\t")
+                if not term or polarity.strip() not in POLARITIES:
+                    raise ValueError(
+                        f"Invalid lexicon line {line_number} in {path}: {line!r}"
+                    )
+                terms[term.strip()] = POLARITIES[polarity.strip()]
+        return cls(terms)
+
+
+_matchers: dict[str | None, LexiconMatcher] = {}
+_matchers_lock = threading.Lock()
+
+
+def get_lexicon_matcher(
+    path: str | None, positive: set[str], negative: set[str]
+) -> LexiconMatcher:
+    """
+    Get a compiled lexicon, compiling it once per process.
+
+    Args:
+        path: Lexicon file; if None, the built-in word sets are used
+        positive: Built-in positive terms
+        negative: Built-in negative terms
+
+    Returns:
+        Shared compiled matcher
+    """
+    matcher = _matchers.get(path)
+    if matcher is not None:
+        return matcher
+
+    with _matchers_lock:
+        if path not in _matchers:
+            _matchers[path] = (
+                LexiconMatcher.from_file(path)
+                if path
+                else LexiconMatcher.from_words(positive, negative)
+            )
+        return _matchers[path]
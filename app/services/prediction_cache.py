@@ -0,0 +1,324 @@
+"""Bounded cache of model predictions keyed on normalized text."""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+from app.config import settings
+from app.ml.prediction import SentimentPrediction
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize text the way the model sees it.
+
+    The TF-IDF vectorizer lowercases and splits on whitespace, so texts
+    differing only in case or spacing get the same prediction.
+    """
+    return " ".join(text.lower().split())
+
+
+def cache_key(text: str, model_version: str) -> str:
+    """Build the cache key for a text and a model version."""
+    digest = hashlib.blake2b(normalize_text(text).encode("utf-8"), digest_size=16)
+    return f"{model_version}:{digest.hexdigest()}"
+
+
+class _SharedStore:
+    """
+    Prediction store in a local SQLite file shared by worker processes.
+
+    Each thread uses its own connection. Writes that fail because another
+    process holds the lock are dropped: the store is only a cache.
+    """
+
+    def __init__(self, path: str, max_size: int):
+        """
+        Initialize store.
+
+        Args:
+            path: SQLite file path
+            max_size: Number of entries kept after pruning
+        """
+        self.path = path
+        self.max_size = max_size
+        self._local = threading.local()
+        self._writes = 0
+
+        conn = self._connect()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS predictions ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_predictions_expires_at "
+            "ON predictions (expires_at)"
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        """Get the connection of the current thread."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=0.05, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            self._local.conn = conn
+        return conn
+
+    def get_many(self, keys: list[str], now: float) -> dict[str, str]:
+        """Get unexpired values for keys."""
+        found = {}
+        try:
+            conn = self._connect()
+            # SQLite ограничивает число параметров в запросе
+            for start in range(0, len(keys), 500):
+                chunk = keys[start : start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                found.update(
+                    conn.execute(
+                        "SELECT key, value FROM predictions "
+                        f"WHERE key IN ({placeholders}) AND expires_at > ?",
+                        (*chunk, now),
+                    ).fetchall()
+                )
+        except sqlite3.Error:
+            pass
+        return found
+
+    def put_many(self, items: list[tuple[str, str, float]]):
+        """Store (key, value, expires_at) items and prune now and then."""
+        try:
+            conn = self._connect()
+            conn.executemany(
+                "INSERT OR REPLACE INTO predictions (key, value, expires_at) "
+                "VALUES (?, ?, ?)",
+                items,
+            )
+            self._writes += len(items)
+            if self._writes >= max(self.max_size // 10, 1):
+                self._writes = 0
+                self._prune(conn)
+        except sqlite3.Error:
+            pass
+
+    def _prune(self, conn: sqlite3.Connection):
+        """Drop expired entries and the ones closest to expiry above max_size."""
+        conn.execute("DELETE FROM predictions WHERE expires_at <= ?", (time.time(),))
+        conn.execute(
+            "DELETE FROM predictions WHERE key IN ("
+            "SELECT key FROM predictions ORDER BY expires_at DESC "
+            "LIMIT -1 OFFSET ?)",
+            (self.max_size,),
+        )
+
+    def clear(self):
+        """Remove all entries."""
+        try:
+            self._connect().execute("DELETE FROM predictions")
+        except sqlite3.Error:
+            pass
+
+
+class PredictionCache:
+    """
+    LRU cache of model predictions with a time-to-live.
+
+    Keys combine a hash of the normalized text with the model version, so
+    predictions of a replaced model are never served. The in-process LRU
+    is backed by an optional SQLite file shared by all workers on a host.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        ttl_seconds: float,
+        shared_path: str | None = None,
+        enabled: bool = True,
+    ):
+        """
+        Initialize cache.
+
+        Args:
+            max_size: Maximum number of entries kept in memory (and on disk)
+            ttl_seconds: Entry lifetime; 0 disables expiry
+            shared_path: SQLite file shared across worker processes
+            enabled: Whether predictions are cached at all
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled and max_size > 0
+        self.shared_path = shared_path
+
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, tuple[SentimentPrediction, float]] = (
+            OrderedDict()
+        )
+        self._shared: _SharedStore | None = None
+        self._shared_pid: int | None = None
+
+        # Метрики
+        self._hits = 0
+        self._shared_hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._invalidations = 0
+
+    def _shared_store(self) -> _SharedStore | None:
+        """Open the shared store on first use in every worker process."""
+        if not self.shared_path:
+            return None
+        # Соединения SQLite нельзя наследовать через fork
+        if self._shared is None or self._shared_pid != os.getpid():
+            self._shared = _SharedStore(self.shared_path, self.max_size)
+            self._shared_pid = os.getpid()
+        return self._shared
+
+    def _expires_at(self, now: float) -> float:
+        """Return the expiry time of an entry stored now."""
+        return now + self.ttl_seconds if self.ttl_seconds > 0 else float("inf")
+
+    def get_many(
+        self, texts: list[str], model_version: str
+    ) -> list[SentimentPrediction | None]:
+        """
+        Look up cached predictions.
+
+        Args:
+            texts: Texts to look up
+            model_version: Version of the model that would predict them
+
+        Returns:
+            Cached prediction or None for each text, in input order
+        """
+        if not self.enabled:
+            return [None] * len(texts)
+
+        keys = [cache_key(text, model_version) for text in texts]
+        results: list[SentimentPrediction | None] = [None] * len(texts)
+        now = time.time()
+
+        with self._lock:
+            for i, key in enumerate(keys):
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                prediction, expires_at = entry
+                if expires_at <= now:
+                    del self._entries[key]
+                    self._expirations += 1
+                    continue
+                self._entries.move_to_end(key)
+                results[i] = prediction
+                self._hits += 1
+
+        missing = [i for i, result in enumerate(results) if result is None]
+        store = self._shared_store()
+        if missing and store is not None:
+            found = store.get_many([keys[i] for i in missing], now)
+            if found:
+                promoted = {}
+                for i in missing:
+                    value = found.get(keys[i])
+                    if value is not None:
+                        results[i] = SentimentPrediction(**json.loads(value))
+                        promoted[keys[i]] = results[i]
+                with self._lock:
+                    self._shared_hits += len(promoted)
+                    self._hits += len(promoted)
+                    for key, prediction in promoted.items():
+                        self._store(key, prediction, self._expires_at(now))
+
+        with self._lock:
+            self._misses += sum(1 for result in results if result is None)
+        return results
+
+    def put_many(
+        self,
+        texts: list[str],
+        predictions: list[SentimentPrediction],
+        model_version: str,
+    ):
+        """
+        Cache predictions of a model version.
+
+        Args:
+            texts: Predicted texts
+            predictions: Prediction for each text
+            model_version: Version of the model that produced them
+        """
+        if not self.enabled or not texts:
+            return
+
+        expires_at = self._expires_at(time.time())
+        items = {
+            cache_key(text, model_version): prediction
+            for text, prediction in zip(texts, predictions, strict=True)
+        }
+
+        with self._lock:
+            for key, prediction in items.items():
+                self._store(key, prediction, expires_at)
+
+        store = self._shared_store()
+        if store is not None:
+            store.put_many(
+                [
+                    (key, json.dumps(prediction.to_dict()), expires_at)
+                    for key, prediction in items.items()
+                ]
+            )
+
+    def _store(self, key: str, prediction: SentimentPrediction, expires_at: float):
+        """Insert an entry and evict the least recently used ones (lock held)."""
+        self._entries[key] = (prediction, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def clear(self):
+        """Drop every cached prediction, in memory and in the shared store."""
+        with self._lock:
+            self._entries.clear()
+            self._invalidations += 1
+        store = self._shared_store()
+        if store is not None:
+            store.clear()
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Describe cache state for health checks.
+
+        Returns:
+            Dictionary with size, hit rate and eviction counters
+        """
+        lookups = self._hits + self._misses
+        return {
+            "enabled": self.enabled,
+            "shared": self.shared_path is not None,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self._hits,
+            "shared_hits": self._shared_hits,
+            "misses": self._misses,
+            "hit_rate": round(self._hits / lookups, 4) if lookups else None,
+            "evictions": self._evictions,
+            "expirations": self._expirations,
+            "invalidations": self._invalidations,
+        }
+
+
+# Общий кэш предсказаний процесса
+prediction_cache = PredictionCache(
+    max_size=settings.prediction_cache_max_size,
+    ttl_seconds=settings.prediction_cache_ttl_seconds,
+    shared_path=settings.prediction_cache_shared_path,
+    enabled=settings.prediction_cache_enabled,
+)
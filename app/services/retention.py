@@ -0,0 +1,243 @@
+"""Time-based retention: moving old reviews from the table to the archive."""
+
+import logging
+import threading
+import time
+from collections.abc import Callable
+from datetime import datetime, timedelta
+from itertools import groupby
+from typing import Any
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.repositories.review_archive import ReviewArchive, review_archive
+from app.repositories.review_repository import ReviewRepository
+
+logger = logging.getLogger(__name__)
+
+
+def _day(moment: datetime) -> datetime:
+    """Truncate a timestamp to the start of its day."""
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+class RetentionWorker:
+    """
+    Periodically archives reviews older than the retention age.
+
+    Every pass moves expired reviews, oldest first and ``batch_size`` at a
+    time, into new segment files (one per day of creation time) and then,
+    in one transaction, catalogs the segments and deletes the reviews from
+    the hot table. Sentiment rollups are left untouched, so statistics keep
+    covering archived reviews. Passes of different processes are serialized
+    by a lock file in the archive directory.
+    """
+
+    def __init__(
+        self,
+        archive: ReviewArchive,
+        max_age_days: int,
+        interval_seconds: float,
+        batch_size: int,
+    ):
+        """
+        Initialize worker.
+
+        Args:
+            archive: Archive to write segments to
+            max_age_days: Age after which reviews are archived
+            interval_seconds: Pause between archival passes
+            batch_size: Maximum number of reviews per segment batch
+
+        Raises:
+            ValueError: If the age or the batch size is not positive
+        """
+        if max_age_days <= 0:
+            raise ValueError("Retention age must be positive")
+        if batch_size <= 0:
+            raise ValueError("Retention batch size must be positive")
+        self.archive = archive
+        self.max_age = timedelta(days=max_age_days)
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self._stopping = threading.Event()
+        self._thread: threading.Thread | None = None
+
+        # Метрики
+        self._passes = 0
+        self._archived = 0
+        self._segments = 0
+        self._failures = 0
+        self._last_pass_at: float | None = None
+        self._last_pass_ms: float | None = None
+
+    def start(self, session_factory: Callable[[], Session]):
+        """
+        Run archival passes in a background thread.
+
+        Args:
+            session_factory: Factory for sessions of the writable database
+        """
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(session_factory,), name="retention", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background thread after the current pass."""
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self, session_factory: Callable[[], Session]):
+        """Background loop running one pass per interval."""
+        while not self._stopping.is_set():
+            try:
+                self.run_once(session_factory)
+            except Exception:
+                logger.exception("Archival pass failed")
+            self._stopping.wait(self.interval_seconds)
+
+    def run_once(
+        self, session_factory: Callable[[], Session], now: datetime | None = None
+    ) -> dict[str, Any]:
+        """
+        Archive every review created on days older than the retention age.
+
+        Args:
+            session_factory: Factory for sessions of the writable database
+            now: Current time (UTC); defaults to the clock
+
+        Returns:
+            Dictionary with the numbers of archived reviews and written
+            segments; ``skipped`` is true if another process holds the lock
+
+        Raises:
+            Exception: If writing a segment or updating the database fails
+        """
+        # Архивируем только целые сутки: за сутки обычно получается один сегмент
+        cutoff = _day((now or datetime.utcnow()) - self.max_age)
+        started = time.perf_counter()
+        lock = self._lock()
+        if lock is None:
+            return {"archived": 0, "segments": 0, "skipped": True}
+
+        archived = segments = 0
+        try:
+            with session_factory() as db:
+                removed = self.archive.remove_stray_files(
+                    ReviewRepository(db).get_segment_paths()
+                )
+            if removed:
+                logger.warning("Removed %d stray archive files", removed)
+
+            while not self._stopping.is_set():
+                with session_factory() as db:
+                    repository = ReviewRepository(db)
+                    rows = repository.get_expired_rows(cutoff, self.batch_size)
+                    if not rows:
+                        break
+                    written = self._write_segments(rows)
+                    try:
+                        repository.replace_with_segments(
+                            written, cutoff, rows[-1].id, len(rows)
+                        )
+                    except Exception:
+                        self.archive.remove_files([segment.path for segment in written])
+                        raise
+                archived += len(rows)
+                segments += len(written)
+        except Exception:
+            self._failures += 1
+            raise
+        finally:
+            lock.close()
+            self._passes += 1
+            self._archived += archived
+            self._segments += segments
+            self._last_pass_at = time.time()
+            self._last_pass_ms = (time.perf_counter() - started) * 1000
+
+        if archived:
+            logger.info(
+                "Archived %d reviews created before %s into %d segments",
+                archived,
+                cutoff.isoformat(),
+                segments,
+            )
+        return {"archived": archived, "segments": segments, "skipped": False}
+
+    def _write_segments(self, rows: list) -> list:
+        """Write rows ordered by id into one segment per day of creation."""
+        written = []
+        try:
+            by_day = sorted(rows, key=lambda row: (_day(row.created_at), row.id))
+            for day, group in groupby(by_day, key=lambda row: _day(row.created_at)):
+                written.append(self.archive.write_segment(day, list(group)))
+        except Exception:
+            self.archive.remove_files([segment.path for segment in written])
+            raise
+        return written
+
+    def _lock(self):
+        """
+        Take the archival lock without waiting.
+
+        Returns:
+            Open lock file to close on release, or None if the lock is taken
+        """
+        self.archive.directory.mkdir(parents=True, exist_ok=True)
+        lock = open(self.archive.directory / "archive.lock", "w")
+        try:
+            import fcntl
+        except ImportError:
+            # На Windows блокировка недоступна
+            return lock
+
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock.close()
+            return None
+        return lock
+
+    def is_running(self) -> bool:
+        """Check whether the background thread is running."""
+        return self._thread is not None
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Describe worker state for health checks.
+
+        Returns:
+            Dictionary with pass counters and the duration of the last pass
+        """
+        return {
+            "running": self.is_running(),
+            "max_age_days": self.max_age.days,
+            "directory": str(self.archive.directory),
+            "compression": self.archive.compression,
+            "passes": self._passes,
+            "archived": self._archived,
+            "segments": self._segments,
+            "failures": self._failures,
+            "last_pass_at": self._last_pass_at,
+            "last_pass_ms": (
+                round(self._last_pass_ms, 1) if self._last_pass_ms is not None else None
+            ),
+        }
+
+
+# Глобальный экземпляр архиватора
+retention_worker = RetentionWorker(
+    review_archive,
+    max_age_days=settings.retention_max_age_days,
+    interval_seconds=settings.retention_interval_seconds,
+    batch_size=settings.retention_batch_size,
+)
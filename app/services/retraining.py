@@ -0,0 +1,125 @@
+"""Background model retraining jobs triggered through the admin API."""
+
+import asyncio
+import logging
+import multiprocessing
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+
+from app.config import settings
+from app.core.exceptions import RetrainingInProgressException
+from app.ml.registry import ModelRegistry, model_registry
+from app.ml.training import run_retraining_job
+
+logger = logging.getLogger(__name__)
+
+
+class RetrainingManager:
+    """
+    Runs one retraining job at a time in a separate process.
+
+    The job fits a model on the built-in data plus stored reviews, writes a
+    new artifact version and publishes it. The API process then loads the
+    version in a thread and swaps it into the registry; other worker
+    processes pick it up through the registry's version check. Training
+    never runs on the event loop or in the serving processes.
+    """
+
+    def __init__(
+        self,
+        registry: ModelRegistry,
+        database_url: str,
+        max_reviews: int,
+    ):
+        """
+        Initialize manager.
+
+        Args:
+            registry: Registry to swap the new model into
+            database_url: Database with stored reviews to train on
+            max_reviews: Maximum number of stored reviews to train on
+        """
+        self.registry = registry
+        self.database_url = database_url
+        self.max_reviews = max_reviews
+        self._job: dict[str, Any] | None = None
+        self._task: asyncio.Task | None = None
+
+    def is_running(self) -> bool:
+        """Check whether a job is in progress."""
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> dict[str, Any]:
+        """
+        Start a retraining job in the background.
+
+        Must be called from the event loop.
+
+        Returns:
+            Job description
+
+        Raises:
+            RetrainingInProgressException: If a job is already running
+        """
+        if self.is_running():
+            raise RetrainingInProgressException(
+                f"Retraining job {self._job['id']} is already running"
+            )
+
+        self._job = {
+            "id": uuid.uuid4().hex,
+            "status": "running",
+            "started_at": time.time(),
+            "finished_at": None,
+            "version": None,
+            "metrics": None,
+            "error": None,
+        }
+        self._task = asyncio.create_task(self._run(self._job))
+        return dict(self._job)
+
+    async def _run(self, job: dict[str, Any]):
+        """Train in a child process, then hot-swap the published version."""
+        loop = asyncio.get_running_loop()
+        # spawn: дочерний процесс не наследует потоки и event loop сервера
+        pool = ProcessPoolExecutor(
+            max_workers=1, mp_context=multiprocessing.get_context("spawn")
+        )
+        try:
+            result = await loop.run_in_executor(
+                pool,
+                run_retraining_job,
+                str(self.registry.store.root),
+                self.database_url,
+                self.max_reviews,
+            )
+            # Загрузка новой версии вне event loop; запросы идут на старой модели
+            await asyncio.to_thread(self.registry.reload, result["version"])
+            job.update(
+                status="succeeded", version=result["version"], metrics=result["metrics"]
+            )
+        except Exception as e:
+            logger.exception("Retraining job %s failed", job["id"])
+            job.update(status="failed", error=str(e))
+        finally:
+            job["finished_at"] = time.time()
+            pool.shutdown(wait=False)
+
+    def status(self) -> dict[str, Any] | None:
+        """
+        Describe the latest job.
+
+        Returns:
+            Job description or None if no job has been started
+        """
+        return dict(self._job) if self._job else None
+
+
+# Общий менеджер переобучения процесса API
+retraining_manager = RetrainingManager(
+    model_registry,
+    database_url=settings.database_url,
+    max_reviews=settings.retrain_max_reviews,
+)
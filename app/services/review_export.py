@@ -0,0 +1,240 @@
+"""Streaming export of stored reviews to JSONL, CSV and Parquet."""
+
+import csv
+import io
+from collections.abc import Iterable, Iterator
+from datetime import datetime
+from itertools import islice
+
+from sqlalchemy import Row
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core.database import ReadSessionLocal
+from app.core.serialization import encode_rows_ndjson
+from app.repositories.review_repository import ReviewRepository
+
+EXPORT_FORMATS = ("jsonl", "csv", "parquet")
+EXPORT_COLUMNS = ("id", "text", "sentiment", "confidence", "created_at")
+EXPORT_MEDIA_TYPES = {
+    "jsonl": "application/x-ndjson",
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def validate_export_format(fmt: str):
+    """
+    Check that an export format is known and its dependencies are installed.
+
+    Raises:
+        ValueError: If the format is unknown or Parquet support is missing
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError("Invalid export format")
+    if fmt == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ValueError("Parquet export requires the pyarrow package")
+
+
+def _batches(rows: Iterable[Row], size: int) -> Iterator[list[Row]]:
+    """Group rows into lists of at most ``size`` rows."""
+    iterator = iter(rows)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def encode_jsonl(rows: Iterable[Row], chunk_size: int) -> Iterator[bytes]:
+    """
+    Encode review rows as newline-delimited JSON.
+
+    Args:
+        rows: Review rows (id, text, sentiment, confidence, created_at)
+        chunk_size: Rows per yielded chunk
+
+    Yields:
+        Chunks of NDJSON-encoded reviews
+    """
+    for batch in _batches(rows, chunk_size):
+        yield encode_rows_ndjson(batch)
+
+
+def encode_csv(rows: Iterable[Row], chunk_size: int) -> Iterator[bytes]:
+    """
+    Encode review rows as CSV with a header line.
+
+    Args:
+        rows: Review rows (id, text, sentiment, confidence, created_at)
+        chunk_size: Rows per yielded chunk
+
+    Yields:
+        Chunks of CSV-encoded reviews
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(EXPORT_COLUMNS)
+    for batch in _batches(rows, chunk_size):
+        # Время в ISO 8601, как в JSONL и API (str(datetime) дал бы пробел вместо T)
+        writer.writerows(
+            (review_id, text, sentiment, confidence, created_at.isoformat())
+            for review_id, text, sentiment, confidence, created_at in batch
+        )
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object that hands written bytes over in chunks."""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: list[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        chunk = bytes(data)
+        self._chunks.append(chunk)
+        self._position += len(chunk)
+        return len(chunk)
+
+    def tell(self) -> int:
+        return self._position
+
+    def take(self) -> bytes:
+        """Return and forget everything written since the previous call."""
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def encode_parquet(rows: Iterable[Row], row_group_size: int) -> Iterator[bytes]:
+    """
+    Encode review rows as a Parquet file, one row group at a time.
+
+    Requires pyarrow. Only the current row group is held in memory; the
+    sentiment column is dictionary-encoded.
+
+    Args:
+        rows: Review rows (id, text, sentiment, confidence, created_at)
+        row_group_size: Rows per Parquet row group
+
+    Yields:
+        Consecutive parts of the Parquet file
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema(
+        [
+            ("id", pa.int64()),
+            ("text", pa.string()),
+            ("sentiment", pa.dictionary(pa.int32(), pa.string())),
+            ("confidence", pa.float64()),
+            ("created_at", pa.timestamp("us")),
+        ]
+    )
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    try:
+        for batch in _batches(rows, row_group_size):
+            # Транспонируем кортежи строк в столбцы
+            columns = [list(column) for column in zip(*batch, strict=True)]
+            writer.write_table(
+                pa.Table.from_arrays(
+                    [
+                        pa.array(columns[0], pa.int64()),
+                        pa.array(columns[1], pa.string()),
+                        pa.array(columns[2], pa.string()).dictionary_encode(),
+                        pa.array(columns[3], pa.float64()),
+                        pa.array(columns[4], pa.timestamp("us")),
+                    ],
+                    schema=schema,
+                )
+            )
+            yield sink.take()
+    finally:
+        writer.close()
+    yield sink.take()
+
+
+def iter_export(
+    db: Session,
+    fmt: str,
+    sentiment: str | None = None,
+    created_after: datetime | None = None,
+    created_before: datetime | None = None,
+    after_id: int | None = None,
+) -> Iterator[bytes]:
+    """
+    Stream matching reviews from a server-side cursor in an export format.
+
+    Rows go from the cursor straight into the encoder as plain tuples;
+    no ORM objects or response models are built, and memory stays bounded
+    by one chunk (one row group for Parquet).
+
+    Args:
+        db: Database session to read with
+        fmt: 'jsonl', 'csv' or 'parquet'
+        sentiment: Optional sentiment filter
+        created_after: Optional lower bound on creation time (inclusive)
+        created_before: Optional upper bound on creation time (exclusive)
+        after_id: Optional keyset cursor; start after this review id
+
+    Yields:
+        Consecutive parts of the exported file
+    """
+    chunk_size = settings.reviews_stream_chunk_size
+    rows = ReviewRepository(db).iter_rows(
+        sentiment_filter=sentiment,
+        after_id=after_id,
+        chunk_size=chunk_size,
+        created_after=created_after,
+        created_before=created_before,
+    )
+    if fmt == "parquet":
+        yield from encode_parquet(rows, settings.reviews_export_row_group_size)
+    elif fmt == "csv":
+        yield from encode_csv(rows, chunk_size)
+    else:
+        yield from encode_jsonl(rows, chunk_size)
+
+
+def stream_export(
+    fmt: str,
+    sentiment: str | None = None,
+    created_after: datetime | None = None,
+    created_before: datetime | None = None,
+    after_id: int | None = None,
+) -> Iterator[bytes]:
+    """
+    Stream an export using a dedicated read session.
+
+    The generator owns its session for the whole stream, so it can outlive
+    the request that started it.
+
+    Args:
+        fmt: 'jsonl', 'csv' or 'parquet'
+        sentiment: Optional sentiment filter
+        created_after: Optional lower bound on creation time (inclusive)
+        created_before: Optional upper bound on creation time (exclusive)
+        after_id: Optional keyset cursor; start after this review id
+
+    Yields:
+        Consecutive parts of the exported file
+    """
+    db = ReadSessionLocal()
+    try:
+        yield from iter_export(
+            db, fmt, sentiment, created_after, created_before, after_id
+        )
+    finally:
+        db.close()
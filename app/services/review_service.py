@@ -1,22 +1,114 @@
 """Business logic service for reviews."""
 
+from collections import Counter
+from collections.abc import Iterator
 from datetime import datetime
 
+from sqlalchemy import Row
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from app.config import settings
-from app.models.schemas import ReviewCreate, ReviewResponse
+from app.core.database import ReadSessionLocal
+from app.core.exceptions import DuplicateReviewException
+from app.core.serialization import encode_rows
+from app.ml.prediction import SentimentPrediction
+from app.models.database import Review
+from app.models.schemas import (
+    ReviewBatchCreate,
+    ReviewCreate,
+    ReviewResponse,
+    ReviewSearchResult,
+    SentimentStatsBucket,
+    SentimentStatsResponse,
+)
 from app.repositories.review_repository import ReviewRepository
+from app.services.dedup import DuplicateMatch, Fingerprint, review_deduplicator
+from app.services.review_export import encode_jsonl
 from app.services.sentiment_service import SentimentService
+from app.services.text_search import build_match_query
+from app.services.write_behind import WriteBehindWriter
+
+VALID_SENTIMENTS = ("positive", "negative", "neutral")
+STATS_BUCKETS = ("hour", "day")
+
+
+def validate_sentiment(sentiment: str | None):
+    """
+    Validate an optional sentiment filter.
+
+    Args:
+        sentiment: Sentiment filter to check
+
+    Raises:
+        ValueError: If the sentiment is not a known value
+    """
+    if sentiment and sentiment not in VALID_SENTIMENTS:
+        raise ValueError("Invalid sentiment value")
+
+
+def _page_limit(limit: int | None) -> int:
+    """Apply the default and the bounds of the page size."""
+    if limit is None:
+        limit = settings.reviews_page_default_limit
+    return max(1, min(limit, settings.reviews_page_max_limit))
+
+
+def _summarize_counts(counts: dict[str, int]) -> dict:
+    """Build total, counts and ratios per sentiment."""
+    total = sum(counts.values())
+    return {
+        "total": total,
+        "counts": counts,
+        "ratios": {
+            sentiment: round(count / total, 6) if total else 0.0
+            for sentiment, count in counts.items()
+        },
+    }
+
+
+def _to_response(review: Review) -> ReviewResponse:
+    """Build the response of a stored review."""
+    return ReviewResponse(
+        id=review.id,
+        text=review.text,
+        sentiment=review.sentiment,
+        confidence=review.confidence,
+        created_at=review.created_at,
+        duplicate_of=review.duplicate_of,
+    )
+
+
+def _rejection(duplicates: dict[int, DuplicateMatch]) -> DuplicateReviewException:
+    """Build the error for reviews rejected as duplicates."""
+    stored = [match.review_id for match in duplicates.values() if match.review_id]
+    if len(duplicates) == 1 and stored:
+        message = f"Review duplicates stored review {stored[0]}"
+    else:
+        positions = ", ".join(str(position) for position in duplicates)
+        message = (
+            f"Reviews at positions {positions} duplicate stored reviews "
+            "or earlier reviews of the batch"
+        )
+    return DuplicateReviewException(message, duplicate_of=stored[0] if stored else None)
 
 
 class ReviewService:
     """Service for review business logic operations."""
 
-    def __init__(self, db: Session):
-        """Initialize service with database session."""
+    def __init__(self, db: Session, writer: WriteBehindWriter | None = None):
+        """
+        Initialize service with database session.
+
+        Args:
+            db: Database session
+            writer: Optional write-behind writer; when set, new reviews are
+                acknowledged from its log and committed in the background
+        """
         self.db = db
+        self.writer = writer
         self.repository = ReviewRepository(db)
+        self.deduplicator = review_deduplicator
         self.sentiment_service = SentimentService(use_ml=settings.use_ml_sentiment)
 
     def create_review(self, review_data: ReviewCreate) -> ReviewResponse:
@@ -32,55 +124,520 @@ class ReviewService:
         Raises:
             Exception: If creation fails
         """
-        # Анализируем сентимент
-        sentiment = self.sentiment_service.analyze_sentiment(review_data.text)
-
-        # Подготавливаем данные отзыва
-        review_dict = {
-            "text": review_data.text,
-            "sentiment": sentiment,
-            "created_at": datetime.utcnow().isoformat(),
-        }
-
-        # Создаем отзыв в базе данных
-        db_review = self.repository.create(review_dict)
-
-        # Возвращаем ответ
-        return ReviewResponse(
-            id=db_review.id,
-            text=db_review.text,
-            sentiment=db_review.sentiment,
-            created_at=db_review.created_at,
-        )
+        # Анализируем сентимент (метка и уверенность за один проход модели)
+        prediction = self.sentiment_service.predict(review_data.text)
+        return self.save_review(review_data.text, prediction)
+
+    def save_review(self, text: str, prediction: SentimentPrediction) -> ReviewResponse:
+        """
+        Store a review whose sentiment has already been predicted.
+
+        Args:
+            text: Review text
+            prediction: Sentiment prediction for the text
+
+        Returns:
+            Created review response (under the count policy, the canonical
+            review that the text duplicates)
+
+        Raises:
+            DuplicateReviewException: If the review is a duplicate and the
+                policy is reject
+            Exception: If creation fails
+        """
+        return self.save_reviews([text], [prediction])[0]
+
+    def create_reviews(self, batch: ReviewBatchCreate) -> list[ReviewResponse]:
+        """
+        Create many reviews with one sentiment pass and one bulk insert.
+
+        Args:
+            batch: Reviews to create
+
+        Returns:
+            Created review responses, in input order
+
+        Raises:
+            Exception: If creation fails
+        """
+        texts = [review.text for review in batch.reviews]
+        predictions = self.sentiment_service.predict_many(texts)
+        return self.save_reviews(texts, predictions)
+
+    def save_reviews(
+        self, texts: list[str], predictions: list[SentimentPrediction]
+    ) -> list[ReviewResponse]:
+        """
+        Store many reviews with one bulk insert.
+
+        Duplicates of stored reviews and of earlier texts in the batch are
+        handled by the duplicate policy: ``reject`` fails the whole batch,
+        ``link`` stores the copy with ``duplicate_of`` set, and ``count``
+        stores nothing and returns the canonical review instead.
+
+        Args:
+            texts: Review texts
+            predictions: Sentiment prediction for each text
+
+        Returns:
+            Created review responses, in input order
+
+        Raises:
+            DuplicateReviewException: If a review is a duplicate and the
+                policy is reject
+            Exception: If creation fails
+        """
+        # Все отзывы пакета получают одно время создания
+        created_at = datetime.utcnow()
+        reviews_data = [
+            {
+                "text": text,
+                "sentiment": prediction.sentiment,
+                "confidence": prediction.confidence,
+                "created_at": created_at,
+                "content_hash": None,
+                "duplicate_of": None,
+                "duplicate_count": 0,
+            }
+            for text, prediction in zip(texts, predictions, strict=True)
+        ]
+        # Признаки считаем до захвата блокировки
+        fingerprints = self.deduplicator.fingerprint(texts)
+
+        try:
+            return self._save_deduplicated(reviews_data, fingerprints)
+        except IntegrityError:
+            # Тот же текст одновременно сохранил другой процесс: теперь его
+            # хэш есть в базе, и повторная проверка найдет канонический отзыв
+            return self._save_deduplicated(reviews_data, fingerprints)
+
+    def _save_deduplicated(
+        self, reviews_data: list[dict], fingerprints: list[Fingerprint]
+    ) -> list[ReviewResponse]:
+        """Apply the duplicate policy to a batch and store what remains."""
+        deduplicator = self.deduplicator
+        with deduplicator.lock:
+            matches = deduplicator.find(self.repository, fingerprints)
+            duplicates = {
+                position: match
+                for position, match in enumerate(matches)
+                if match is not None
+            }
+            if duplicates and deduplicator.policy == "reject":
+                raise _rejection(duplicates)
+
+            rows: list[dict] = []
+            # Позиция во входном пакете -> индекс сохраняемой строки
+            row_of: dict[int, int] = {}
+            # Индекс строки-копии -> индекс строки канонического отзыва пакета
+            batch_links: dict[int, int] = {}
+            # Сохраненный канонический отзыв -> число новых копий
+            duplicate_counts: Counter[int] = Counter()
+            batch_copies: Counter[int] = Counter()
+            for position, review in enumerate(reviews_data):
+                match = duplicates.get(position)
+                if match is not None:
+                    if match.review_id is not None:
+                        duplicate_counts[match.review_id] += 1
+                    else:
+                        batch_copies[match.position] += 1
+                    if deduplicator.policy == "count":
+                        # Копия не сохраняется, только учитывается
+                        continue
+
+                row = dict(review)
+                if match is None:
+                    row["content_hash"] = fingerprints[position].content_hash
+                elif match.review_id is not None:
+                    row["duplicate_of"] = match.review_id
+                else:
+                    batch_links[len(rows)] = row_of[match.position]
+                row_of[position] = len(rows)
+                rows.append(row)
+            for position, copies in batch_copies.items():
+                rows[row_of[position]]["duplicate_count"] = copies
+
+            stored = self._store(rows, batch_links, duplicate_counts)
+
+            canonical = [
+                position
+                for position in range(len(reviews_data))
+                if position not in duplicates
+            ]
+            deduplicator.remember(
+                [fingerprints[position] for position in canonical],
+                [stored[row_of[position]].id for position in canonical],
+            )
+
+        responses: list[ReviewResponse | None] = [None] * len(reviews_data)
+        for position, row_index in row_of.items():
+            responses[position] = stored[row_index]
+        if len(row_of) < len(reviews_data):
+            # Политика count: вместо копии возвращаем канонический отзыв
+            existing = self.repository.get_by_ids(
+                [match.review_id for match in duplicates.values() if match.review_id]
+            )
+            for position, match in duplicates.items():
+                if match.review_id is None:
+                    response = stored[row_of[match.position]]
+                    responses[position] = response.model_copy(
+                        update={"duplicate_of": response.id}
+                    )
+                elif match.review_id in existing:
+                    responses[position] = _to_response(
+                        existing[match.review_id]
+                    ).model_copy(update={"duplicate_of": match.review_id})
+                else:
+                    # Канонический отзыв еще в журнале отложенной записи
+                    responses[position] = ReviewResponse(
+                        id=match.review_id,
+                        **{
+                            key: reviews_data[position][key]
+                            for key in ("text", "sentiment", "confidence", "created_at")
+                        },
+                        duplicate_of=match.review_id,
+                    )
+        return responses
+
+    def _store(
+        self,
+        rows: list[dict],
+        batch_links: dict[int, int],
+        duplicate_counts: dict[int, int],
+    ) -> list[ReviewResponse]:
+        """
+        Insert rows and count copies of stored reviews.
+
+        Args:
+            rows: Reviews to store
+            batch_links: Row index of a copy -> row index of its canonical
+                review in the same batch
+            duplicate_counts: Stored review id -> number of new copies
+
+        Returns:
+            Response for every row, in order
+        """
+        if not rows:
+            # Политика count: весь пакет оказался копиями
+            if self.writer is not None:
+                self.writer.flush()
+            self.repository.increment_duplicate_counts(duplicate_counts)
+            return []
+
+        # В режиме отложенной записи отзывы подтверждаются после записи в журнал
+        if self.writer is not None:
+            return self._submit_to_writer(rows, batch_links, duplicate_counts)
+
+        db_reviews = self.repository.create_many(rows, batch_links, duplicate_counts)
+        return [_to_response(review) for review in db_reviews]
+
+    def _submit_to_writer(
+        self,
+        rows: list[dict],
+        batch_links: dict[int, int],
+        duplicate_counts: dict[int, int],
+    ) -> list[ReviewResponse]:
+        """Hand reviews to the write-behind writer and build their responses."""
+        ids: list[int | None] = [None] * len(rows)
+        # Сначала канонические отзывы: копиям пакета нужны их id
+        first = [index for index in range(len(rows)) if index not in batch_links]
+        for index, review_id in zip(
+            first, self.writer.submit([rows[index] for index in first]), strict=True
+        ):
+            ids[index] = review_id
+        if batch_links:
+            linked = list(batch_links)
+            copies = [
+                {**rows[index], "duplicate_of": ids[batch_links[index]]}
+                for index in linked
+            ]
+            for index, review_id, row in zip(
+                linked, self.writer.submit(copies), copies, strict=True
+            ):
+                ids[index] = review_id
+                rows[index] = row
+
+        if duplicate_counts:
+            # Канонический отзыв может быть еще в буфере: сбрасываем его, чтобы
+            # обновление счетчика нашло строку
+            self.writer.flush()
+            self.repository.increment_duplicate_counts(duplicate_counts)
+        return [
+            ReviewResponse(
+                id=review_id,
+                **{
+                    key: row[key]
+                    for key in ("text", "sentiment", "confidence", "created_at")
+                },
+                duplicate_of=row["duplicate_of"],
+            )
+            for review_id, row in zip(ids, rows, strict=True)
+        ]
 
-    def get_reviews(self, sentiment: str = None) -> list[ReviewResponse]:
+    def get_reviews(
+        self,
+        sentiment: str = None,
+        after_id: int | None = None,
+        limit: int | None = None,
+        created_after: datetime | None = None,
+        created_before: datetime | None = None,
+    ) -> list[ReviewResponse]:
         """
-        Get reviews with optional sentiment filtering.
+        Get one page of reviews with optional sentiment filtering.
 
         Args:
             sentiment: Optional sentiment filter
+            after_id: Keyset cursor; return reviews with id greater than this
+            limit: Page size (defaults to the configured page size)
+            created_after: Optional lower bound on creation time (inclusive)
+            created_before: Optional upper bound on creation time (exclusive)
 
         Returns:
-            List of review responses
+            List of review responses ordered by id
         """
-        # Проверяем параметр сентимента
-        if sentiment and sentiment not in ["positive", "negative", "neutral"]:
-            raise ValueError("Invalid sentiment value")
+        # Проверяем параметры
+        validate_sentiment(sentiment)
+        limit = _page_limit(limit)
 
-        # Получаем отзывы из репозитория
-        db_reviews = self.repository.get_all(sentiment_filter=sentiment)
+        # Получаем страницу отзывов из репозитория
+        db_reviews = self.repository.get_page(
+            sentiment_filter=sentiment,
+            after_id=after_id,
+            limit=limit,
+            created_after=created_after,
+            created_before=created_before,
+        )
 
         # Преобразуем в объекты ответа
+        return [_to_response(review) for review in db_reviews]
+
+    def get_reviews_json(
+        self,
+        sentiment: str | None = None,
+        after_id: int | None = None,
+        limit: int | None = None,
+        created_after: datetime | None = None,
+        created_before: datetime | None = None,
+    ) -> tuple[bytes, int | None]:
+        """
+        Get one page of reviews encoded as a JSON array.
+
+        Returns the same document that ``get_reviews`` produces through
+        FastAPI, but column tuples go straight from SQLAlchemy Core to the
+        JSON encoder, without ORM objects or response models.
+
+        Args:
+            sentiment: Optional sentiment filter
+            after_id: Keyset cursor; return reviews with id greater than this
+            limit: Page size (defaults to the configured page size)
+            created_after: Optional lower bound on creation time (inclusive)
+            created_before: Optional upper bound on creation time (exclusive)
+
+        Returns:
+            Tuple of (JSON body, cursor of the next page or None if the page
+            is not full)
+        """
+        validate_sentiment(sentiment)
+        limit = _page_limit(limit)
+
+        rows = self.repository.get_page_rows(
+            sentiment_filter=sentiment,
+            after_id=after_id,
+            limit=limit,
+            created_after=created_after,
+            created_before=created_before,
+        )
+        next_after_id = rows[-1].id if len(rows) == limit else None
+        return encode_rows(rows), next_after_id
+
+    def search_reviews(
+        self,
+        query: str,
+        sentiment: str | None = None,
+        created_after: datetime | None = None,
+        created_before: datetime | None = None,
+        limit: int | None = None,
+        offset: int = 0,
+    ) -> list[ReviewSearchResult]:
+        """
+        Search reviews by text, most relevant first.
+
+        Args:
+            query: Search phrase; every word must occur in a review
+            sentiment: Optional sentiment filter
+            created_after: Optional lower bound on creation time (inclusive)
+            created_before: Optional upper bound on creation time (exclusive)
+            limit: Page size (defaults to the configured page size)
+            offset: Number of best matches to skip
+
+        Returns:
+            List of found reviews with their relevance score
+
+        Raises:
+            ValueError: If the query has no words, the sentiment is invalid or
+                the offset is out of range
+        """
+        rows = self._search(
+            query, sentiment, created_after, created_before, limit, offset
+        )
         return [
-            ReviewResponse(
-                id=review.id,
-                text=review.text,
-                sentiment=review.sentiment,
-                created_at=review.created_at,
+            ReviewSearchResult(
+                id=row.id,
+                text=row.text,
+                sentiment=row.sentiment,
+                confidence=row.confidence,
+                created_at=row.created_at,
+                duplicate_of=row.duplicate_of,
+                score=row.score,
             )
-            for review in db_reviews
+            for row in rows
         ]
 
+    def search_reviews_json(
+        self,
+        query: str,
+        sentiment: str | None = None,
+        created_after: datetime | None = None,
+        created_before: datetime | None = None,
+        limit: int | None = None,
+        offset: int = 0,
+    ) -> tuple[bytes, int | None]:
+        """
+        Search reviews by text and encode the results as a JSON array.
+
+        Same document as ``search_reviews`` produces through FastAPI,
+        encoded from column tuples without response models.
+
+        Args:
+            query: Search phrase; every word must occur in a review
+            sentiment: Optional sentiment filter
+            created_after: Optional lower bound on creation time (inclusive)
+            created_before: Optional upper bound on creation time (exclusive)
+            limit: Page size (defaults to the configured page size)
+            offset: Number of best matches to skip
+
+        Returns:
+            Tuple of (JSON body, offset of the next page or None if the page
+            is not full)
+
+        Raises:
+            ValueError: If the query has no words, the sentiment is invalid or
+                the offset is out of range
+        """
+        limit = _page_limit(limit)
+        rows = self._search(
+            query, sentiment, created_after, created_before, limit, offset
+        )
+        next_offset = offset + limit if len(rows) == limit else None
+        return encode_rows(rows), next_offset
+
+    def _search(
+        self,
+        query: str,
+        sentiment: str | None,
+        created_after: datetime | None,
+        created_before: datetime | None,
+        limit: int | None,
+        offset: int,
+    ) -> list[Row]:
+        """Validate search parameters and run the search."""
+        # Проверяем параметры
+        validate_sentiment(sentiment)
+        match_query = build_match_query(query)
+        if not 0 <= offset <= settings.reviews_search_max_offset:
+            raise ValueError(
+                f"Offset must be between 0 and {settings.reviews_search_max_offset}"
+            )
+
+        return self.repository.search(
+            match_query,
+            sentiment_filter=sentiment,
+            created_after=created_after,
+            created_before=created_before,
+            limit=_page_limit(limit),
+            offset=offset,
+        )
+
+    def iter_reviews_ndjson(
+        self,
+        sentiment: str = None,
+        after_id: int | None = None,
+        created_after: datetime | None = None,
+        created_before: datetime | None = None,
+    ) -> Iterator[bytes]:
+        """
+        Stream reviews as newline-delimited JSON.
+
+        Each line has the fields of a list page item, ``duplicate_of``
+        included.
+
+        Args:
+            sentiment: Optional sentiment filter
+            after_id: Keyset cursor; start after this review id
+            created_after: Optional lower bound on creation time (inclusive)
+            created_before: Optional upper bound on creation time (exclusive)
+
+        Yields:
+            Chunks of NDJSON-encoded reviews
+        """
+        validate_sentiment(sentiment)
+        chunk_size = settings.reviews_stream_chunk_size
+        yield from encode_jsonl(
+            self.repository.iter_rows(
+                sentiment_filter=sentiment,
+                after_id=after_id,
+                chunk_size=chunk_size,
+                created_after=created_after,
+                created_before=created_before,
+                full=True,
+            ),
+            chunk_size,
+        )
+
+    def get_stats(
+        self,
+        bucket: str | None = None,
+        created_after: datetime | None = None,
+        created_before: datetime | None = None,
+    ) -> SentimentStatsResponse:
+        """
+        Get sentiment counts and ratios from the hourly rollup counters.
+
+        Cost depends on the number of hour buckets in the range, not on the
+        number of stored reviews.
+
+        Args:
+            bucket: Optional bucketing: 'hour' or 'day'
+            created_after: Optional lower bound on creation time
+            created_before: Optional upper bound on creation time
+
+        Returns:
+            Totals for the range and, if requested, per-bucket breakdown
+        """
+        if bucket and bucket not in STATS_BUCKETS:
+            raise ValueError("Invalid bucket value")
+
+        totals = dict.fromkeys(VALID_SENTIMENTS, 0)
+        buckets: dict[datetime, dict[str, int]] = {}
+
+        for rollup in self.repository.get_rollups(created_after, created_before):
+            totals[rollup.sentiment] += rollup.count
+            if bucket:
+                start = rollup.bucket_start
+                if bucket == "day":
+                    start = start.replace(hour=0)
+                counts = buckets.setdefault(start, dict.fromkeys(VALID_SENTIMENTS, 0))
+                counts[rollup.sentiment] += rollup.count
+
+        return SentimentStatsResponse(
+            **_summarize_counts(totals),
+            bucket=bucket,
+            buckets=[
+                SentimentStatsBucket(bucket_start=start, **_summarize_counts(counts))
+                for start, counts in buckets.items()
+            ],
+        )
+
     def analyze_sentiment_detailed(self, text: str) -> dict:
         """
         Analyze sentiment with detailed information.
@@ -92,3 +649,47 @@ class ReviewService:
             Detailed sentiment analysis result
         """
         return self.sentiment_service.analyze_sentiment_detailed(text)
+
+    def analyze_sentiment_detailed_many(self, batch: ReviewBatchCreate) -> list[dict]:
+        """
+        Analyze sentiment of many texts with detailed information.
+
+        Args:
+            batch: Reviews to analyze
+
+        Returns:
+            Detailed sentiment analysis result for each review
+        """
+        return self.sentiment_service.analyze_many_detailed(
+            [review.text for review in batch.reviews]
+        )
+
+
+def stream_reviews_ndjson(
+    sentiment: str | None = None,
+    after_id: int | None = None,
+    created_after: datetime | None = None,
+    created_before: datetime | None = None,
+) -> Iterator[bytes]:
+    """
+    Stream reviews as NDJSON using a dedicated database session.
+
+    The streaming response outlives the request-scoped session, so the
+    generator owns its session for the whole stream.
+
+    Args:
+        sentiment: Optional sentiment filter
+        after_id: Keyset cursor; start after this review id
+        created_after: Optional lower bound on creation time (inclusive)
+        created_before: Optional upper bound on creation time (exclusive)
+
+    Yields:
+        Chunks of NDJSON-encoded reviews
+    """
+    db = ReadSessionLocal()
+    try:
+        yield from ReviewService(db).iter_reviews_ndjson(
+            sentiment, after_id, created_after, created_before
+        )
+    finally:
+        db.close()
@@ -1,14 +1,32 @@
 """Sentiment analysis service with ML and dictionary approaches."""
 
+import logging
+import time
 from typing import Any
 
+from app.config import settings
+from app.core.metrics import (
+    DICTIONARY_FALLBACK_TIME,
+    DICTIONARY_PREDICTIONS,
+    FALLBACK_MODEL_UNAVAILABLE,
+    FALLBACK_PREDICTION_ERROR,
+    ML_PREDICTIONS,
+)
+from app.ml.prediction import DEFAULT_PROBABILITIES, SentimentPrediction
+from app.ml.registry import model_registry
 from app.ml.sentiment_model import SentimentMLModel
+from app.ml.training import train_and_store
+from app.services.lexicon import get_lexicon_matcher
+from app.services.prediction_cache import PredictionCache, prediction_cache
+
+logger = logging.getLogger(__name__)
 
 
 class SentimentService:
     """Service for analyzing sentiment of text using ML and dictionary approaches."""
 
-    # Словарь позитивных слов (резервный метод)
+    # Встроенный словарь позитивных слов (резервный метод); заменяется файлом
+    # из настройки sentiment_lexicon_path
     POSITIVE_WORDS: set[str] = {
         "хорош",
         "люблю",
@@ -42,29 +60,55 @@ class SentimentService:
         "ненавижу",
     }
 
-    def __init__(self, use_ml: bool = True):
+    def __init__(
+        self,
+        use_ml: bool = True,
+        ml_model: SentimentMLModel | None = None,
+        cache: PredictionCache | None = None,
+    ):
         """
         Initialize sentiment service.
 
         Args:
             use_ml: Whether to use ML model (True) or dictionary approach (False)
+            ml_model: Model to use; defaults to the process-wide shared model
+            cache: Prediction cache; defaults to the process-wide cache
         """
         self.use_ml = use_ml
-        self.ml_model = None
+        # ML включен в настройках, но модель загрузить не удалось
+        self.ml_unavailable = False
+        self._ml_model = ml_model
+        self.cache = cache or prediction_cache
+        # Словарь компилируется один раз на процесс
+        self.lexicon = get_lexicon_matcher(
+            settings.sentiment_lexicon_path, self.POSITIVE_WORDS, self.NEGATIVE_WORDS
+        )
 
         if self.use_ml:
             try:
-                self.ml_model = SentimentMLModel()
-                # Загружаем или обучаем модель при инициализации
-                if not self.ml_model.is_model_trained():
-                    print("Training ML model for the first time...")
-                    self.ml_model.train()
-                else:
-                    self.ml_model.load_model()
+                # Модель загружается один раз на процесс через реестр
+                if self._ml_model is None:
+                    model_registry.get()
             except Exception as e:
-                print(f"Failed to initialize ML model: {e}")
-                print("Falling back to dictionary approach")
+                logger.warning(
+                    "Failed to initialize ML model: %s; "
+                    "falling back to dictionary approach",
+                    e,
+                )
                 self.use_ml = False
+                self.ml_unavailable = True
+
+    @property
+    def ml_model(self) -> SentimentMLModel | None:
+        """
+        Model in use: the one passed in, or the registry's current model.
+
+        The shared model is looked up on every call so that a retrained
+        version swapped into the registry is picked up immediately.
+        """
+        if not self.use_ml:
+            return None
+        return self._ml_model or model_registry.get()
 
     def analyze_sentiment(self, text: str) -> str:
         """
@@ -76,54 +120,144 @@ class SentimentService:
         Returns:
             Sentiment: 'positive', 'negative', or 'neutral'
         """
-        if not text:
-            return "neutral"
+        return self.predict(text).sentiment
+
+    def analyze_sentiment_detailed(self, text: str) -> dict[str, Any]:
+        """
+        Analyze sentiment with detailed information including probabilities.
+
+        Args:
+            text: Text to analyze
+
+        Returns:
+            Dictionary with sentiment, method used, probabilities and
+            confidence (if ML)
+        """
+        return self.predict(text).to_dict()
+
+    def analyze_many(self, texts: list[str]) -> list[str]:
+        """
+        Analyze sentiment of many texts at once.
+
+        Args:
+            texts: Texts to analyze
+
+        Returns:
+            Sentiment for each text, in input order
+        """
+        return [prediction.sentiment for prediction in self.predict_many(texts)]
+
+    def analyze_many_detailed(self, texts: list[str]) -> list[dict[str, Any]]:
+        """
+        Analyze sentiment of many texts with detailed information.
+
+        Args:
+            texts: Texts to analyze
+
+        Returns:
+            Detailed result for each text, in input order
+        """
+        return [prediction.to_dict() for prediction in self.predict_many(texts)]
+
+    def predict(self, text: str) -> SentimentPrediction:
+        """
+        Predict sentiment of one text.
+
+        Args:
+            text: Text to analyze
+
+        Returns:
+            Prediction with label, probabilities, confidence and method
+        """
+        return self.predict_many([text])[0]
+
+    def predict_many(self, texts: list[str]) -> list[SentimentPrediction]:
+        """
+        Predict sentiment of many texts.
+
+        With ML enabled, cached predictions are reused and the label and the
+        probabilities of the remaining texts come from a single vectorized
+        ``predict_proba`` pass; duplicate texts are predicted once.
+
+        Args:
+            texts: Texts to analyze
 
+        Returns:
+            Prediction for each text, in input order
+        """
         # Пробуем ML подход сначала
-        if self.use_ml and self.ml_model:
+        model = self.ml_model
+        if model:
             try:
-                return self.ml_model.predict(text)
+                predictions = self._predict_many_with_ml(model, texts)
+                ML_PREDICTIONS.inc(len(texts))
+                return predictions
             except Exception as e:
-                print(f"ML prediction failed: {e}, falling back to dictionary")
-                # Переходим к словарному подходу
-                pass
+                logger.warning(
+                    "ML prediction failed: %s, falling back to dictionary", e
+                )
+                FALLBACK_PREDICTION_ERROR.inc(len(texts))
+        elif self.ml_unavailable:
+            FALLBACK_MODEL_UNAVAILABLE.inc(len(texts))
 
         # Словарный подход (резервный)
-        return self._analyze_with_dictionary(text)
+        started = time.perf_counter()
+        sentiments = self._analyze_many_with_dictionary(texts)
+        DICTIONARY_FALLBACK_TIME.observe(time.perf_counter() - started)
+        DICTIONARY_PREDICTIONS.inc(len(texts))
+        return [
+            SentimentPrediction(sentiment=sentiment, method="dictionary")
+            if text
+            else SentimentPrediction.empty()
+            for text, sentiment in zip(texts, sentiments, strict=True)
+        ]
 
-    def analyze_sentiment_detailed(self, text: str) -> dict[str, Any]:
+    def _predict_many_with_ml(
+        self, model: SentimentMLModel, texts: list[str]
+    ) -> list[SentimentPrediction]:
         """
-        Analyze sentiment with detailed information including probabilities.
+        Predict with the ML model, going through the prediction cache.
 
         Args:
-            text: Text to analyze
+            model: Model to predict with
+            texts: Texts to analyze
 
         Returns:
-            Dictionary with sentiment, method used, and probabilities (if ML)
+            Prediction for each text, in input order
         """
-        if not text:
-            return {
-                "sentiment": "neutral",
-                "method": "empty_text",
-                "probabilities": {"positive": 0.33, "negative": 0.33, "neutral": 0.34},
+        version = model.version
+        results: list[SentimentPrediction | None] = [
+            None if text else SentimentPrediction.empty() for text in texts
+        ]
+
+        pending = [i for i, text in enumerate(texts) if text]
+        if version is not None and pending:
+            cached = self.cache.get_many([texts[i] for i in pending], version)
+            for i, prediction in zip(pending, cached, strict=True):
+                results[i] = prediction
+            pending = [i for i in pending if results[i] is None]
+
+        if pending:
+            # Повторы внутри одного пакета отправляем в модель один раз
+            unique_texts = list(dict.fromkeys(texts[i] for i in pending))
+            probabilities = model.predict_proba_many(unique_texts)
+            predicted = {
+                text: SentimentPrediction.from_probabilities(proba)
+                for text, proba in zip(unique_texts, probabilities, strict=True)
             }
+            for i in pending:
+                results[i] = predicted[texts[i]]
 
-        # Пробуем ML подход сначала
-        if self.use_ml and self.ml_model:
-            try:
-                sentiment = self.ml_model.predict(text)
-                probabilities = self.ml_model.predict_proba(text)
-                return {
-                    "sentiment": sentiment,
-                    "method": "machine_learning",
-                    "probabilities": probabilities,
+            if version is not None:
+                # Равномерное распределение означает ошибку модели; его не кэшируем
+                cacheable = {
+                    text: prediction
+                    for text, prediction in predicted.items()
+                    if prediction.probabilities != DEFAULT_PROBABILITIES
                 }
-            except Exception as e:
-                print(f"ML prediction failed: {e}")
+                self.cache.put_many(list(cacheable), list(cacheable.values()), version)
 
-        # Словарный подход
-        sentiment = self._analyze_with_dictionary(text)
-        return {"sentiment": sentiment, "method": "dictionary", "probabilities": None}
+        return results
 
     def _analyze_with_dictionary(self, text: str) -> str:
         """
@@ -135,18 +269,26 @@ class SentimentService:
         Returns:
             Sentiment: 'positive', 'negative', or 'neutral'
         """
-        # Нормализуем текст в нижний регистр
-        normalized_text = text.lower()
+        return self._dictionary_label(*self.lexicon.count(text))
 
-        # Подсчитываем позитивные и негативные слова
-        positive_count = sum(
-            1 for word in self.POSITIVE_WORDS if word in normalized_text
-        )
-        negative_count = sum(
-            1 for word in self.NEGATIVE_WORDS if word in normalized_text
-        )
+    def _analyze_many_with_dictionary(self, texts: list[str]) -> list[str]:
+        """
+        Analyze sentiment of many texts using dictionary approach.
+
+        Args:
+            texts: Texts to analyze
+
+        Returns:
+            Sentiment for each text, in input order
+        """
+        return [
+            self._dictionary_label(positive_count, negative_count)
+            for positive_count, negative_count in self.lexicon.count_many(texts)
+        ]
 
-        # Определяем преобладающий сентимент
+    @staticmethod
+    def _dictionary_label(positive_count: int, negative_count: int) -> str:
+        """Pick the prevailing sentiment from term counts."""
         if positive_count > negative_count:
             return "positive"
         elif negative_count > positive_count:
@@ -156,26 +298,48 @@ class SentimentService:
 
     def retrain_model(self, additional_data: list = None):
         """
-        Retrain the ML model with additional data.
+        Retrain the ML model with additional data in the current thread.
+
+        The new model is stored as a new artifact version, published and
+        swapped into the shared registry. To retrain without blocking, use
+        the admin API, which runs the same training in a separate process.
 
         Args:
             additional_data: List of (text, label) tuples to add to training
         """
         if not self.use_ml:
-            print("ML is disabled, cannot retrain model")
+            logger.warning("ML is disabled, cannot retrain model")
             return
 
-        if not self.ml_model:
-            self.ml_model = SentimentMLModel()
-
         try:
-            if additional_data:
-                from app.data.training_data import TRAINING_DATA
-
-                combined_data = TRAINING_DATA + additional_data
-                self.ml_model.train(combined_data)
-            else:
-                self.ml_model.train()
-            print("Model retrained successfully")
-        except Exception as e:
-            print(f"Failed to retrain model: {e}")
+            result = train_and_store(settings.sentiment_model_dir, additional_data)
+            model = model_registry.reload(result["version"])
+            if self._ml_model is not None:
+                self._ml_model = model
+            # Ключи кэша содержат версию модели; старые записи просто освобождаем
+            self.cache.clear()
+            logger.info("Model retrained successfully: version %s", result["version"])
+        except Exception:
+            logger.exception("Failed to retrain model")
+
+
+# Сервис процесса для вызовов из пула воркеров
+_shared_service: SentimentService | None = None
+
+
+def predict_texts(texts: list[str]) -> list[SentimentPrediction]:
+    """
+    Predict sentiment with the process-wide service.
+
+    Module-level entry point so that it can be sent to a process pool.
+
+    Args:
+        texts: Texts to analyze
+
+    Returns:
+        Prediction for each text, in input order
+    """
+    global _shared_service
+    if _shared_service is None:
+        _shared_service = SentimentService(use_ml=settings.use_ml_sentiment)
+    return _shared_service.predict_many(texts)
@@ -0,0 +1,93 @@
+"""Conversion of user search phrases into FTS5 match expressions."""
+
+import re
+
+WORD_RE = re.compile(r"\w+")
+CYRILLIC_RE = re.compile(r"[а-яё]")
+
+# Возвратные частицы и окончания русских слов (прилагательные, причастия,
+# глаголы, существительные); отсекается самое длинное подходящее окончание
+REFLEXIVE_ENDINGS = ("ся", "сь")
+# fmt: off
+ENDINGS = tuple(
+    sorted(
+        {
+            # прилагательные и причастия
+            "ими", "ыми", "его", "ого", "ему", "ому", "ее", "ие", "ые", "ое",
+            "ей", "ий", "ый", "ой", "ем", "им", "ым", "ом", "их", "ых", "ую",
+            "юю", "ая", "яя", "ою", "ею",
+            # глаголы
+            "ила", "ыла", "ена", "ите", "или", "ыли", "ило", "ыло", "ено",
+            "ует", "уют", "ить", "ыть", "ишь", "ешь", "ете", "йте",
+            "ят", "ит", "ыт", "ил", "ыл", "ен", "ла", "на", "ли", "ло", "но",
+            "ет", "ют", "ны", "ть",
+            # существительные
+            "иями", "ями", "ами", "ией", "иям", "ием", "иях", "ев", "ов", "ье",
+            "ях", "ах", "ям", "ам", "ию", "ью", "ия", "ья",
+            "а", "е", "и", "й", "о", "у", "ы", "ь", "ю", "я",
+        },
+        key=len,
+        reverse=True,
+    )
+)
+# fmt: on
+MIN_STEM_LENGTH = 3
+# Ограничение числа слов в запросе, чтобы один запрос не перебирал весь индекс
+MAX_QUERY_WORDS = 16
+
+
+def stem(word: str) -> str:
+    """
+    Strip the inflection ending of a Russian word.
+
+    A light suffix stripper: it keeps at least ``MIN_STEM_LENGTH`` letters
+    and leaves non-Cyrillic words as they are. Together with a prefix
+    query, "доставка" also finds "доставку" and "доставкой".
+
+    Args:
+        word: Lowercase word
+
+    Returns:
+        Stem of the word
+    """
+    if not CYRILLIC_RE.search(word):
+        return word
+    for ending in REFLEXIVE_ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= MIN_STEM_LENGTH:
+            word = word[: -len(ending)]
+            break
+    for ending in ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= MIN_STEM_LENGTH:
+            return word[: -len(ending)]
+    return word
+
+
+def build_match_query(query: str) -> str:
+    """
+    Build an FTS5 MATCH expression from a free-text search phrase.
+
+    Every word must occur in a review (implicit AND). Words are stemmed and
+    matched by prefix, so different word forms match; words shorter than
+    the minimal stem are matched exactly. FTS5 operators in the input are
+    treated as plain words.
+
+    Args:
+        query: Search phrase entered by a user
+
+    Returns:
+        FTS5 match expression
+
+    Raises:
+        ValueError: If the phrase contains no words
+    """
+    words = WORD_RE.findall(query.lower().replace("ё", "е"))[:MAX_QUERY_WORDS]
+    if not words:
+        raise ValueError("Search query must contain at least one word")
+
+    terms = []
+    for word in dict.fromkeys(words):
+        if len(word) < MIN_STEM_LENGTH:
+            terms.append(f'"{word}"')
+        else:
+            terms.append(f'"{stem(word)}"*')
+    return " AND ".join(terms)
@@ -0,0 +1,435 @@
+"""Write-behind review ingestion with an append-only log and group commit."""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections.abc import Callable
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core.database import SessionLocal
+from app.models.database import Review
+from app.repositories.review_repository import ReviewRepository
+
+logger = logging.getLogger(__name__)
+
+LOG_NAME = "current.log"
+SEGMENT_PATTERN = "segment-*.log"
+
+
+def _encode(review: dict) -> str:
+    """Encode one review as a log line."""
+    return json.dumps(
+        {**review, "created_at": review["created_at"].isoformat()},
+        ensure_ascii=False,
+    )
+
+
+def _decode(line: str) -> dict:
+    """Decode one log line back into review data."""
+    review = json.loads(line)
+    review["created_at"] = datetime.fromisoformat(review["created_at"])
+    return review
+
+
+class WriteBehindWriter:
+    """
+    Acknowledges reviews once they are in a local log and commits in batches.
+
+    ``submit`` assigns ids, appends the reviews to ``current.log`` and
+    returns immediately. A background thread rotates the log into a segment
+    and inserts the buffered reviews with one bulk insert per batch, every
+    ``flush_interval_ms`` or as soon as ``batch_size`` reviews are waiting.
+    A segment is deleted only after its reviews are committed, so segments
+    left over after a crash are replayed by ``recover`` on the next start.
+
+    Reviews are readable through the API only after they are flushed. Ids
+    are allocated in-process, so only one process may write at a time; the
+    log directory is locked to enforce that. A review whose id was taken by
+    another writer in the meantime, and a review that still fails to insert
+    after ``max_retries`` failed flushes, is moved to a dead-letter file in
+    the log directory instead of blocking the reviews behind it.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        log_dir: str,
+        batch_size: int,
+        flush_interval_ms: float,
+        fsync: bool = True,
+        max_retries: int = 10,
+    ):
+        """
+        Initialize writer.
+
+        Args:
+            session_factory: Factory for database sessions
+            log_dir: Directory holding the append-only log and its segments
+            batch_size: Flush as soon as this many reviews are waiting
+            flush_interval_ms: Flush at least this often
+            fsync: Whether to fsync the log before acknowledging a submit
+            max_retries: Failed flushes of a batch before its reviews are
+                inserted one by one and the failing ones are dead-lettered
+        """
+        self.session_factory = session_factory
+        self.log_dir = Path(log_dir)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.fsync = fsync
+        self.max_retries = max_retries
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._log = None
+        self._dir_lock = None
+        self._next_id = 1
+        self._segment_seq = 0
+        self._buffer: list[dict] = []
+        self._segments: list[Path] = []
+        self._retries = 0
+
+        # Метрики
+        self._submitted = 0
+        self._flushed = 0
+        self._batches = 0
+        self._failures = 0
+        self._recovered = 0
+        self._dead_lettered = 0
+        self._last_flush_ms: float | None = None
+
+    def start(self):
+        """Replay unflushed log segments and start the background writer."""
+        if self._thread is not None:
+            return
+
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        self._lock_dir()
+        self.recover()
+
+        self._reserve_ids()
+
+        self._log = open(self.log_dir / LOG_NAME, "a", encoding="utf-8")
+        self._stopping.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="write-behind", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Flush everything that is buffered and stop the background writer."""
+        if self._thread is None:
+            return
+
+        self._stopping.set()
+        self._wakeup.set()
+        self._thread.join()
+        self._thread = None
+        self.flush()
+
+        with self._lock:
+            self._log.close()
+            self._log = None
+        self._dir_lock.close()
+        self._dir_lock = None
+
+    def submit(self, reviews_data: list[dict]) -> list[int]:
+        """
+        Assign ids to reviews and append them to the log.
+
+        Args:
+            reviews_data: Reviews to store (text, sentiment, confidence,
+                created_at)
+
+        Returns:
+            Assigned review ids, in input order
+
+        Raises:
+            RuntimeError: If the writer is not running
+        """
+        with self._lock:
+            if self._log is None:
+                raise RuntimeError("Write-behind writer is not running")
+
+            rows = []
+            for review in reviews_data:
+                rows.append({**review, "id": self._next_id})
+                self._next_id += 1
+
+            self._log.write("".join(_encode(row) + "\n" for row in rows))
+            self._log.flush()
+            if self.fsync:
+                os.fsync(self._log.fileno())
+
+            self._buffer.extend(rows)
+            self._submitted += len(rows)
+            if len(self._buffer) >= self.batch_size:
+                self._wakeup.set()
+
+        return [row["id"] for row in rows]
+
+    def flush(self):
+        """Commit all buffered reviews to the database."""
+        with self._flush_lock:
+            with self._lock:
+                if not self._buffer:
+                    return
+                rows, self._buffer = self._buffer, []
+                segments = [*self._segments, self._rotate()]
+                self._segments = []
+
+            started = time.perf_counter()
+            try:
+                if self._retries >= self.max_retries:
+                    # Пакет раз за разом не записывается: вставляем по одному
+                    # отзыву, чтобы отложить только те, что не вставляются
+                    self._insert_each(rows)
+                else:
+                    # После сбоя часть пакета могла уже быть закоммичена
+                    self._insert_all(rows, skip_stored=self._retries > 0)
+            except Exception as e:
+                logger.warning("Write-behind flush failed: %s", e)
+                self._failures += 1
+                self._retries += 1
+                # Возвращаем пакет в начало буфера для повторной попытки
+                with self._lock:
+                    self._buffer = rows + self._buffer
+                    self._segments = segments + self._segments
+                return
+
+            self._retries = 0
+
+            for segment in segments:
+                segment.unlink(missing_ok=True)
+
+            self._flushed += len(rows)
+            self._batches += 1
+            self._last_flush_ms = (time.perf_counter() - started) * 1000
+
+    def recover(self):
+        """
+        Insert reviews from log segments left by a previous run.
+
+        Reviews without ids (replayed dead letters of taken ids) get new
+        ones.
+        """
+        self._reserve_ids()
+        paths = sorted(self.log_dir.glob(SEGMENT_PATTERN))
+        current = self.log_dir / LOG_NAME
+        if current.exists():
+            paths.append(current)
+
+        for path in paths:
+            with open(path, encoding="utf-8") as log:
+                # Последняя строка могла быть записана не полностью при сбое
+                rows = []
+                for line in log:
+                    try:
+                        rows.append(_decode(line))
+                    except (ValueError, KeyError):
+                        continue
+            for row in rows:
+                if "id" not in row:
+                    row["id"] = self._next_id
+                    self._next_id += 1
+
+            # Отзывы, закоммиченные до сбоя, повторно не вставляем
+            self._recovered += self._insert_all(rows, skip_stored=True)
+            path.unlink()
+
+    def _lock_dir(self):
+        """
+        Take an exclusive lock on the log directory.
+
+        Raises:
+            RuntimeError: If another process already writes to this directory
+        """
+        self._dir_lock = open(self.log_dir / "writer.lock", "w")
+        try:
+            import fcntl
+        except ImportError:
+            # На Windows блокировка недоступна
+            return
+
+        try:
+            fcntl.flock(self._dir_lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            self._dir_lock.close()
+            self._dir_lock = None
+            raise RuntimeError(
+                f"Write-behind log {self.log_dir} is used by another process; "
+                "write-behind mode requires a single writer process"
+            )
+
+    def _reserve_ids(self):
+        """Continue id allocation after the highest id in the database."""
+        with self.session_factory() as db:
+            max_id = db.scalar(select(func.max(Review.id))) or 0
+        with self._lock:
+            self._next_id = max(self._next_id, max_id + 1)
+
+    def _not_stored(self, rows: list[dict]) -> list[dict]:
+        """
+        Filter out reviews that are already in the database.
+
+        A review counts as stored only if the row with its id has the same
+        text and creation time. A row with other content means that another
+        writer took the id: such reviews are moved to a dead-letter file,
+        and id allocation continues after the highest stored id.
+
+        Args:
+            rows: Reviews with assigned ids
+
+        Returns:
+            Reviews that still have to be inserted
+        """
+        if not rows:
+            return []
+
+        with self.session_factory() as db:
+            stored = {
+                review_id: (text, created_at)
+                for review_id, text, created_at in db.execute(
+                    select(Review.id, Review.text, Review.created_at).where(
+                        Review.id.in_([row["id"] for row in rows])
+                    )
+                )
+            }
+        missing, collisions = [], []
+        for row in rows:
+            content = stored.get(row["id"])
+            if content is None:
+                missing.append(row)
+            elif content != (row["text"], row["created_at"]):
+                collisions.append(row)
+        if collisions:
+            self._dead_letter(
+                collisions, "ids are taken by another writer", keep_ids=False
+            )
+            self._reserve_ids()
+        return missing
+
+    def _insert_each(self, rows: list[dict]):
+        """Insert reviews one by one, dead-lettering those that fail."""
+        for row in rows:
+            try:
+                self._insert_all([row], skip_stored=True)
+            except Exception as e:
+                self._dead_letter([row], str(e))
+
+    def _dead_letter(self, rows: list[dict], reason: str, keep_ids: bool = True):
+        """
+        Move reviews that cannot be inserted to a dead-letter file.
+
+        The file has the log format; renaming it to ``segment-*.log`` makes
+        the next start replay it.
+
+        Args:
+            rows: Reviews to set aside
+            reason: Why they cannot be inserted
+            keep_ids: Whether to keep the ids; reviews written without ids
+                get new ones when replayed
+        """
+        self._segment_seq += 1
+        path = self.log_dir / f"dead-letter-{time.time_ns()}-{self._segment_seq}.log"
+        with open(path, "w", encoding="utf-8") as log:
+            for row in rows:
+                if not keep_ids:
+                    row = {key: value for key, value in row.items() if key != "id"}
+                log.write(_encode(row) + "\n")
+            log.flush()
+            os.fsync(log.fileno())
+        self._dead_lettered += len(rows)
+        logger.error(
+            "Moved %d reviews (ids %s) to %s: %s",
+            len(rows),
+            ", ".join(str(row["id"]) for row in rows),
+            path.name,
+            reason,
+        )
+
+    def _rotate(self) -> Path:
+        """Move the current log into a new segment and reopen it empty."""
+        self._log.close()
+        self._segment_seq += 1
+        segment = self.log_dir / f"segment-{time.time_ns()}-{self._segment_seq}.log"
+        os.replace(self.log_dir / LOG_NAME, segment)
+        self._log = open(self.log_dir / LOG_NAME, "a", encoding="utf-8")
+        return segment
+
+    def _insert_all(self, rows: list[dict], skip_stored: bool = False) -> int:
+        """
+        Insert reviews with explicit ids, one transaction per batch.
+
+        Args:
+            rows: Reviews to insert
+            skip_stored: Whether to skip reviews whose ids are already stored
+
+        Returns:
+            Number of inserted reviews
+        """
+        inserted = 0
+        for start in range(0, len(rows), self.batch_size):
+            batch = rows[start : start + self.batch_size]
+            if skip_stored:
+                batch = self._not_stored(batch)
+            if batch:
+                with self.session_factory() as db:
+                    ReviewRepository(db).create_many(batch)
+                inserted += len(batch)
+        return inserted
+
+    def _run(self):
+        """Background loop flushing the buffer on size or time."""
+        while not self._stopping.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def is_running(self) -> bool:
+        """Check whether the background writer is running."""
+        return self._thread is not None
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Describe writer state for health checks.
+
+        Returns:
+            Dictionary with queue depth and flush counters
+        """
+        return {
+            "running": self.is_running(),
+            "pending": len(self._buffer),
+            "submitted": self._submitted,
+            "flushed": self._flushed,
+            "batches": self._batches,
+            "failures": self._failures,
+            "recovered": self._recovered,
+            "dead_lettered": self._dead_lettered,
+            "last_flush_ms": (
+                round(self._last_flush_ms, 3)
+                if self._last_flush_ms is not None
+                else None
+            ),
+        }
+
+
+# Общий писатель отложенной записи (используется, если включен в настройках)
+review_writer = WriteBehindWriter(
+    session_factory=SessionLocal,
+    log_dir=settings.write_behind_log_dir,
+    batch_size=settings.write_behind_batch_size,
+    flush_interval_ms=settings.write_behind_flush_interval_ms,
+    fsync=settings.write_behind_fsync,
+    max_retries=settings.write_behind_max_retries,
+)
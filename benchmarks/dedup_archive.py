@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""Duplicate detection of reviews whose canonical review was archived.
+
+For every duplicate policy a review is stored, archived and then sent
+again, both by a process that remembers the archived review and by a fresh
+one. Archived reviews are not duplicate targets, so in both cases the copy
+must become a new canonical review, and the next copy must be handled by
+the policy against it. The script exits with status 1 on any difference.
+
+Usage:
+    python -m benchmarks.dedup_archive
+"""
+
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+TEXT = (
+    "Доставка была очень быстрой, товар пришел целым и полностью "
+    "соответствует описанию на сайте"
+)
+NEAR = TEXT + "!!! Спасибо"
+NOW = datetime(2026, 10, 18, 12, 0, 0)
+
+
+def run_case(tmp: Path, policy: str, warm: bool) -> list:
+    """
+    Store, archive and resend a review; return what every step produced.
+
+    Args:
+        tmp: Directory for the database and the archive
+        policy: Duplicate policy
+        warm: Whether the deduplicator that archived the review is reused
+            (otherwise a fresh one stands for another process)
+    """
+    from sqlalchemy import update
+    from sqlalchemy.orm import sessionmaker
+
+    from app.core.database import build_engine
+    from app.core.exceptions import DuplicateReviewException
+    from app.core.migrations import run_migrations
+    from app.ml.prediction import SentimentPrediction
+    from app.models.database import Review
+    from app.repositories.review_archive import review_archive
+    from app.services.dedup import ReviewDeduplicator
+    from app.services.retention import RetentionWorker
+    from app.services.review_service import ReviewService
+
+    # Репозиторий читает глобальный архив: переводим его в каталог случая
+    # (с пустым кэшем индексов)
+    review_archive.__init__(str(tmp / "archive"))
+    engine = build_engine(f"sqlite:///{tmp / f'{policy}-{warm}.db'}")
+    run_migrations(engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    prediction = SentimentPrediction(
+        sentiment="positive", method="rule_based", confidence=0.9
+    )
+
+    def make_deduplicator() -> ReviewDeduplicator:
+        return ReviewDeduplicator(
+            policy, near_duplicates=True, threshold=0.8, max_indexed_reviews=1000
+        )
+
+    def save(deduplicator: ReviewDeduplicator, text: str):
+        with Session() as db:
+            service = ReviewService(db)
+            service.deduplicator = deduplicator
+            try:
+                review = service.save_review(text, prediction)
+            except DuplicateReviewException as e:
+                return ["rejected", e.duplicate_of]
+            return [review.id, review.duplicate_of]
+
+    deduplicator = make_deduplicator()
+    steps = [save(deduplicator, TEXT), save(deduplicator, "другой отзыв о магазине")]
+    with Session() as db:
+        db.execute(
+            update(Review)
+            .where(Review.id == steps[0][0])
+            .values(created_at=NOW - timedelta(days=30))
+        )
+        db.commit()
+    worker = RetentionWorker(
+        review_archive, max_age_days=7, interval_seconds=60, batch_size=100
+    )
+    steps.append(worker.run_once(Session, now=NOW)["archived"])
+
+    if not warm:
+        deduplicator = make_deduplicator()
+    steps += [save(deduplicator, TEXT), save(deduplicator, NEAR)]
+    steps.append(save(deduplicator, TEXT.upper()))
+    with Session() as db:
+        steps.append(
+            [
+                (review.id, review.duplicate_of, review.duplicate_count)
+                for review in db.query(Review).order_by(Review.id)
+            ]
+        )
+    engine.dispose()
+    return steps
+
+
+def main():
+    """Run every policy with a warm and a fresh deduplicator and compare."""
+    failures = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["SENTIMENT_MODEL_DIR"] = os.path.join(tmp, "models")
+        os.environ["USE_ML_SENTIMENT"] = "false"
+        for policy in ("reject", "link", "count"):
+            results = []
+            for warm in (True, False):
+                directory = Path(tmp) / f"{policy}-{warm}"
+                directory.mkdir()
+                results.append(run_case(directory, policy, warm))
+
+            warm_steps, fresh_steps = results
+            # Копия архивного отзыва становится новым каноническим (id 3),
+            # а следующие копии обрабатываются политикой относительно него
+            resent = warm_steps[3]
+            ok = (
+                warm_steps == fresh_steps and warm_steps[2] == 1 and resent == [3, None]
+            )
+            failures += not ok
+            print(f"{policy:<7} {'ok' if ok else 'MISMATCH'}")
+            for name, steps in (("warm", warm_steps), ("fresh", fresh_steps)):
+                print(f"  {name:<6} {steps}")
+
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
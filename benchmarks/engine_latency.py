@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""Single-review and batch latency of the array engine versus the sklearn pipeline.
+
+Before timing, the engine is checked against the pipeline and, with a tiny
+term memo that is replaced constantly, against itself from several threads.
+
+Usage:
+    python -m benchmarks.engine_latency --repeat 2000 --batch 1000
+"""
+
+import argparse
+import statistics
+import sys
+import threading
+import time
+
+import joblib
+import numpy as np
+
+from app.data.training_data import TRAINING_DATA
+from app.ml.engine import TfidfNBEngine, export_pipeline
+from app.ml.sentiment_model import DEFAULT_MODEL_PATH
+
+SAMPLE_REVIEW = "Отличный сервис, очень понравилось обслуживание и быстрая доставка"
+
+
+def _median_us(fn, repeat: int) -> float:
+    """Run fn repeatedly and return the median call time in microseconds."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1e6
+
+
+def check_concurrent_parity(
+    arrays: dict, params: dict, texts: list[str], threads: int
+) -> int:
+    """
+    Score texts from several threads sharing one engine with a tiny memo.
+
+    Args:
+        arrays: Engine arrays
+        params: Engine parameters
+        texts: Texts to score
+        threads: Number of concurrent threads
+
+    Returns:
+        Number of predictions that differ from single-threaded scoring
+    """
+    expected = TfidfNBEngine(arrays, params).predict_proba_many(texts)
+    # Маленькая память термов переполняется почти на каждом вызове
+    shared = TfidfNBEngine(arrays, params, lookup_cache_size=64)
+    mismatches = [0] * threads
+    barrier = threading.Barrier(threads)
+
+    def differs(actual: list[dict], reference: list[dict]) -> bool:
+        # Одиночный и пакетный пути суммируют в разном порядке
+        return any(
+            abs(row[label] - expected_row[label]) > 1e-9
+            for row, expected_row in zip(actual, reference, strict=True)
+            for label in row
+        )
+
+    def worker(index: int):
+        barrier.wait()
+        for position in range(index, len(texts), threads):
+            reference = expected[position : position + 3]
+            if differs([shared.predict_proba(texts[position])], reference[:1]):
+                mismatches[index] += 1
+            if differs(
+                shared.predict_proba_many(texts[position : position + 3]), reference
+            ):
+                mismatches[index] += 1
+
+    workers = [
+        threading.Thread(target=worker, args=(index,)) for index in range(threads)
+    ]
+    # Частое переключение потоков, чтобы гонки проявлялись
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+    return sum(mismatches)
+
+
+def main():
+    """Compare latency and check that both give the same probabilities."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+
+    pipeline = joblib.load(DEFAULT_MODEL_PATH)
+    arrays, params = export_pipeline(pipeline)
+    engine = TfidfNBEngine(arrays, params)
+    classes = list(pipeline.classes_)
+
+    texts = [text for text, _ in TRAINING_DATA]
+    batch = [texts[i % len(texts)] + f" {i}" for i in range(args.batch)]
+
+    expected = pipeline.predict_proba(batch)
+    actual = np.array(
+        [[row[label] for label in classes] for row in engine.predict_proba_many(batch)]
+    )
+    print(f"max abs difference: {np.max(np.abs(expected - actual)):.3g}")
+    mismatches = check_concurrent_parity(arrays, params, batch, args.threads)
+    print(f"concurrent mismatches ({args.threads} threads): {mismatches}")
+    if mismatches:
+        sys.exit("Concurrent predictions differ from single-threaded ones")
+
+    single_sklearn = _median_us(
+        lambda: pipeline.predict_proba([SAMPLE_REVIEW]), args.repeat
+    )
+    single_engine = _median_us(lambda: engine.predict_proba(SAMPLE_REVIEW), args.repeat)
+    batch_sklearn = _median_us(lambda: pipeline.predict_proba(batch), 20)
+    batch_engine = _median_us(lambda: engine.predict_proba_many(batch), 20)
+
+    print(f"{'case':<24} {'sklearn, us':>12} {'engine, us':>12} {'speedup':>8}")
+    for case, sklearn_us, engine_us in (
+        ("single review", single_sklearn, single_engine),
+        (f"batch of {args.batch}", batch_sklearn, batch_engine),
+    ):
+        print(
+            f"{case:<24} {sklearn_us:>12.1f} {engine_us:>12.1f} "
+            f"{sklearn_us / engine_us:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""Cold-start budget check for the API process.
+
+Imports ``app.main`` and loads the serving model in fresh interpreters
+under ``python -X importtime`` and exits with status 1 if the import or the
+model load exceeds its budget, or if a training-only module (sklearn,
+joblib, the training data) ends up on the serving path.
+
+Usage:
+    python -m benchmarks.import_budget --import-budget-ms 1500 --load-budget-ms 300
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+# Модули, которые нужны только для обучения и не должны импортироваться сервисом
+FORBIDDEN_MODULES = ("sklearn", "scipy", "joblib", "app.data.training_data")
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+from app.ml.registry import model_registry
+model_registry.load()
+loaded = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "load_ms": (loaded - imported) * 1000,
+    "modules": sorted(sys.modules),
+}))
+"""
+
+
+def _run_probe(env: dict[str, str]) -> tuple[dict, list[tuple[int, str]]]:
+    """
+    Run the probe in a fresh interpreter.
+
+    Returns:
+        Tuple of (probe result, (self time in us, module) for every import)
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    imports = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, _, module = line[len("import time:") :].split("|")
+        if self_us.strip().isdigit():
+            imports.append((int(self_us), module.strip()))
+    return json.loads(completed.stdout.splitlines()[-1]), imports
+
+
+def main():
+    """Measure cold start and fail when it goes over budget."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--import-budget-ms", type=float, default=1500.0)
+    parser.add_argument("--load-budget-ms", type=float, default=300.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        env = {
+            **os.environ,
+            "SENTIMENT_MODEL_DIR": os.path.join(tmp_dir, "models"),
+            "DATABASE_URL": f"sqlite:///{os.path.join(tmp_dir, 'reviews.db')}",
+        }
+        # Первый запуск публикует встроенную модель; его не измеряем
+        _run_probe(env)
+        runs = [_run_probe(env) for _ in range(args.repeat)]
+
+    result, imports = min(runs, key=lambda run: run[0]["import_ms"])
+    import_ms = result["import_ms"]
+    load_ms = min(run[0]["load_ms"] for run in runs)
+
+    print(f"import app.main: {import_ms:8.1f} ms (budget {args.import_budget_ms})")
+    print(f"model load:      {load_ms:8.1f} ms (budget {args.load_budget_ms})")
+    print("\nslowest imports (self time):")
+    for self_us, module in sorted(imports, reverse=True)[: args.top]:
+        print(f"  {self_us / 1000:8.1f} ms  {module}")
+
+    failures = []
+    if import_ms > args.import_budget_ms:
+        failures.append(f"import took {import_ms:.1f} ms")
+    if load_ms > args.load_budget_ms:
+        failures.append(f"model load took {load_ms:.1f} ms")
+    forbidden = [
+        module
+        for module in result["modules"]
+        if module.split(".")[0] in FORBIDDEN_MODULES or module in FORBIDDEN_MODULES
+    ]
+    if forbidden:
+        failures.append(f"training-only modules imported: {', '.join(forbidden[:5])}")
+
+    if failures:
+        print("\nFAIL: " + "; ".join(failures))
+        sys.exit(1)
+    print("\nOK")
+
+
+if __name__ == "__main__":
+    main()
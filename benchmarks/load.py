@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""In-process load generator for the ASGI application.
+
+Replays texts from a JSONL file (``requests.jsonl`` by default; the text
+is taken from the ``text``, ``body`` or ``title`` field) as a mix of API
+calls, sent by concurrent clients straight into the ASGI app through
+``httpx.ASGITransport``, so no network or server process is involved.
+Reports throughput and p50/p95/p99 latency per call type and overall.
+
+By default the app runs against a temporary database and model directory.
+
+Usage:
+    python -m benchmarks.load --concurrency 32 --requests 5000
+    python -m benchmarks.load --mix create=1,analyze=1 --duration 30 \\
+        --save-baseline benchmarks/baselines/load.json
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from collections.abc import Iterator
+from pathlib import Path
+
+from benchmarks.report import add_baseline_arguments, finish, summarize
+
+TEXT_FIELDS = ("text", "body", "title")
+DEFAULT_MIX = "create=4,analyze=4,batch=1,list=1,stats=1"
+BATCH_SIZE = 10
+
+
+def load_texts(path: Path, limit: int) -> list[str]:
+    """Read up to ``limit`` texts from a JSONL file."""
+    texts = []
+    with open(path, encoding="utf-8") as source:
+        for line in source:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if not isinstance(record, dict):
+                continue
+            text = next(
+                (
+                    record[field]
+                    for field in TEXT_FIELDS
+                    if isinstance(record.get(field), str)
+                ),
+                "",
+            )
+            if text.strip():
+                texts.append(text)
+            if len(texts) >= limit:
+                break
+    return texts
+
+
+def parse_mix(value: str) -> dict[str, int]:
+    """Parse 'kind=weight,...' into a dict."""
+    mix = {}
+    for part in value.split(","):
+        kind, _, weight = part.partition("=")
+        mix[kind.strip()] = int(weight or 1)
+    return mix
+
+
+def replay(texts: list[str], mix: dict[str, int], prefix: str) -> Iterator[tuple]:
+    """
+    Generate an endless stream of API calls over the texts.
+
+    Yields:
+        Tuple of (call type, HTTP method, path, JSON body or None)
+    """
+    kinds, weights = zip(*mix.items(), strict=True)
+    cycle = itertools.cycle(texts)
+    while True:
+        kind = random.choices(kinds, weights)[0]
+        if kind == "create":
+            yield kind, "POST", f"{prefix}/reviews", {"text": next(cycle)}
+        elif kind == "analyze":
+            yield kind, "POST", f"{prefix}/reviews/analyze", {"text": next(cycle)}
+        elif kind == "batch":
+            reviews = [{"text": next(cycle)} for _ in range(BATCH_SIZE)]
+            yield kind, "POST", f"{prefix}/reviews/batch", {"reviews": reviews}
+        elif kind == "list":
+            yield kind, "GET", f"{prefix}/reviews?limit=100", None
+        elif kind == "stats":
+            yield kind, "GET", f"{prefix}/reviews/stats", None
+        else:
+            raise ValueError(f"Unknown call type in mix: {kind}")
+
+
+async def run_load(
+    app, calls: Iterator[tuple], concurrency: int, total: int, duration: float
+) -> tuple[dict[str, list[float]], dict[str, Counter], float]:
+    """
+    Send calls from concurrent clients until the request or time budget ends.
+
+    Returns:
+        Tuple of (latencies per call type, status codes per call type,
+        elapsed seconds)
+    """
+    import httpx
+
+    latencies: dict[str, list[float]] = defaultdict(list)
+    statuses: dict[str, Counter] = defaultdict(Counter)
+    sent = itertools.count()
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        started = time.perf_counter()
+        deadline = started + duration if duration else None
+
+        async def client_loop():
+            while next(sent) < total or (total == 0 and deadline):
+                if deadline and time.perf_counter() >= deadline:
+                    return
+                kind, method, url, body = next(calls)
+                call_started = time.perf_counter()
+                response = await client.request(method, url, json=body)
+                latencies[kind].append(time.perf_counter() - call_started)
+                statuses[kind][response.status_code] += 1
+
+        await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return latencies, statuses, elapsed
+
+
+async def run(args, texts: list[str]) -> tuple[dict, dict, float]:
+    """Start the app, warm it up, run the load and shut the app down."""
+    from app.config import settings
+    from app.main import app
+
+    calls = replay(texts, parse_mix(args.mix), settings.api_v1_prefix)
+    await app.router.startup()
+    try:
+        # Прогрев: загрузка модели, первые подключения к БД
+        await run_load(app, calls, min(args.concurrency, 4), args.warmup, 0)
+        return await run_load(
+            app, calls, args.concurrency, args.requests, args.duration
+        )
+    finally:
+        await app.router.shutdown()
+
+
+def main():
+    """Run the load and report latency percentiles."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--file", type=Path, default=Path("requests.jsonl"))
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument(
+        "--requests", type=int, default=2000, help="total calls; 0 to use --duration"
+    )
+    parser.add_argument("--duration", type=float, default=0.0, help="seconds")
+    parser.add_argument("--warmup", type=int, default=100)
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"default: {DEFAULT_MIX}")
+    parser.add_argument("--max-texts", type=int, default=100000)
+    parser.add_argument(
+        "--use-configured-database",
+        action="store_true",
+        help="run against DATABASE_URL and SENTIMENT_MODEL_DIR instead of temp copies",
+    )
+    add_baseline_arguments(parser)
+    args = parser.parse_args()
+    if not args.requests and not args.duration:
+        parser.error("either --requests or --duration is required")
+
+    texts = load_texts(args.file, args.max_texts)
+    if not texts:
+        sys.exit(f"No texts found in {args.file}")
+    random.seed(0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if not args.use_configured_database:
+            # Настройки читаются при импорте приложения, поэтому задаем их заранее
+            os.environ["DATABASE_URL"] = f"sqlite:///{Path(tmp) / 'load.db'}"
+            os.environ["SENTIMENT_MODEL_DIR"] = str(Path(tmp) / "models")
+            os.environ["WRITE_BEHIND_LOG_DIR"] = str(Path(tmp) / "write_behind")
+        latencies, statuses, elapsed = asyncio.run(run(args, texts))
+
+    results = {
+        f"load.{kind}": summarize(values, elapsed)
+        for kind, values in sorted(latencies.items())
+    }
+    results["load.all"] = summarize(
+        [value for values in latencies.values() for value in values], elapsed
+    )
+
+    print(
+        f"{results['load.all']['n']} calls from {args.concurrency} clients "
+        f"in {elapsed:.1f} s, {len(texts)} distinct texts\n"
+    )
+    errors = {
+        kind: {code: count for code, count in codes.items() if code >= 400}
+        for kind, codes in statuses.items()
+    }
+    for kind, codes in sorted(errors.items()):
+        if codes:
+            print(f"errors in {kind}: {codes}")
+
+    finish(
+        args,
+        "load",
+        results,
+        {
+            "file": str(args.file),
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "duration": args.duration,
+            "mix": args.mix,
+        },
+    )
+
+
+if __name__ == "__main__":
+    main()
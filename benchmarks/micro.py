@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""Micro-benchmarks of sentiment analysis and repository operations.
+
+Measures the dictionary analyzer, the serving model's predict and
+predict_proba (single text and batch), and repository create, create_many,
+get_page and get_all on tables of growing size. Results can be saved as a
+baseline and compared against one; the script exits with status 1 when a
+compared metric regressed beyond the tolerance.
+
+Usage:
+    python -m benchmarks.micro --save-baseline benchmarks/baselines/micro.json
+    python -m benchmarks.micro --compare benchmarks/baselines/micro.json
+"""
+
+import argparse
+import itertools
+import os
+import random
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks.report import add_baseline_arguments, finish, measure
+
+SENTIMENTS = ("positive", "negative", "neutral")
+
+
+def _review(i: int) -> dict:
+    """Build synthetic review data."""
+    return {
+        "text": f"Отзыв номер {i}, все отлично работает",
+        "sentiment": SENTIMENTS[i % 3],
+        "confidence": 0.5,
+        "created_at": datetime.utcnow(),
+    }
+
+
+def bench_sentiment(texts: list[str], repeat: int, batch_size: int) -> dict:
+    """Benchmark the dictionary analyzer and the serving model."""
+    from app.ml.registry import model_registry
+    from app.services.sentiment_service import SentimentService
+
+    results = {}
+    service = SentimentService(use_ml=False)
+    cycle = itertools.cycle(texts)
+    results["dictionary.analyze"] = measure(
+        lambda: service._analyze_with_dictionary(next(cycle)), repeat
+    )
+
+    model = model_registry.load()
+    results["ml.predict"] = measure(lambda: model.predict(next(cycle)), repeat)
+    results["ml.predict_proba"] = measure(
+        lambda: model.predict_proba(next(cycle)), repeat
+    )
+    batch = [next(cycle) for _ in range(batch_size)]
+    results[f"ml.predict_proba_many[{batch_size}]"] = measure(
+        lambda: model.predict_proba_many(batch), max(10, repeat // 100)
+    )
+    return results
+
+
+def bench_repository(
+    table_sizes: list[int], repeat: int, batch_size: int, profile: str
+) -> dict:
+    """Benchmark repository operations on tables of growing size."""
+    from sqlalchemy.orm import sessionmaker
+
+    from app.core.database import build_engine
+    from app.core.migrations import run_migrations
+    from app.repositories.review_repository import ReviewRepository
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = build_engine(f"sqlite:///{Path(tmp) / 'bench.db'}", profile)
+        run_migrations(engine)
+        Session = sessionmaker(bind=engine, autoflush=False)
+
+        rows = 0
+        counter = itertools.count(1_000_000_000)
+        with Session() as db:
+            repository = ReviewRepository(db)
+            for size in sorted(table_sizes):
+                # Дозаполняем таблицу до нужного размера
+                while rows < size:
+                    chunk = min(5000, size - rows)
+                    repository.create_many([_review(rows + i) for i in range(chunk)])
+                    rows += chunk
+
+                results[f"repository.create@{size}"] = measure(
+                    lambda: repository.create(_review(next(counter))), repeat
+                )
+                results[f"repository.create_many[{batch_size}]@{size}"] = measure(
+                    lambda: repository.create_many(
+                        [_review(next(counter)) for _ in range(batch_size)]
+                    ),
+                    max(10, repeat // 10),
+                )
+                results[f"repository.get_page@{size}"] = measure(
+                    lambda size=size: repository.get_page(
+                        sentiment_filter=random.choice(SENTIMENTS),
+                        after_id=random.randint(0, size),
+                        limit=100,
+                    ),
+                    repeat,
+                )
+                results[f"repository.get_all@{size}"] = measure(
+                    repository.get_all, max(3, repeat // 200), warmup=1
+                )
+                # Не держим объекты get_all в identity map между измерениями
+                db.expunge_all()
+        engine.dispose()
+    return results
+
+
+def main():
+    """Run the micro-benchmarks."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument(
+        "--table-sizes",
+        type=lambda value: [int(size) for size in value.split(",")],
+        default=[1000, 10000, 100000],
+    )
+    parser.add_argument("--profile", default="default", help="database profile")
+    parser.add_argument("--skip-repository", action="store_true")
+    add_baseline_arguments(parser)
+    args = parser.parse_args()
+
+    random.seed(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        # Модель публикуется во временный каталог, а не в ./models
+        os.environ["SENTIMENT_MODEL_DIR"] = os.path.join(tmp, "models")
+        from app.data.training_data import TRAINING_DATA
+
+        texts = [text for text, _ in TRAINING_DATA]
+        results = bench_sentiment(texts, args.repeat, args.batch_size)
+
+    if not args.skip_repository:
+        results.update(
+            bench_repository(
+                args.table_sizes, args.repeat, args.batch_size, args.profile
+            )
+        )
+
+    finish(
+        args,
+        "micro",
+        results,
+        {
+            "repeat": args.repeat,
+            "batch_size": args.batch_size,
+            "table_sizes": args.table_sizes,
+            "profile": args.profile,
+        },
+    )
+
+
+if __name__ == "__main__":
+    main()
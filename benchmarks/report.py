@@ -0,0 +1,151 @@
+"""Latency summaries and baseline files shared by the benchmarks."""
+
+import json
+import platform
+import sys
+import time
+from pathlib import Path
+
+# Метрики, по которым сравнение с базовой линией ищет регрессии,
+# и направление: True — чем больше, тем лучше
+COMPARED_METRICS = {"ops_per_sec": True, "p50_ms": False, "p95_ms": False}
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(
+        len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1)
+    )
+    return sorted_values[index]
+
+
+def summarize(latencies: list[float], elapsed: float | None = None) -> dict:
+    """
+    Summarize call latencies.
+
+    Args:
+        latencies: Latency of every call in seconds
+        elapsed: Wall time of the run; defaults to the sum of latencies
+            (sequential calls)
+
+    Returns:
+        Number of calls, throughput and p50/p95/p99 latency in milliseconds
+    """
+    values = sorted(latencies)
+    elapsed = elapsed if elapsed is not None else sum(values)
+    return {
+        "n": len(values),
+        "ops_per_sec": round(len(values) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(values, 0.50) * 1000, 4),
+        "p95_ms": round(percentile(values, 0.95) * 1000, 4),
+        "p99_ms": round(percentile(values, 0.99) * 1000, 4),
+    }
+
+
+def measure(fn, repeat: int, warmup: int = 10) -> dict:
+    """Call fn sequentially and summarize the latencies."""
+    for _ in range(warmup):
+        fn()
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - started)
+    return summarize(latencies)
+
+
+def print_results(results: dict[str, dict]):
+    """Print a table of summaries."""
+    width = max([len(name) for name in results] + [10])
+    print(
+        f"{'benchmark':<{width}} {'n':>8} {'ops/s':>12} "
+        f"{'p50, ms':>10} {'p95, ms':>10} {'p99, ms':>10}"
+    )
+    for name, result in results.items():
+        print(
+            f"{name:<{width}} {result['n']:>8} {result['ops_per_sec']:>12,.1f} "
+            f"{result['p50_ms']:>10.3f} {result['p95_ms']:>10.3f} "
+            f"{result['p99_ms']:>10.3f}"
+        )
+
+
+def save_baseline(path: Path, suite: str, results: dict[str, dict], params: dict):
+    """Write results to a baseline JSON file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    baseline = {
+        "suite": suite,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "params": params,
+        "results": results,
+    }
+    path.write_text(json.dumps(baseline, indent=2, ensure_ascii=False) + "\n")
+    print(f"\nBaseline saved to {path}")
+
+
+def compare_with_baseline(
+    path: Path, results: dict[str, dict], tolerance: float
+) -> list[str]:
+    """
+    Compare results with a baseline file and print the differences.
+
+    Args:
+        path: Baseline JSON file
+        results: Current results
+        tolerance: Allowed relative slowdown, e.g. 0.1 for 10%
+
+    Returns:
+        Descriptions of the metrics that regressed beyond the tolerance
+    """
+    baseline = json.loads(path.read_text())["results"]
+    regressions = []
+    print(f"\nComparison with {path} (tolerance {tolerance:.0%}):")
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            before, after = baseline[name].get(metric), result.get(metric)
+            if not before or after is None:
+                continue
+            change = (after - before) / before
+            worse = -change if higher_is_better else change
+            marker = "REGRESSION" if worse > tolerance else ""
+            print(
+                f"  {name:<40} {metric:<12} {before:>12g} -> {after:<12g} "
+                f"{change:+7.1%} {marker}"
+            )
+            if marker:
+                regressions.append(f"{name} {metric} {change:+.1%}")
+    return regressions
+
+
+def finish(args, suite: str, results: dict[str, dict], params: dict):
+    """
+    Print results, save or compare a baseline and exit accordingly.
+
+    Exits with status 1 if a compared metric regressed beyond the tolerance.
+    """
+    print_results(results)
+    if args.save_baseline:
+        save_baseline(args.save_baseline, suite, results, params)
+    if args.compare:
+        regressions = compare_with_baseline(args.compare, results, args.tolerance)
+        if regressions:
+            print("\nFAIL: " + "; ".join(regressions))
+            sys.exit(1)
+        print("\nOK")
+
+
+def add_baseline_arguments(parser):
+    """Add the --save-baseline, --compare and --tolerance options."""
+    parser.add_argument("--save-baseline", type=Path, help="write results to JSON")
+    parser.add_argument("--compare", type=Path, help="baseline JSON to compare with")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.15,
+        help="allowed relative slowdown before failing (default 0.15)",
+    )
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""Benchmark of the fast JSON path for review lists and exports.
+
+Fills a temporary database and requests pages of reviews through two
+routes of a throwaway FastAPI app: one returns ``ReviewResponse`` models,
+which FastAPI validates and encodes (the previous implementation of
+``GET /reviews``), the other returns the body built by
+``ReviewService.get_reviews_json`` from Core rows. Both bodies are checked
+to be byte-identical. NDJSON export encoding is measured the same way
+against the previous standard-library encoder.
+
+Usage:
+    python -m benchmarks.serialization
+    python -m benchmarks.serialization --page-sizes 100,1000 \\
+        --save-baseline benchmarks/baselines/serialization.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from benchmarks.report import add_baseline_arguments, finish, measure
+
+SENTIMENTS = ("positive", "negative", "neutral")
+WORDS = ("доставка", "качество", "отличный", "ужасный", "товар", "сервис", "быстро")
+
+
+def _review(i: int, started: datetime) -> dict:
+    """Build synthetic review data with varied text length and timestamps."""
+    rng = random.Random(i)
+    return {
+        "text": " ".join(rng.choices(WORDS, k=rng.randint(5, 60))) + f" «{i}»",
+        "sentiment": SENTIMENTS[i % 3],
+        # Уверенность — вероятность выбранного класса, не меньше 1/3
+        "confidence": rng.uniform(1 / 3, 1),
+        "created_at": started + timedelta(microseconds=rng.randint(0, 10**6) * i),
+        "content_hash": None,
+        "duplicate_of": i - 1 if i % 10 == 0 else None,
+        "duplicate_count": 0,
+    }
+
+
+def _legacy_jsonl(rows) -> bytes:
+    """Encode export rows the way the export did before the fast path."""
+    dumps = json.JSONEncoder(ensure_ascii=False).encode
+    return "".join(
+        dumps(
+            {
+                "id": row.id,
+                "text": row.text,
+                "sentiment": row.sentiment,
+                "confidence": row.confidence,
+                "created_at": row.created_at.isoformat(),
+            }
+        )
+        + "\n"
+        for row in rows
+    ).encode()
+
+
+def build_app(session_factory):
+    """Build an app serving one page through response models and raw JSON."""
+    from fastapi import FastAPI, Response
+
+    from app.core.serialization import JSON_MEDIA_TYPE
+    from app.models.schemas import ReviewResponse
+    from app.services.review_service import ReviewService
+
+    app = FastAPI()
+
+    @app.get("/models", response_model=list[ReviewResponse])
+    async def page_models(after_id: int, limit: int, response: Response):
+        with session_factory() as db:
+            reviews = ReviewService(db).get_reviews(after_id=after_id, limit=limit)
+        if len(reviews) == limit:
+            response.headers["X-Next-After-Id"] = str(reviews[-1].id)
+        return reviews
+
+    @app.get("/json", response_model=list[ReviewResponse])
+    async def page_json(after_id: int, limit: int):
+        with session_factory() as db:
+            body, next_after_id = ReviewService(db).get_reviews_json(
+                after_id=after_id, limit=limit
+            )
+        headers = {"X-Next-After-Id": str(next_after_id)} if next_after_id else None
+        return Response(body, media_type=JSON_MEDIA_TYPE, headers=headers)
+
+    return app
+
+
+def bench_pages(
+    session_factory, table_size: int, page_sizes: list[int], repeat: int
+) -> dict:
+    """Request pages through both routes and compare the bodies."""
+    import httpx
+
+    app = build_app(session_factory)
+    results = {}
+    loop = asyncio.new_event_loop()
+    client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://bench"
+    )
+    try:
+        for limit in page_sizes:
+            offsets = [random.randint(0, table_size - limit) for _ in range(64)]
+            for after_id in offsets[:8]:
+                params = {"after_id": after_id, "limit": limit}
+                old, new = (
+                    loop.run_until_complete(client.get(path, params=params))
+                    for path in ("/models", "/json")
+                )
+                if old.content != new.content or old.headers.get(
+                    "x-next-after-id"
+                ) != new.headers.get("x-next-after-id"):
+                    sys.exit(f"Bodies differ for after_id={after_id} limit={limit}")
+
+            for name, path in (("models", "/models"), ("json", "/json")):
+                cursor = iter(offsets * (repeat // len(offsets) + 2))
+                results[f"page.{name}[{limit}]"] = measure(
+                    lambda path=path, limit=limit, cursor=cursor: (
+                        loop.run_until_complete(
+                            client.get(
+                                path, params={"after_id": next(cursor), "limit": limit}
+                            )
+                        )
+                    ),
+                    repeat,
+                )
+    finally:
+        loop.run_until_complete(client.aclose())
+        loop.close()
+    return results
+
+
+def bench_export(session_factory, repeat: int) -> dict:
+    """Encode the whole table as NDJSON with the previous and the fast encoder."""
+    from app.core.serialization import encode_rows_ndjson
+    from app.repositories.review_repository import ReviewRepository
+
+    with session_factory() as db:
+        rows = list(ReviewRepository(db).iter_rows(chunk_size=5000))
+
+    old, new = _legacy_jsonl(rows), encode_rows_ndjson(rows)
+    # Разделители стали компактными; содержимое записей должно совпадать
+    if [json.loads(line) for line in old.splitlines()] != [
+        json.loads(line) for line in new.splitlines()
+    ]:
+        sys.exit("NDJSON exports differ")
+
+    return {
+        f"export.stdlib[{len(rows)}]": measure(
+            lambda: _legacy_jsonl(rows), repeat, warmup=1
+        ),
+        f"export.fast[{len(rows)}]": measure(
+            lambda: encode_rows_ndjson(rows), repeat, warmup=1
+        ),
+    }
+
+
+def main():
+    """Run the serialization benchmarks."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--table-size", type=int, default=20000)
+    parser.add_argument(
+        "--page-sizes",
+        type=lambda value: [int(size) for size in value.split(",")],
+        default=[100, 1000],
+    )
+    parser.add_argument("--repeat", type=int, default=200)
+    add_baseline_arguments(parser)
+    args = parser.parse_args()
+
+    random.seed(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        # Настройки читаются при импорте приложения, поэтому задаем их заранее
+        os.environ["SENTIMENT_MODEL_DIR"] = os.path.join(tmp, "models")
+        os.environ["USE_ML_SENTIMENT"] = "false"
+        from sqlalchemy.orm import sessionmaker
+
+        from app.core.database import build_engine
+        from app.core.migrations import run_migrations
+        from app.core.serialization import orjson
+        from app.repositories.review_repository import ReviewRepository
+
+        engine = build_engine(f"sqlite:///{Path(tmp) / 'bench.db'}", "default")
+        run_migrations(engine)
+        Session = sessionmaker(bind=engine, autoflush=False)
+        started = datetime(2024, 5, 1)
+        with Session() as db:
+            repository = ReviewRepository(db)
+            for start in range(0, args.table_size, 5000):
+                repository.create_many(
+                    [
+                        _review(i, started)
+                        for i in range(start, min(start + 5000, args.table_size))
+                    ]
+                )
+
+        print(f"JSON encoder: {'orjson' if orjson else 'json (stdlib)'}\n")
+        results = bench_pages(Session, args.table_size, args.page_sizes, args.repeat)
+        results.update(bench_export(Session, max(3, args.repeat // 20)))
+        engine.dispose()
+
+    finish(
+        args,
+        "serialization",
+        results,
+        {
+            "table_size": args.table_size,
+            "page_sizes": args.page_sizes,
+            "repeat": args.repeat,
+            "encoder": "orjson" if orjson else "json",
+        },
+    )
+
+
+if __name__ == "__main__":
+    main()
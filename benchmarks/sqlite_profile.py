@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""Mixed read/write throughput of the SQLite database profiles.
+
+Usage:
+    python -m benchmarks.sqlite_profile --seconds 5 --readers 8 --writers 2
+"""
+
+import argparse
+import random
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import build_engine
+from app.core.migrations import run_migrations
+from app.repositories.review_repository import ReviewRepository
+
+SENTIMENTS = ("positive", "negative", "neutral")
+
+
+def _review(i: int) -> dict:
+    """Build synthetic review data."""
+    return {
+        "text": f"Отзыв номер {i}, все отлично работает",
+        "sentiment": SENTIMENTS[i % 3],
+        "confidence": 0.5,
+        "created_at": datetime.utcnow(),
+    }
+
+
+def run_profile(
+    profile: str, split: bool, seconds: float, readers: int, writers: int, rows: int
+) -> dict:
+    """
+    Run the mixed workload against a fresh database file.
+
+    Args:
+        profile: Database profile name
+        split: Whether to use separate read and write engines
+        seconds: Duration of the measured run
+        readers: Number of reader threads
+        writers: Number of writer threads
+        rows: Number of reviews preloaded before the run
+
+    Returns:
+        Throughput and error counts
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{Path(tmp) / 'bench.db'}"
+        if split:
+            write_engine = build_engine(url, profile, pool_size=1, max_overflow=0)
+            read_engine = build_engine(url, profile, read_only=True)
+        else:
+            write_engine = read_engine = build_engine(url, profile)
+
+        run_migrations(write_engine)
+        WriteSession = sessionmaker(bind=write_engine, autoflush=False)
+        ReadSession = sessionmaker(bind=read_engine, autoflush=False)
+
+        with WriteSession() as db:
+            repository = ReviewRepository(db)
+            for start in range(0, rows, 1000):
+                repository.create_many(
+                    [_review(i) for i in range(start, min(start + 1000, rows))]
+                )
+
+        counts = {"reads": 0, "writes": 0, "errors": 0}
+        lock = threading.Lock()
+        stop = threading.Event()
+
+        def reader():
+            done = errors = 0
+            with ReadSession() as db:
+                repository = ReviewRepository(db)
+                while not stop.is_set():
+                    try:
+                        repository.get_page(
+                            sentiment_filter=random.choice(SENTIMENTS),
+                            after_id=random.randint(0, rows),
+                            limit=100,
+                        )
+                        db.rollback()
+                        done += 1
+                    except Exception:
+                        errors += 1
+            with lock:
+                counts["reads"] += done
+                counts["errors"] += errors
+
+        def writer():
+            done = errors = 0
+            i = rows
+            while not stop.is_set():
+                try:
+                    with WriteSession() as db:
+                        ReviewRepository(db).create(_review(i))
+                    done += 1
+                except Exception:
+                    errors += 1
+                i += 1
+            with lock:
+                counts["writes"] += done
+                counts["errors"] += errors
+
+        threads = [threading.Thread(target=reader) for _ in range(readers)]
+        threads += [threading.Thread(target=writer) for _ in range(writers)]
+        for thread in threads:
+            thread.start()
+        time.sleep(seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+        write_engine.dispose()
+        read_engine.dispose()
+
+    return {
+        "profile": profile + (" (split)" if split else ""),
+        "reads_per_sec": round(counts["reads"] / seconds, 1),
+        "writes_per_sec": round(counts["writes"] / seconds, 1),
+        "errors": counts["errors"],
+    }
+
+
+def main():
+    """Compare the default and production profiles under the same load."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--rows", type=int, default=20000)
+    args = parser.parse_args()
+
+    results = [
+        run_profile(profile, split, args.seconds, args.readers, args.writers, args.rows)
+        for profile, split in (
+            ("default", False),
+            ("production", False),
+            ("production", True),
+        )
+    ]
+
+    print(f"{'profile':<20} {'reads/s':>10} {'writes/s':>10} {'errors':>8}")
+    for result in results:
+        print(
+            f"{result['profile']:<20} {result['reads_per_sec']:>10} "
+            f"{result['writes_per_sec']:>10} {result['errors']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
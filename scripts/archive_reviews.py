@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""Archival of old reviews into compressed segment files.
+
+Runs one retention pass: reviews older than the retention age are moved
+from the ``reviews`` table into the archive directory, and the catalog of
+segments is updated in the same transaction that deletes them. Useful from
+cron when the service runs with ``RETENTION_ENABLED=false``; passes of
+the service and of this script never overlap.
+
+Usage:
+    python -m scripts.archive_reviews
+    python -m scripts.archive_reviews --max-age-days 30 --batch-size 20000
+"""
+
+import argparse
+import sys
+import time
+
+
+def main():
+    """Parse arguments and run one archival pass."""
+    from app.config import settings
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--max-age-days", type=int, default=settings.retention_max_age_days
+    )
+    parser.add_argument("--batch-size", type=int, default=settings.retention_batch_size)
+    args = parser.parse_args()
+
+    from app.core.database import SessionLocal, create_tables
+    from app.repositories.review_archive import review_archive
+    from app.services.retention import RetentionWorker
+
+    create_tables()
+    try:
+        worker = RetentionWorker(
+            review_archive,
+            max_age_days=args.max_age_days,
+            interval_seconds=settings.retention_interval_seconds,
+            batch_size=args.batch_size,
+        )
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(2)
+
+    started = time.perf_counter()
+    result = worker.run_once(SessionLocal)
+    if result["skipped"]:
+        print("Another archival pass is running", file=sys.stderr)
+        sys.exit(1)
+
+    with SessionLocal() as db:
+        stats = review_archive.stats(db)
+    print(
+        f"Archived {result['archived']} reviews into {result['segments']} segments "
+        f"in {time.perf_counter() - started:.1f} s; archive holds "
+        f"{stats['archived_reviews']} reviews in {stats['segments']} segments "
+        f"({stats['compression']})",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Bulk export of stored reviews to JSONL, CSV or Parquet.
+
+Streams rows from a server-side cursor straight into the output file, with
+the same encoders as ``GET /api/v1/reviews/export``. Memory does not grow
+with table size.
+
+Usage:
+    python -m scripts.export_reviews reviews.jsonl
+    python -m scripts.export_reviews negative.csv --sentiment negative \\
+        --created-after 2024-01-01 --created-before 2024-02-01
+    python -m scripts.export_reviews - --format jsonl | gzip > reviews.jsonl.gz
+"""
+
+import argparse
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+FORMATS = ("jsonl", "csv", "parquet")
+
+
+def detect_format(path: str) -> str:
+    """Guess the output format from the file extension."""
+    suffix = Path(path).suffix.lower().lstrip(".")
+    return suffix if suffix in FORMATS else "jsonl"
+
+
+def main():
+    """Parse arguments and run the export."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("output", help="output file, or - for stdout")
+    parser.add_argument("--format", choices=FORMATS, help="default: by extension")
+    parser.add_argument("--sentiment", choices=("positive", "negative", "neutral"))
+    parser.add_argument("--created-after", type=datetime.fromisoformat)
+    parser.add_argument("--created-before", type=datetime.fromisoformat)
+    parser.add_argument("--after-id", type=int)
+    args = parser.parse_args()
+
+    from app.core.database import create_tables
+    from app.models.schemas import to_storage_time
+    from app.services.review_export import stream_export, validate_export_format
+
+    fmt = args.format or detect_format(args.output)
+    try:
+        validate_export_format(fmt)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(2)
+
+    # Выгрузка читает и каталог архива, поэтому схема должна быть актуальной
+    create_tables()
+    # Границы с часовым поясом приводим к UTC, как в API
+    created_after, created_before = (
+        to_storage_time(value) if value is not None else None
+        for value in (args.created_after, args.created_before)
+    )
+    parts = stream_export(
+        fmt, args.sentiment, created_after, created_before, args.after_id
+    )
+    started = time.perf_counter()
+    written = 0
+    if args.output == "-":
+        output = sys.stdout.buffer
+        for part in parts:
+            output.write(part)
+            written += len(part)
+        output.flush()
+    else:
+        # Сначала пишем во временный файл, чтобы не оставить обрезанную выгрузку
+        path = Path(args.output)
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        with open(tmp_path, "wb") as output:
+            for part in parts:
+                output.write(part)
+                written += len(part)
+        tmp_path.replace(path)
+
+    elapsed = time.perf_counter() - started
+    print(
+        f"Exported {written / 1e6:.1f} MB in {elapsed:.1f} s "
+        f"({written / 1e6 / elapsed if elapsed else 0:.1f} MB/s)",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+"""Bulk import of reviews from JSONL or CSV files.
+
+Streams the file record by record, predicts sentiment for chunks of texts
+with one vectorized model call, and bulk inserts the chunks into the
+``reviews`` table, committing every ``--transaction-size`` records. After
+each commit the number of consumed records is written to a checkpoint
+file, so an interrupted import resumes where the last commit left off.
+Memory use does not depend on file size. Imported reviews are hashed and
+exact duplicates linked to their canonical reviews once the import ends.
+
+Usage:
+    python -m scripts.import_reviews reviews.jsonl
+    python -m scripts.import_reviews dump.csv --text-field body --workers 4
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import UTC, datetime
+from pathlib import Path
+
+FORMATS = ("jsonl", "csv")
+
+# Сервис процесса пула инференса (или основного процесса при --workers 1)
+_service = None
+
+
+def detect_format(path: Path) -> str:
+    """Guess the input format from the file extension."""
+    return "csv" if path.suffix.lower() == ".csv" else "jsonl"
+
+
+def read_records(path: Path, fmt: str, skip: int = 0) -> Iterator[dict]:
+    """
+    Stream raw records from a JSONL or CSV file.
+
+    Args:
+        path: Input file
+        fmt: 'jsonl' or 'csv'
+        skip: Number of leading records to skip (already imported)
+
+    Yields:
+        One dictionary per record; malformed JSON lines yield an empty dict
+        so that record numbering stays stable for checkpoints
+    """
+    with open(path, encoding="utf-8", newline="") as source:
+        if fmt == "csv":
+            yield from itertools.islice(csv.DictReader(source), skip, None)
+            return
+
+        # Пропущенные строки не разбираем: для продолжения импорта достаточно счета
+        lines = (line for line in source if line.strip())
+        for line in itertools.islice(lines, skip, None):
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = {}
+            yield record if isinstance(record, dict) else {}
+
+
+def to_review(record: dict, text_field: str, now: datetime) -> dict | None:
+    """
+    Extract review data from a raw record.
+
+    Args:
+        record: Raw record
+        text_field: Name of the field holding the review text
+        now: Creation time for records without a valid 'created_at'
+
+    Returns:
+        Review data without sentiment, or None if the text is missing or empty
+    """
+    text = record.get(text_field)
+    if not isinstance(text, str) or not text.strip():
+        return None
+
+    created_at = now
+    if record.get("created_at"):
+        try:
+            created_at = datetime.fromisoformat(str(record["created_at"]))
+        except ValueError:
+            pass
+    # В базе время хранится в UTC без часового пояса
+    if created_at.tzinfo is not None:
+        created_at = created_at.astimezone(UTC).replace(tzinfo=None)
+    return {"text": text.strip(), "created_at": created_at}
+
+
+def chunked(items: Iterable, size: int) -> Iterator[list]:
+    """Split an iterable into lists of at most ``size`` items."""
+    iterator = iter(items)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
+
+
+def predict_chunk(texts: list[str]) -> list[tuple[str, float]]:
+    """
+    Predict sentiment for a chunk of texts.
+
+    Module-level so that it can run in a process pool. The prediction cache
+    is disabled: imported texts are mostly unique and would only evict the
+    entries the API relies on.
+
+    Returns:
+        (sentiment, confidence) for each text, in input order
+    """
+    global _service
+    if _service is None:
+        from app.config import settings
+        from app.services.prediction_cache import PredictionCache
+        from app.services.sentiment_service import SentimentService
+
+        _service = SentimentService(
+            use_ml=settings.use_ml_sentiment,
+            cache=PredictionCache(max_size=0, ttl_seconds=0, enabled=False),
+        )
+    return [
+        (prediction.sentiment, prediction.confidence)
+        for prediction in _service.predict_many(texts)
+    ]
+
+
+def _texts(chunk: list) -> list[str]:
+    """Texts of the valid reviews of a chunk."""
+    return [review["text"] for _, review in chunk if review]
+
+
+def predict_stream(
+    chunks: Iterable[list], workers: int
+) -> Iterator[tuple[list, list[tuple[str, float]]]]:
+    """
+    Predict sentiment for a stream of chunks of (record number, review) items.
+
+    Items whose review is None (invalid records) are not scored. With
+    several workers, chunks are scored in a process pool with a bounded
+    number of chunks in flight, so reading stays only slightly ahead of
+    inference and results keep input order.
+
+    Yields:
+        Tuple of (chunk, predictions for the valid reviews of the chunk)
+    """
+    if workers <= 1:
+        for chunk in chunks:
+            yield chunk, predict_chunk(_texts(chunk))
+        return
+
+    # spawn: дочерние процессы не наследуют соединения с БД
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+    ) as pool:
+        in_flight: deque[tuple[list, Future]] = deque()
+        for chunk in chunks:
+            in_flight.append((chunk, pool.submit(predict_chunk, _texts(chunk))))
+            if len(in_flight) >= workers * 2:
+                done, future = in_flight.popleft()
+                yield done, future.result()
+        while in_flight:
+            done, future = in_flight.popleft()
+            yield done, future.result()
+
+
+def load_checkpoint(path: Path, source: Path) -> dict:
+    """
+    Read the import checkpoint.
+
+    Raises:
+        ValueError: If the checkpoint belongs to another input file
+    """
+    empty = {"source": str(source), "records": 0, "imported": 0, "skipped": 0}
+    if not path.exists():
+        return empty
+    with open(path, encoding="utf-8") as checkpoint_file:
+        checkpoint = json.load(checkpoint_file)
+    if checkpoint.get("source") != str(source):
+        raise ValueError(
+            f"Checkpoint {path} belongs to {checkpoint.get('source')}, not {source}"
+        )
+    return {**empty, **checkpoint}
+
+
+def save_checkpoint(path: Path, checkpoint: dict):
+    """Replace the checkpoint file atomically."""
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as tmp:
+        json.dump(checkpoint, tmp)
+        tmp.flush()
+        os.fsync(tmp.fileno())
+    os.replace(tmp_path, path)
+
+
+class Progress:
+    """Periodic progress and throughput reporting to stderr."""
+
+    def __init__(self, interval: float, already_done: int):
+        """
+        Initialize reporter.
+
+        Args:
+            interval: Seconds between reports
+            already_done: Records consumed by previous runs
+        """
+        self.interval = interval
+        self.already_done = already_done
+        self.started = time.perf_counter()
+        self._last_report = self.started
+
+    def report(self, checkpoint: dict, force: bool = False):
+        """Print a progress line if the interval has passed."""
+        now = time.perf_counter()
+        if not force and now - self._last_report < self.interval:
+            return
+        self._last_report = now
+        elapsed = now - self.started
+        rate = (checkpoint["records"] - self.already_done) / elapsed if elapsed else 0
+        print(
+            f"records {checkpoint['records']:>12,}  "
+            f"imported {checkpoint['imported']:>12,}  "
+            f"skipped {checkpoint['skipped']:>8,}  "
+            f"{rate:>10,.0f} rec/s  {elapsed:8.1f} s",
+            file=sys.stderr,
+            flush=True,
+        )
+
+
+def import_file(
+    source: Path,
+    fmt: str,
+    text_field: str,
+    checkpoint_path: Path,
+    chunk_size: int,
+    transaction_size: int,
+    workers: int,
+    progress_interval: float,
+) -> dict:
+    """
+    Import a file into the reviews table.
+
+    Args:
+        source: Input file
+        fmt: 'jsonl' or 'csv'
+        text_field: Name of the field holding the review text
+        checkpoint_path: Checkpoint file used to resume
+        chunk_size: Reviews per model call and per insert statement
+        transaction_size: Records consumed between commits and checkpoints
+        workers: Inference processes; 1 scores in the importing process
+        progress_interval: Seconds between progress reports
+
+    Returns:
+        Final checkpoint
+    """
+    from sqlalchemy import func, select
+
+    from app.core.database import SessionLocal, create_tables
+    from app.core.migrations import link_exact_duplicates
+    from app.models.database import Review
+    from app.repositories.review_repository import ReviewRepository
+
+    checkpoint = load_checkpoint(checkpoint_path, source)
+    if checkpoint.get("completed"):
+        print(f"{source} is already imported ({checkpoint['imported']:,} reviews)")
+        return checkpoint
+    if checkpoint["records"]:
+        print(f"Resuming after {checkpoint['records']:,} records", file=sys.stderr)
+
+    create_tables()
+    now = datetime.utcnow()
+
+    # Каждый элемент несет номер записи для контрольной точки; некорректные
+    # записи (None) идут по конвейеру, чтобы учитываться в счетчиках
+    numbered = enumerate(
+        read_records(source, fmt, skip=checkpoint["records"]),
+        start=checkpoint["records"] + 1,
+    )
+    reviews = (
+        (number, to_review(record, text_field, now)) for number, record in numbered
+    )
+    progress = Progress(progress_interval, checkpoint["records"])
+
+    db = SessionLocal()
+    try:
+        repository = ReviewRepository(db)
+        # Импорт вставляет отзывы без хэшей; дубликаты среди отзывов после
+        # этого id связываются в конце
+        checkpoint.setdefault(
+            "after_id", db.scalar(select(func.coalesce(func.max(Review.id), 0)))
+        )
+        pending = 0
+        for chunk, predictions in predict_stream(chunked(reviews, chunk_size), workers):
+            rows = [
+                {**review, "sentiment": sentiment, "confidence": confidence}
+                for review, (sentiment, confidence) in zip(
+                    (review for _, review in chunk if review), predictions, strict=True
+                )
+            ]
+            repository.insert_many(rows)
+
+            checkpoint["records"] = chunk[-1][0]
+            checkpoint["imported"] += len(rows)
+            checkpoint["skipped"] += len(chunk) - len(rows)
+            pending += len(chunk)
+
+            if pending >= transaction_size:
+                db.commit()
+                save_checkpoint(checkpoint_path, checkpoint)
+                pending = 0
+            progress.report(checkpoint)
+
+        db.commit()
+
+        _, linked = link_exact_duplicates(
+            db.connection(), after_id=checkpoint["after_id"]
+        )
+        db.commit()
+        checkpoint["duplicates"] = linked
+    except BaseException:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    checkpoint["completed"] = True
+    save_checkpoint(checkpoint_path, checkpoint)
+    progress.report(checkpoint, force=True)
+    return checkpoint
+
+
+def main():
+    """Parse arguments and run the import."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("source", type=Path, help="JSONL or CSV file to import")
+    parser.add_argument("--format", choices=FORMATS, help="default: by extension")
+    parser.add_argument("--text-field", default="text")
+    parser.add_argument(
+        "--checkpoint", type=Path, help="default: <source>.checkpoint.json"
+    )
+    parser.add_argument(
+        "--restart", action="store_true", help="ignore an existing checkpoint"
+    )
+    parser.add_argument("--chunk-size", type=int, default=2000)
+    parser.add_argument("--transaction-size", type=int, default=100000)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--progress-interval", type=float, default=2.0)
+    args = parser.parse_args()
+
+    source = args.source.resolve()
+    checkpoint_path = args.checkpoint or source.with_name(
+        f"{source.name}.checkpoint.json"
+    )
+    if args.restart and checkpoint_path.exists():
+        checkpoint_path.unlink()
+
+    started = time.perf_counter()
+    try:
+        result = import_file(
+            source,
+            args.format or detect_format(source),
+            args.text_field,
+            checkpoint_path,
+            chunk_size=args.chunk_size,
+            transaction_size=args.transaction_size,
+            workers=args.workers,
+            progress_interval=args.progress_interval,
+        )
+    except KeyboardInterrupt:
+        print("\nInterrupted; rerun the same command to resume.", file=sys.stderr)
+        sys.exit(130)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(2)
+
+    elapsed = time.perf_counter() - started
+    print(
+        f"Imported {result['imported']:,} reviews "
+        f"({result['skipped']:,} skipped, {result.get('duplicates', 0):,} "
+        f"linked as duplicates) in {elapsed:.1f} s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""Production launcher: a prefork master running several uvicorn workers.
+
+The master binds the listening socket, imports the application, migrates
+the database and loads the model once, then forks the workers. Everything
+loaded before the fork, including the model, is shared by the workers as
+copy-on-write pages, and each worker starts serving without loading
+anything. Workers accept connections from the shared socket, use uvloop and
+httptools when they are installed, and can be pinned to their own CPU.
+
+Signals handled by the master:
+    SIGTERM, SIGINT  graceful shutdown of all workers
+    SIGHUP           rolling restart: workers are replaced one at a time, each
+                     new worker must be ready before the old one is stopped
+
+Usage:
+    python -m scripts.serve --host 0.0.0.0 --port 8000 --workers 8
+"""
+
+import argparse
+import gc
+import importlib.util
+import logging
+import os
+import select
+import signal
+import socket
+import sys
+import time
+from dataclasses import dataclass, field
+
+logger = logging.getLogger("serve")
+
+# Не перезапускать упавший воркер чаще, чем раз в столько секунд
+RESPAWN_DELAY = 1.0
+
+
+def available_cpus() -> list[int]:
+    """Return the CPUs this process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def event_loop_and_http() -> tuple[str, str]:
+    """Pick uvloop and httptools when they are installed."""
+    loop = "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+    http = "httptools" if importlib.util.find_spec("httptools") else "h11"
+    return loop, http
+
+
+def bind_socket(host: str, port: int, backlog: int) -> socket.socket:
+    """Create the listening socket shared by all workers."""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def preload():
+    """
+    Import the application and load shared state in the master.
+
+    Database connections opened for migrations are closed before forking,
+    and the preloaded objects are moved out of the garbage collector's
+    reach so that collections in the workers do not touch (and copy) their
+    pages.
+
+    Returns:
+        ASGI application
+    """
+    from app.config import settings
+    from app.core.database import create_tables, engine, read_engine
+    from app.main import app
+    from app.ml.registry import model_registry
+
+    create_tables()
+    if settings.use_ml_sentiment:
+        model_registry.load()
+
+    # Соединения с БД не должны переходить в дочерние процессы
+    engine.dispose()
+    read_engine.dispose()
+
+    gc.collect()
+    gc.freeze()
+    return app
+
+
+@dataclass
+class Worker:
+    """A forked worker process."""
+
+    slot: int
+    pid: int
+    ready_fd: int
+    started_at: float = field(default_factory=time.monotonic)
+
+
+class Master:
+    """Forks, supervises and restarts uvicorn workers."""
+
+    def __init__(
+        self,
+        app,
+        sock: socket.socket,
+        workers: int,
+        cpus: list[int] | None,
+        graceful_timeout: float,
+    ):
+        """
+        Initialize master.
+
+        Args:
+            app: Preloaded ASGI application
+            sock: Listening socket shared by the workers
+            workers: Number of worker processes
+            cpus: CPU for each worker slot (round-robin); None disables pinning
+            graceful_timeout: Seconds a stopping worker may finish requests
+        """
+        self.app = app
+        self.sock = sock
+        self.num_workers = workers
+        self.cpus = cpus
+        self.graceful_timeout = graceful_timeout
+        self.loop, self.http = event_loop_and_http()
+
+        self.workers: dict[int, Worker] = {}
+        self._signals: list[int] = []
+        self._stopping = False
+
+    # --- дочерний процесс -------------------------------------------------
+
+    def _run_worker(self, slot: int, ready_fd: int):
+        """Serve requests in a freshly forked worker; never returns."""
+        import uvicorn
+
+        exit_code = 1
+        try:
+            for sig in (signal.SIGINT, signal.SIGTERM, signal.SIGHUP, signal.SIGCHLD):
+                signal.signal(sig, signal.SIG_DFL)
+            signal.set_wakeup_fd(-1)
+
+            if self.cpus:
+                os.sched_setaffinity(0, {self.cpus[slot % len(self.cpus)]})
+
+            class ReadyServer(uvicorn.Server):
+                async def startup(self, sockets=None):
+                    await super().startup(sockets=sockets)
+                    # Сообщаем мастеру, что воркер принимает соединения
+                    if not self.should_exit:
+                        os.write(ready_fd, b"1")
+                    os.close(ready_fd)
+
+            config = uvicorn.Config(
+                self.app,
+                loop=self.loop,
+                http=self.http,
+                lifespan="on",
+                access_log=False,
+                timeout_graceful_shutdown=self.graceful_timeout,
+            )
+            ReadyServer(config).run(sockets=[self.sock])
+            exit_code = 0
+        except BaseException:
+            logger.exception("Worker %d crashed", os.getpid())
+        finally:
+            # Обработчики atexit мастера в воркере не выполняем
+            os._exit(exit_code)
+
+    # --- мастер -----------------------------------------------------------
+
+    def spawn(self, slot: int) -> Worker:
+        """Fork a worker for a slot."""
+        ready_read, ready_write = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(ready_read)
+            self._run_worker(slot, ready_write)
+        os.close(ready_write)
+        worker = Worker(slot=slot, pid=pid, ready_fd=ready_read)
+        self.workers[pid] = worker
+        logger.info("Started worker %d in slot %d", pid, slot)
+        return worker
+
+    def wait_ready(self, worker: Worker, timeout: float) -> bool:
+        """Wait until a worker reports that it accepts connections."""
+        try:
+            readable, _, _ = select.select([worker.ready_fd], [], [], timeout)
+            return bool(readable) and os.read(worker.ready_fd, 1) == b"1"
+        finally:
+            os.close(worker.ready_fd)
+            worker.ready_fd = -1
+
+    def stop_worker(self, worker: Worker, timeout: float):
+        """Ask a worker to shut down gracefully and kill it after the timeout."""
+        self.workers.pop(worker.pid, None)
+        try:
+            os.kill(worker.pid, signal.SIGTERM)
+        except ProcessLookupError:
+            return
+
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            pid, _ = os.waitpid(worker.pid, os.WNOHANG)
+            if pid:
+                return
+            time.sleep(0.05)
+        logger.warning("Worker %d did not stop in %.0f s, killing", worker.pid, timeout)
+        os.kill(worker.pid, signal.SIGKILL)
+        os.waitpid(worker.pid, 0)
+
+    def rolling_restart(self):
+        """Replace workers one at a time without closing the socket."""
+        logger.info("Rolling restart of %d workers", len(self.workers))
+        for old in sorted(self.workers.values(), key=lambda worker: worker.slot):
+            if self._stopping:
+                return
+            new = self.spawn(old.slot)
+            if not self.wait_ready(new, self.graceful_timeout):
+                logger.error("Worker %d failed to start, restart aborted", new.pid)
+                self.stop_worker(new, self.graceful_timeout)
+                return
+            self.stop_worker(old, self.graceful_timeout)
+        logger.info("Rolling restart finished")
+
+    def reap(self):
+        """Collect exited workers and replace the ones that died unexpectedly."""
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if not pid:
+                return
+
+            worker = self.workers.pop(pid, None)
+            if worker is None or self._stopping:
+                continue
+            if worker.ready_fd >= 0:
+                os.close(worker.ready_fd)
+            logger.error(
+                "Worker %d exited with status %d, restarting",
+                pid,
+                os.waitstatus_to_exitcode(status),
+            )
+            # Не даем воркеру, падающему при старте, занять процессор циклом
+            delay = RESPAWN_DELAY - (time.monotonic() - worker.started_at)
+            if delay > 0:
+                time.sleep(delay)
+            self.spawn(worker.slot)
+
+    def stop(self):
+        """Stop all workers gracefully."""
+        self._stopping = True
+        logger.info("Stopping %d workers", len(self.workers))
+        for worker in list(self.workers.values()):
+            try:
+                os.kill(worker.pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+        deadline = time.monotonic() + self.graceful_timeout
+        while self.workers and time.monotonic() < deadline:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid:
+                self.workers.pop(pid, None)
+            else:
+                time.sleep(0.05)
+        for worker in self.workers.values():
+            logger.warning("Killing worker %d", worker.pid)
+            os.kill(worker.pid, signal.SIGKILL)
+
+    def _on_signal(self, signum, frame):
+        self._signals.append(signum)
+
+    def run(self):
+        """Start the workers and supervise them until shutdown."""
+        wakeup_read, wakeup_write = os.pipe()
+        os.set_blocking(wakeup_read, False)
+        os.set_blocking(wakeup_write, False)
+        signal.set_wakeup_fd(wakeup_write)
+        for sig in (signal.SIGINT, signal.SIGTERM, signal.SIGHUP, signal.SIGCHLD):
+            signal.signal(sig, self._on_signal)
+
+        for slot in range(self.num_workers):
+            self.spawn(slot)
+        for worker in list(self.workers.values()):
+            if not self.wait_ready(worker, self.graceful_timeout):
+                logger.error("Worker %d failed to start", worker.pid)
+
+        logger.info(
+            "Serving with %d workers (loop=%s, http=%s, cpus=%s)",
+            self.num_workers,
+            self.loop,
+            self.http,
+            self.cpus or "any",
+        )
+
+        while True:
+            # Сигналы будят мастера через wakeup fd
+            select.select([wakeup_read], [], [], 1.0)
+            try:
+                os.read(wakeup_read, 1024)
+            except BlockingIOError:
+                pass
+
+            signals, self._signals = self._signals, []
+            if signal.SIGINT in signals or signal.SIGTERM in signals:
+                self.stop()
+                return
+            self.reap()
+            if signal.SIGHUP in signals:
+                self.rolling_restart()
+                self.reap()
+
+
+def main():
+    """Parse arguments, preload the application and run the master."""
+    from app.config import settings
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default=settings.server_host)
+    parser.add_argument("--port", type=int, default=settings.server_port)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=settings.server_workers,
+        help="0: one per available CPU",
+    )
+    parser.add_argument(
+        "--no-cpu-affinity",
+        dest="cpu_affinity",
+        action="store_false",
+        default=settings.server_cpu_affinity,
+    )
+    parser.add_argument(
+        "--graceful-timeout", type=float, default=settings.server_graceful_timeout
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s [%(process)d] %(levelname)s %(message)s"
+    )
+
+    cpus = available_cpus()
+    workers = args.workers or len(cpus)
+    if settings.write_behind_enabled and workers > 1:
+        # Журнал write-behind выделяет id отзывов внутри одного процесса
+        sys.exit("write-behind requires a single worker: use --workers 1")
+    pin = args.cpu_affinity and hasattr(os, "sched_setaffinity") and workers > 1
+
+    sock = bind_socket(args.host, args.port, settings.server_backlog)
+    started = time.perf_counter()
+    app = preload()
+    logger.info(
+        "Preloaded application in %.0f ms, listening on %s:%d",
+        (time.perf_counter() - started) * 1000,
+        args.host,
+        args.port,
+    )
+
+    Master(
+        app,
+        sock,
+        workers=workers,
+        cpus=cpus if pin else None,
+        graceful_timeout=args.graceful_timeout,
+    ).run()
+
+
+if __name__ == "__main__":
+    main()